@@ -1,19 +1,25 @@
+import time
+from datetime import timedelta
+import click
 from flask import Flask
 from flask_cors import CORS
 from config import Config, db, jwt
-from models import TokenBlocklist
-from seed import demo_seed_data
+from models import TokenBlocklist, User, recount_counters
+from seed import demo_seed_data, synthetic_seed_data
 # from models import User, Universe, character_universes, AlignmentType, Character, TokenBlocklist, Location, Note, LocationType, character_notes, note_universes, character_locations, location_notes
-from routes import auth_bp, universe_bp, character_bp, note_bp, location_bp, user_bp
+from routes import auth_bp, universe_bp, character_bp, note_bp, location_bp, user_bp, search_bp, system_bp, metrics_bp, jobs_bp
+from utils import revoked_tokens, rebuild_search_index, warm_up_database
+from cache import TTLCache
+from revocation import RevokedTokenIndex
+from passwords import PasswordHasher
+from migrations import upgrade
+from sqlalchemy import select
+from serialization import FastJSONProvider
+from database import engine_options, configure_engine, ReplicaRouter, replicate_sqlite, sqlite_path
+from metrics import request_metrics
+from jobs import JobRunner, job_runner
 # from utils import get_current_user, get_owned_universe_ids, get_request_universe_ids, character_autherization, check_if_token_revoked
 
-
-app = Flask(__name__)
-app.config.from_object(Config)
-CORS(app)
-db.init_app(app)
-jwt.init_app(app)
-
 #! Link to frontend
 # @app.route('/api/test-connection')
 # def test_connection():
@@ -25,23 +31,170 @@ all_blueprints = [
     (character_bp, '/api/characters'),
     (note_bp, '/api/notes'),
     (location_bp, '/api/'),
-    (user_bp, '/api/users')
+    (user_bp, '/api/users'),
+    (search_bp, '/api/search'),
+    (system_bp, '/api/system'),
+    (metrics_bp, '/api/metrics'),
+    (jobs_bp, '/api/jobs')
 ]
 
-for bp, prefix in all_blueprints:
-    app.register_blueprint(bp, url_prefix=prefix)
 
+def create_app(config=Config):
+    """
+    Builds the Flask app from a config object. Nothing here connects to the database or
+    touches schema or data: engines open connections lazily on the first query, and
+    migrations, seeding and warm_up() are explicit (CLI commands or the caller).
+    """
+    app = Flask(__name__)
+    app.config.from_object(config)
+    app.json = FastJSONProvider(app)
+    CORS(app)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
+    db.init_app(app)
+    with app.app_context():
+        configure_engine(db.engine, app.config)
+        if 'replica' in db.engines:
+            configure_engine(db.engines['replica'], app.config, read_only=True)
+        request_metrics.init_app(app, db.engines.values())
+    jwt.init_app(app)
+    # Caches, the hasher's pool, replica state and background threads belong to this app
+    # (app.extensions), so building a second app leaves the first one working.
+    app.extensions['user_cache'] = TTLCache(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL'])
+    app.extensions['dashboard_cache'] = TTLCache(app.config['DASHBOARD_CACHE_SIZE'], app.config['DASHBOARD_CACHE_TTL'])
+    app.extensions['password_hasher'] = PasswordHasher(
+        app.config['PASSWORD_HASH_ROUNDS'],
+        app.config['PASSWORD_HASH_WORKERS'],
+        app.config['PASSWORD_HASH_MAX_PENDING']
+    )
+    RevokedTokenIndex().init_app(app)
+    ReplicaRouter().init_app(app, db)
+    JobRunner().init_app(app)
 
-if __name__ == '__main__':
+    for bp, prefix in all_blueprints:
+        app.register_blueprint(bp, url_prefix=prefix)
+    register_commands(app)
+    return app
+
+
+def warm_up(app):
+    """
+    Optional start-up step for a worker, e.g. from a server's post-fork hook: connects
+    every engine and primes the compiled-statement cache. Returns seconds per engine.
+    """
     with app.app_context():
-        TokenBlocklist.query.delete()
-        db.session.commit()
-        print('Blocklist Deleted')
-  
-        db.drop_all()
-        print("Tables have been droped!!")
-        db.create_all()
-        print("Tables have been created!!")
+        return warm_up_database()
+
+
+def register_commands(app):
+
+    @app.cli.command('db-upgrade')
+    @click.option('--delete-orphans', is_flag=True, help='Let revisions delete rows whose parent no longer exists.')
+    def db_upgrade_command(delete_orphans):
+        """Applies pending schema migrations."""
+        applied = upgrade(db.engine, delete_orphans=delete_orphans)
+        print(f"Applied: {', '.join(applied)}" if applied else 'Database is up to date.')
+
+
+    @app.cli.command('seed-demo')
+    def seed_demo_command():
+        """Creates the demo user and their records when the database has no users yet."""
+        if db.session.scalar(select(User.user_id).limit(1)) is not None:
+            print('Database already has users; nothing seeded.')
+            return
         demo_seed_data()
         print("Demo seed data created!!")
-        app.run(debug=True)
+
+
+    @app.cli.command('purge-revoked-tokens')
+    def purge_revoked_tokens_command():
+        """Deletes blocklist entries whose tokens have expired anyway."""
+        purged = revoked_tokens.purge_expired()
+        print(f'{purged} expired blocklist tokens purged')
+
+
+    @app.cli.command('run-jobs')
+    @click.option('--workers', type=int, default=None, help='Worker threads (default: JOB_WORKERS, at least 1).')
+    def run_jobs_command(workers):
+        """Runs background job workers beside the web processes until interrupted."""
+        workers = workers or max(job_runner.workers, 1)
+        job_runner.start(app, workers)
+        print(f'{workers} job workers running; Ctrl+C to stop.')
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            job_runner.stop()
+
+
+    @app.cli.command('purge-jobs')
+    def purge_jobs_command():
+        """Deletes finished jobs older than JOB_RETENTION_DAYS, with their files."""
+        purged = job_runner.purge_finished(timedelta(days=app.config['JOB_RETENTION_DAYS']))
+        print(f'{purged} finished jobs purged')
+
+
+    @app.cli.command('recount-counters')
+    @click.option('--user', 'user_ids', type=int, multiple=True, help='Only this user and their universes (repeatable).')
+    def recount_counters_command(user_ids):
+        """Recomputes the record counters on users and universes from the tables."""
+        started = time.perf_counter()
+        with db.engine.begin() as connection:
+            recount_counters(connection, list(user_ids) or None)
+        print(f'Counters recomputed in {time.perf_counter() - started:.2f}s')
+
+
+    @app.cli.command('warm-up')
+    def warm_up_command():
+        """Connects every engine and runs the hot read statements once, with timings."""
+        for name, seconds in warm_up(app).items():
+            print(f'{name}: {seconds * 1000:.1f}ms')
+
+
+    @app.cli.command('replicate-db')
+    @click.option('--interval', type=float, default=0, help='Keep copying every N seconds.')
+    def replicate_db_command(interval):
+        """Copies the SQLite primary into the replica file (local stand-in for replication)."""
+        source = sqlite_path(db.engine.url)
+        target = sqlite_path(db.engines['replica'].url)
+        while True:
+            replicate_sqlite(source, target)
+            print(f'Replicated {source} -> {target}')
+            if not interval:
+                break
+            time.sleep(interval)
+
+
+    @app.cli.command('seed-synthetic')
+    @click.option('--users', type=int, default=10)
+    @click.option('--universes', type=int, default=10, help='Universes per user.')
+    @click.option('--items', type=int, default=1000, help='Characters, notes and locations per user, each.')
+    @click.option('--density', type=int, default=2, help='Average links per record in each association.')
+    @click.option('--seed', type=int, default=0)
+    def seed_synthetic_command(users, universes, items, density, seed):
+        """Appends a deterministic generated dataset (password: synthetic-password)."""
+        counts, elapsed = synthetic_seed_data(users, universes, items, density, seed)
+        total = sum(counts.values())
+        for table, rows in counts.items():
+            print(f'{table}: {rows}')
+        print(f'{total} rows in {elapsed:.2f}s ({total / elapsed:,.0f} rows/s)')
+
+
+    @app.cli.command('rebuild-search-index')
+    def rebuild_search_index_command():
+        """Repopulates the full-text index from the entity tables."""
+        rebuild_search_index()
+        print('Search index rebuilt.')
+
+
+def __getattr__(name):
+    # `app` (for `flask --app app`, WSGI servers and `from app import app`) is built on
+    # first access, so importing create_app alone never constructs a default app.
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+if __name__ == '__main__':
+    # Schema and data are never touched implicitly; run `flask db-upgrade` and `flask seed-demo` first.
+    create_app().run(debug=True)
@@ -0,0 +1,101 @@
+"""
+ASGI entry point. Serves the read routes in async_routes with async handlers on an
+async SQLAlchemy engine; every other /api route goes to the Flask app on a thread pool.
+The WSGI app (app.py) keeps working on its own.
+
+    uvicorn asgi:application --workers 4
+
+`sync_application` is the Flask app alone behind the same server, for comparisons.
+"""
+import asyncio
+from a2wsgi import WSGIMiddleware
+from werkzeug.exceptions import HTTPException
+from app import create_app, warm_up
+from config import db
+from database import create_async_database
+from metrics import request_metrics
+from async_routes import url_map
+from async_utils import Defer, Request
+
+
+class AsyncApplication:
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.sync_app = WSGIMiddleware(flask_app, workers=flask_app.config['ASGI_SYNC_WORKERS'])
+        self.urls = url_map.bind('')
+        self.flask_urls = flask_app.url_map.bind('')
+        self.metric_labels = {}
+        with flask_app.app_context():
+            self.engine, self.Session = create_async_database(db.engine.url, flask_app.config)
+        if request_metrics.enabled:
+            request_metrics.instrument(self.engine.sync_engine)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        handler = self.match(scope)
+        if handler is None:
+            return await self.sync_app(scope, receive, send)
+        endpoint, view_args = handler
+        request = Request(scope, receive)
+        try:
+            with self.flask_app.app_context():
+                if request_metrics.enabled:
+                    request_metrics.start()
+                async with self.Session() as session:
+                    rv = await endpoint(request, session, **view_args)
+                response = self.flask_app.make_response(rv)
+                if 'Origin' in request.headers:
+                    response.headers['Access-Control-Allow-Origin'] = '*'
+                if request_metrics.enabled:
+                    request_metrics.finish(response, *self.labels(scope, endpoint))
+        except Defer:
+            return await self.sync_app(scope, request.replay_receive(), send)
+        except Exception as e:
+            print(f'Error: {str(e)}')
+            with self.flask_app.app_context():
+                response = self.flask_app.make_response(({'Error': 'Server Error.'}, 500))
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in response.headers.items()],
+        })
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+
+    def match(self, scope):
+        # HEAD and OPTIONS carry Flask-specific handling, so only the handlers' own methods are matched.
+        if scope['type'] != 'http' or scope['method'] not in ('GET', 'POST'):
+            return None
+        try:
+            return self.urls.match(scope['path'], scope['method'])
+        except HTTPException:
+            return None
+
+    def labels(self, scope, endpoint):
+        # Report under the Flask blueprint/endpoint the handler mirrors, so both modes share series.
+        if endpoint not in self.metric_labels:
+            flask_endpoint = self.flask_urls.match(scope['path'], scope['method'])[0]
+            blueprint, _, name = flask_endpoint.rpartition('.')
+            self.metric_labels[endpoint] = (blueprint, name)
+        return self.metric_labels[endpoint]
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.flask_app.config['WARM_UP_ON_START']:
+                    await asyncio.to_thread(warm_up, self.flask_app)
+                state = self.flask_app.extensions
+                if state['job_runner'].workers > 0:
+                    state['job_runner'].start(self.flask_app)
+                state['revoked_tokens'].start_purger(self.flask_app)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+
+application = AsyncApplication(create_app())
+sync_application = application.sync_app
@@ -0,0 +1,264 @@
+"""
+Async handlers for the read-heavy part of the /api surface, served by asgi.py.
+Each one mirrors the Flask route of the same name; every other route (and any
+request a handler defers) is answered by the Flask app itself.
+"""
+from flask import jsonify, current_app
+from flask_jwt_extended import create_access_token
+from werkzeug.routing import Map, Rule
+from models import User, Universe, Character, Note, Location
+from passwords import HashingBusyError
+from utils import get_pagination_args, validate_login_data, validate_search_data
+from async_utils import (
+    Defer, jwt_required, token_and_user_required, collection_etag, item_etag,
+    authenticate_user, load_user_profile, recent_universe_summaries, universe_summaries_with_authorization,
+    character_summaries_with_authorization, note_summaries_with_authorization,
+    location_summaries_with_authorization_in_universe, load_universe_with_relationships,
+    load_character_relationships, load_note_with_relationships, load_location_with_relationships, execute_search
+)
+
+url_map = Map(strict_slashes=True)
+
+
+def route(rule, methods=('GET',)):
+    def decorator(f):
+        url_map.add(Rule(rule, endpoint=f, methods=list(methods)))
+        return f
+    return decorator
+
+
+#! ------------ Auth -----------
+
+@route('/api/auth/login', methods=['POST'])
+async def login(request, session):
+    data = await request.get_json() or {}
+    is_valid, error_msg = validate_login_data(data)
+    if not is_valid:
+        raise Defer()
+    try:
+        user = await authenticate_user(session, data)
+    except HashingBusyError as e:
+        await session.rollback()
+        return jsonify({'Error': str(e)}), 503, {'Retry-After': '1'}
+    if not user:
+        return jsonify({
+            'Error': 'Invalid username/email or password.'
+        }), 401
+
+    access_token = create_access_token(
+        identity=str(user.user_id)
+        )
+
+    return jsonify({
+            'access_token': access_token,
+            'user': user.to_dict(summary=False, universes=await recent_universe_summaries(
+                session, user.user_id, current_app.config['PROFILE_UNIVERSE_LIMIT']
+            )),
+            'message': 'User successfully logged in'
+            }), 200
+
+
+@route('/api/auth/token-check')
+@jwt_required
+async def token_check(request, session, claims):
+    user = await session.get(User, int(claims['sub']))
+    if not user:
+        raise Defer()
+    return jsonify({
+        'Message': 'token still valid.',
+        'user': user.to_dict()}), 200
+
+
+#! ------------ Users -----------
+
+@route('/api/users/me')
+@token_and_user_required
+@collection_etag
+async def get_profile(request, session, user):
+    profile = await load_user_profile(session, user)
+    return jsonify({
+        'Message': 'User profile found.',
+        'User': profile.to_dict(summary=False, universes=await recent_universe_summaries(
+            session, profile.user_id, current_app.config['PROFILE_UNIVERSE_LIMIT']
+        ))
+    }), 200
+
+
+#! ------------ Universes -----------
+
+@route('/api/universes/')
+@token_and_user_required
+@collection_etag
+async def get_all_universes(request, session, user):
+    try:
+        cursor, limit = get_pagination_args(request.args)
+    except ValueError as e:
+        return jsonify({
+            'Error': str(e)
+        }), 400
+    universes, next_cursor = await universe_summaries_with_authorization(session, user, cursor, limit)
+    if not universes:
+        return jsonify({
+            'Message': 'No universes found.'
+        }), 404
+
+    return jsonify({
+        'Message': 'Universes found',
+        'Universes': universes,
+        'next_cursor': next_cursor
+    }), 200
+
+
+@route('/api/universes/<int:universe_id>')
+@token_and_user_required
+@item_etag(Universe)
+async def get_universe(request, session, user, universe_id):
+    universe = await load_universe_with_relationships(session, user, universe_id)
+    if not universe:
+        raise Defer()
+    return jsonify ({
+        'Message': f'Universe with id of {universe.universe_id} has been found.',
+        'Universe': universe.to_dict()
+    }), 200
+
+
+#! ------------ Characters -----------
+
+@route('/api/characters/')
+@token_and_user_required
+@collection_etag
+async def get_all_characters(request, session, user):
+    try:
+        cursor, limit = get_pagination_args(request.args)
+    except ValueError as e:
+        return jsonify({
+            'Error': str(e)
+        }), 400
+    characters, next_cursor = await character_summaries_with_authorization(session, user, cursor, limit)
+    if not characters:
+        return jsonify({
+            'Message': 'No characters found.'
+        }), 404
+
+    return jsonify({
+        'Message': 'All characters have been found',
+        'Characters': characters,
+        'next_cursor': next_cursor
+    }), 200
+
+
+@route('/api/characters/<int:character_id>')
+@token_and_user_required
+@item_etag(Character)
+async def get_character(request, session, user, character_id):
+    character = await load_character_relationships(session, user, character_id)
+    if not character:
+        raise Defer()
+    return jsonify({
+        'Message': f'Character with id of {character.character_id} has been found.',
+        'Character': character.to_dict()
+    }), 200
+
+
+#! ------------ Notes -----------
+
+@route('/api/notes/')
+@token_and_user_required
+@collection_etag
+async def get_all_notes(request, session, user):
+    try:
+        cursor, limit = get_pagination_args(request.args)
+    except ValueError as e:
+        return jsonify({
+            'Error': str(e)
+        }), 400
+    notes, next_cursor = await note_summaries_with_authorization(session, user, cursor, limit)
+    if not notes:
+        return jsonify({
+            'Message': 'No notes found.',
+            'Notes': [],
+            'next_cursor': None
+        }), 200
+    return jsonify({
+        'Message': 'Notes found.',
+        'Notes': notes,
+        'next_cursor': next_cursor
+    }), 200
+
+
+@route('/api/notes/<int:note_id>')
+@token_and_user_required
+@item_etag(Note)
+async def get_note(request, session, user, note_id):
+    note = await load_note_with_relationships(session, user, note_id)
+    if not note:
+        raise Defer()
+    return jsonify({
+        'Message': 'Note found',
+        'Note': note.to_dict(summary=False)
+    }), 200
+
+
+#! ------------ Locations -----------
+
+@route('/api/universes/<int:universe_id>/locations')
+@token_and_user_required
+@collection_etag
+async def get_all_locations_for_universe(request, session, user, universe_id):
+    try:
+        cursor, limit = get_pagination_args(request.args)
+    except ValueError as e:
+        return jsonify({
+            'Error': str(e)
+        }), 400
+    locations, next_cursor = await location_summaries_with_authorization_in_universe(
+        session, user, universe_id, cursor, limit
+    )
+    if not locations:
+        return jsonify({
+            'Message': 'No locations found.',
+            'Locations': [],
+            'next_cursor': None
+        }), 200
+    return jsonify({
+        'Message': 'Locations found.',
+        'Locations': locations,
+        'next_cursor': next_cursor
+    }), 200
+
+
+@route('/api/locations/<int:location_id>')
+@token_and_user_required
+@item_etag(Location)
+async def get_location(request, session, user, location_id):
+    location = await load_location_with_relationships(session, user, location_id)
+    if not location:
+        raise Defer()
+    return jsonify({
+        'Message': 'Location found.',
+        'Location': location.to_dict(summary=False)
+    }), 200
+
+
+#! ------------ Search -----------
+
+@route('/api/search')
+@token_and_user_required
+@collection_etag
+async def search(request, session, user):
+    is_valid, error_msg = validate_search_data(request.args)
+    if not is_valid:
+        return jsonify({
+            'Error': error_msg
+        }), 400
+    kinds = [k for k in request.args.get('type', '').split(',') if k]
+    try:
+        results = await execute_search(session, user, request.args['q'], kinds, int(request.args.get('limit', 20)))
+    except NotImplementedError as e:
+        return jsonify({
+            'Error': str(e)
+        }), 501
+    return jsonify({
+        'Message': f'{len(results)} results found.',
+        'Results': results
+    }), 200
@@ -0,0 +1,260 @@
+"""
+Async counterparts of the read helpers in utils.py, used by the ASGI entry point (asgi.py).
+They run the same query builders as the sync helpers, on an AsyncSession.
+"""
+import asyncio
+import json
+from functools import wraps
+from urllib.parse import parse_qsl
+from flask import current_app
+from flask_jwt_extended import decode_token
+from sqlalchemy import select
+from werkzeug.datastructures import Headers, MultiDict
+from werkzeug.http import parse_etags
+from models import User, Universe, Character, Note, Location
+from passwords import password_hasher
+from utils import (
+    UserSnapshot, user_cache, revoked_tokens, split_page, login_query,
+    collection_version_query, make_collection_etag, item_version_query, make_item_etag,
+    universe_summaries_query, character_summaries_query, note_summaries_query, location_summaries_query,
+    note_link_queries, attach_note_links, universe_detail_query, character_detail_query,
+    note_detail_query, location_detail_query, recent_universes_query, search_statement, search_results
+)
+
+
+class Defer(Exception):
+    """
+    Raised by an async handler to hand the request to the Flask app instead.
+    Used where the sync route already owns the answer (auth failures, missing or
+    foreign items), so both modes return the same error responses.
+    """
+
+
+#!------------ Request Helper Functions ----------
+
+class Request:
+    """The parts of an ASGI HTTP request the async handlers read, shaped like Flask's request."""
+
+    def __init__(self, scope, receive):
+        self.receive = receive
+        self.method = scope['method']
+        self.path = scope['path']
+        self.query_string = scope['query_string'].decode('latin-1')
+        self.full_path = f'{self.path}?{self.query_string}'
+        self.headers = Headers([(k.decode('latin-1'), v.decode('latin-1')) for k, v in scope['headers']])
+        self.args = MultiDict(parse_qsl(self.query_string, keep_blank_values=True))
+        self.if_none_match = parse_etags(self.headers.get('If-None-Match'))
+        self._body = None
+
+    async def get_data(self):
+        if self._body is None:
+            chunks = []
+            while True:
+                message = await self.receive()
+                chunks.append(message.get('body', b''))
+                if not message.get('more_body'):
+                    break
+            self._body = b''.join(chunks)
+        return self._body
+
+    async def get_json(self):
+        """The JSON body; anything Flask would reject is deferred to it."""
+        if self.headers.get('Content-Type', '').split(';')[0].strip() != 'application/json':
+            raise Defer()
+        try:
+            return json.loads(await self.get_data() or b'null')
+        except ValueError:
+            raise Defer()
+
+    def replay_receive(self):
+        """A receive callable that plays back the body already read, for handing the request on."""
+        if self._body is None:
+            return self.receive
+        pending = [{'type': 'http.request', 'body': self._body, 'more_body': False}]
+
+        async def receive():
+            return pending.pop() if pending else await self.receive()
+        return receive
+
+
+#!------------ Universal Helper Function/Decorators ----------
+
+def access_token_claims(request):
+    """Decodes the bearer token the way jwt_required() would; Defer lets Flask word the rejection."""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme != 'Bearer' or not token:
+        raise Defer()
+    try:
+        claims = decode_token(token)
+    except Exception:
+        raise Defer()
+    if claims.get('type') != 'access':
+        raise Defer()
+    return claims
+
+
+async def is_token_revoked(jti):
+    if revoked_tokens.refresh_due:
+        # to_thread copies the context, so the refresh sees this request's app context.
+        await asyncio.to_thread(revoked_tokens.refresh)
+    return jti in revoked_tokens
+
+
+async def get_current_user_snapshot(session, identity):
+    try:
+        user_id = int(identity)
+    except(ValueError, TypeError):
+        return None
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        row = (await session.execute(
+            select(User.user_id, User.is_admin, User.username).where(User.user_id == user_id)
+        )).first()
+        if not row:
+            return None
+        snapshot = UserSnapshot(*row)
+        if not snapshot.is_admin:
+            # Other workers cannot be told about a demotion; see USER_CACHE_TTL.
+            user_cache.set(user_id, snapshot)
+    return snapshot
+
+
+def jwt_required(f):
+    @wraps(f)
+    async def decorated(request, session, *args, **kwargs):
+        claims = access_token_claims(request)
+        if await is_token_revoked(claims['jti']):
+            raise Defer()
+        return await f(request, session, claims, *args, **kwargs)
+    return decorated
+
+
+def token_and_user_required(f):
+    @wraps(f)
+    @jwt_required
+    async def decorated(request, session, claims, *args, **kwargs):
+        user = await get_current_user_snapshot(session, claims['sub'])
+        if not user:
+            raise Defer()
+        return await f(request, session, user, *args, **kwargs)
+    return decorated
+
+
+#!------------ Conditional Request Helper Functions ----------
+
+async def _conditional_response(request, etag, f, *args, **kwargs):
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    response = current_app.make_response(await f(request, *args, **kwargs))
+    if response.status_code == 200:
+        response.set_etag(etag)
+    return response
+
+
+def collection_etag(f):
+    @wraps(f)
+    async def decorated(request, session, user, *args, **kwargs):
+        version = await session.scalar(collection_version_query(user))
+        etag = make_collection_etag(user, version, request.full_path)
+        return await _conditional_response(request, etag, f, session, user, *args, **kwargs)
+    return decorated
+
+
+def item_etag(item_class):
+    """Also the ownership check: missing or foreign items go to Flask for its 404/403."""
+    def decorator(f):
+        @wraps(f)
+        async def decorated(request, session, user, *args, **kwargs):
+            item_id = next(iter(kwargs.values()))
+            row = (await session.execute(item_version_query(item_class, item_id))).first()
+            if not row or user.user_id != row.user_id:
+                raise Defer()
+            etag = make_item_etag(item_class, item_id, row)
+            return await _conditional_response(request, etag, f, session, user, *args, **kwargs)
+        return decorated
+    return decorator
+
+
+#! ------------ Auth Helper Functions -----------
+
+async def authenticate_user(session, data):
+    """authenticate_user with bcrypt awaited on the hashing pool instead of blocking the loop."""
+    password = data.get('password').strip()
+    identifier = data.get('email') or data.get('username')
+    if not identifier or not password:
+        return None
+
+    user = (await session.execute(login_query(identifier))).scalar_one_or_none()
+    if not user:
+        return None
+
+    if not await password_hasher.verify_async(user.password_hash, password):
+        return None
+    if password_hasher.needs_rehash(user.password_hash):
+        user.password_hash = await password_hasher.hash_async(password)
+        await session.commit()
+    return user
+
+
+async def load_user_profile(session, user):
+    return await session.get(User, user.user_id)
+
+
+async def recent_universe_summaries(session, user_id, limit):
+    rows = (await session.execute(recent_universes_query(user_id, limit))).all()
+    return Universe.summary_serializer()(rows)
+
+
+#! ------------ Read Helper Functions -----------
+
+async def _summaries(session, query, limit, model, id_key):
+    rows, next_cursor = split_page((await session.execute(query)).all(), limit, 'created_at', id_key)
+    return model.summary_serializer()(rows), next_cursor
+
+
+async def universe_summaries_with_authorization(session, user, cursor=None, limit=50):
+    return await _summaries(session, universe_summaries_query(user, cursor, limit), limit, Universe, 'universe_id')
+
+
+async def character_summaries_with_authorization(session, user, cursor=None, limit=50):
+    return await _summaries(session, character_summaries_query(user, cursor, limit), limit, Character, 'character_id')
+
+
+async def location_summaries_with_authorization_in_universe(session, user, universe_id, cursor=None, limit=50):
+    query = location_summaries_query(user, universe_id, cursor, limit)
+    return await _summaries(session, query, limit, Location, 'location_id')
+
+
+async def note_summaries_with_authorization(session, user, cursor=None, limit=50):
+    query = note_summaries_query(user, cursor, limit)
+    rows, next_cursor = split_page((await session.execute(query)).all(), limit, 'created_at', 'note_id')
+    if not rows:
+        return [], next_cursor
+    character_query, universe_query = note_link_queries([r.note_id for r in rows])
+    summaries = attach_note_links(rows, await session.execute(character_query), await session.execute(universe_query))
+    return summaries, next_cursor
+
+
+async def load_universe_with_relationships(session, user, universe_id):
+    return (await session.execute(universe_detail_query(user, universe_id))).unique().scalar_one_or_none()
+
+
+async def load_character_relationships(session, user, character_id):
+    return (await session.execute(character_detail_query(user, character_id))).unique().scalar_one_or_none()
+
+
+async def load_note_with_relationships(session, user, note_id):
+    return (await session.execute(note_detail_query(user, note_id))).unique().scalar_one_or_none()
+
+
+async def load_location_with_relationships(session, user, location_id):
+    return (await session.execute(location_detail_query(user, location_id))).unique().scalar_one_or_none()
+
+
+async def execute_search(session, user, q, kinds=None, limit=20):
+    if session.bind.dialect.name != 'sqlite':
+        raise NotImplementedError('Search requires the SQLite FTS5 index.')
+    query, params = search_statement(user, q, kinds, limit)
+    return search_results(await session.execute(query, params))
@@ -0,0 +1,133 @@
+"""
+Load comparison of the two serving modes behind the same uvicorn server:
+'sync' is the Flask app on a thread pool (asgi:sync_application), 'async' the
+ASGI entry point (asgi:application). Concurrent clients keep requests in flight
+for a fixed duration against a seeded SQLite file.
+
+Scenarios: 'reads' cycles through list, detail and search GETs; 'login' posts
+credentials, so bcrypt dominates.
+
+    python -m benchmarks.asgi --concurrency 50 --seconds 10
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.common import load_app, percentile
+
+MODES = {'sync': 'asgi:sync_application', 'async': 'asgi:application'}
+READ_URLS = [
+    '/api/universes/?limit=20', '/api/characters/?limit=20', '/api/notes/?limit=20',
+    '/api/universes/1', '/api/characters/1', '/api/notes/1', '/api/universes/1/locations',
+    '/api/search?q=hero', '/api/users/me',
+]
+
+
+def seed(db_path, rows):
+    app = load_app(db_path)
+    client = app.test_client()
+    client.post('/api/auth/register', json={
+        'name': 'Bench', 'username': 'bench', 'email': 'bench@example.com', 'password': 'bench-password', 'is_admin': False
+    })
+    token = client.post('/api/auth/login', json={'username': 'Bench', 'password': 'bench-password'}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/api/universes/bulk', headers=headers, json={'items': [
+        {'name': f'Universe {i}', 'alignment': 'GOOD'} for i in range(rows)
+    ]})
+    client.post('/api/notes/bulk', headers=headers, json={'items': [
+        {'title': f'Note {i}', 'content': 'A hero walks in', 'universe_ids': [1]} for i in range(rows)
+    ]})
+    client.post('/api/characters/bulk', headers=headers, json={'items': [{
+        'name': f'Hero {i}', 'main_power_set': f'Power {i}', 'secondary_power_set': f'Second {i}',
+        'skills': [], 'universe_ids': [1], 'note_ids': [1]
+    } for i in range(rows)]})
+    client.post('/api/locations/bulk', headers=headers, json={'items': [
+        {'name': f'Place {i}', 'location_type': 'CITY', 'universe_id': 1} for i in range(rows)
+    ]})
+    return token
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, env, port):
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', MODES[mode], '--port', str(port), '--log-level', 'warning', '--no-access-log'],
+        env=env, stdout=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+async def load(base_url, scenario, token, concurrency, seconds):
+    import httpx
+    latencies, errors = [], 0
+    headers = {'Authorization': f'Bearer {token}'}
+    login = {'username': 'Bench', 'password': 'bench-password'}
+    urls = itertools.cycle(READ_URLS)
+    deadline = time.monotonic() + seconds
+
+    async def worker(client):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            if scenario == 'login':
+                response = await client.post('/api/auth/login', json=login)
+            else:
+                response = await client.get(next(urls), headers=headers)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code >= 400
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--scenarios', default='reads,login')
+    parser.add_argument('--hash-rounds', default='10', help='bcrypt work factor for the login scenario')
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='harmonic-bench-'), 'asgi.db')
+    os.environ['PASSWORD_HASH_ROUNDS'] = args.hash_rounds
+    token = seed(db_path, args.rows)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', REVOKED_TOKEN_PURGE_SECONDS='0')
+
+    print(f'concurrency={args.concurrency} seconds={args.seconds} rows={args.rows}')
+    print(f'{"scenario":>8} {"mode":>6} {"req/s":>8} {"p50":>9} {"p95":>9} {"p99":>9} {"errors":>7}')
+    for scenario in args.scenarios.split(','):
+        for mode in MODES:
+            port = free_port()
+            server = start_server(mode, env, port)
+            try:
+                latencies, errors = asyncio.run(load(f'http://127.0.0.1:{port}', scenario, token, args.concurrency, args.seconds))
+            finally:
+                server.terminate()
+                server.wait()
+            p50, p95, p99 = (percentile(latencies, p) * 1000 for p in (50, 95, 99))
+            print(f'{scenario:>8} {mode:>6} {len(latencies) / args.seconds:>8.1f} {p50:>7.1f}ms '
+                  f'{p95:>7.1f}ms {p99:>7.1f}ms {errors:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+
+def load_app(db_path=None, migrate=False):
+    """
+    Imports the Flask app against a throwaway SQLite file and creates the schema, from
+    the models or, with `migrate`, by applying the migrations as a deployment would.
+    Must run before anything else imports `app` or `config`.
+    """
+    db_path = db_path or os.path.join(tempfile.mkdtemp(prefix='harmonic-bench-'), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ['REVOKED_TOKEN_PURGE_SECONDS'] = '0'
+    # Idle job polling would show up in the per-request statement counts.
+    os.environ['JOB_WORKERS'] = '0'
+    # Budgets should cover the dashboard's uncached path, not a cache hit.
+    os.environ['DASHBOARD_CACHE_SIZE'] = '0'
+    from app import create_app
+    from config import db
+    from migrations import upgrade
+    app = create_app()
+    with app.app_context():
+        if migrate:
+            upgrade(db.engine)
+        else:
+            db.create_all()
+    return app
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+@contextmanager
+def timer():
+    """Yields a dict whose 'elapsed' key is filled in (seconds) on exit."""
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result['elapsed'] = time.perf_counter() - start
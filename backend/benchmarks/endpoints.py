@@ -0,0 +1,215 @@
+"""
+Per-route benchmark with checked-in budgets.
+
+Drives the real blueprints through Flask's test client against generated datasets
+of increasing size and records, per route and size, p50/p95 latency, the peak
+memory allocated while serving a request, and the exact number of SQL statements.
+Entity #1 of each kind is linked to every other generated record, so the
+relationship counts grow with the dataset too.
+
+Every route must have an entry in budgets.json; the run exits non-zero when a
+route issues more statements than its `max_queries` (at any size), exceeds an
+optional `p95_ms` or `max_alloc_kb`, or answers with an unexpected status.
+
+    python -m benchmarks.endpoints --sizes 100,1000,5000 --repeat 30
+    python -m benchmarks.endpoints --update-budgets   # rewrite max_queries from this run
+"""
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+from benchmarks.common import load_app, percentile, timer
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), 'budgets.json')
+
+# (name, method, url, body(i) or None, expected status)
+ROUTES = [
+    ('get_all_universes', 'GET', '/api/universes/', None, 200),
+    ('get_universe', 'GET', '/api/universes/1', None, 200),
+    ('get_all_characters', 'GET', '/api/characters/', None, 200),
+    ('get_character', 'GET', '/api/characters/1', None, 200),
+    ('get_all_notes', 'GET', '/api/notes/', None, 200),
+    ('get_note', 'GET', '/api/notes/1', None, 200),
+    ('get_all_locations_for_universe', 'GET', '/api/universes/1/locations', None, 200),
+    ('get_location', 'GET', '/api/locations/1', None, 200),
+    ('get_profile', 'GET', '/api/users/me', None, 200),
+    ('get_dashboard', 'GET', '/api/users/me/dashboard', None, 200),
+    ('search', 'GET', '/api/search?q=bench', None, 200),
+    ('token_check', 'GET', '/api/auth/token-check', None, 200),
+    ('get_all_characters_not_modified', 'GET', '/api/characters/', None, 304),
+    ('create_note', 'POST', '/api/notes/', lambda i: {
+        'title': f'Budget note {i}', 'content': 'Bench content', 'universe_ids': [1], 'character_ids': [1]
+    }, 201),
+    ('update_character', 'PATCH', '/api/characters/2', lambda i: {'age': 20 + i % 50}, 200),
+    ('link_character_notes', 'PATCH', '/api/characters/1', lambda i: (
+        {'add_note_ids': [2, 3], 'remove_note_ids': [4]} if i % 2 else {'remove_note_ids': [2], 'add_note_ids': [4]}
+    ), 200),
+    ('bulk_create_characters', 'POST', '/api/characters/bulk', lambda i: {'items': [{
+        'name': f'Budget hero {i} {j}', 'main_power_set': f'Budget power {i} {j}',
+        'secondary_power_set': f'Budget second {i} {j}',
+        'skills': [], 'universe_ids': [1, 2], 'note_ids': [1]
+    } for j in range(10)]}, 201),
+]
+
+
+def seed(size):
+    """Replaces the schema with `size` records of each kind owned by one user; returns their token."""
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import insert
+    from config import db
+    from models import (User, Universe, Character, Note, Location, AlignmentType, LocationType,
+                        character_universes, character_notes, note_universes, character_locations, location_notes)
+    from utils import user_cache
+    from passwords import password_hasher
+
+    db.drop_all()
+    db.create_all()
+    user_cache.configure(user_cache.maxsize, user_cache.ttl)
+    start = datetime(2024, 1, 1)
+    db.session.execute(insert(User), [{
+        'name': 'Bench', 'username': 'Bench', 'email': 'bench@example.com',
+        'password_hash': password_hasher.hash('bench-password'), 'is_admin': False
+    }])
+    ids = range(1, size + 1)
+    db.session.execute(insert(Universe), [{
+        'name': f'Bench universe {i}', 'description': 'A universe', 'alignment': AlignmentType.GOOD,
+        'user_id': 1, 'created_at': start + timedelta(seconds=i)
+    } for i in ids])
+    db.session.execute(insert(Character), [{
+        'name': f'Bench character {i}', 'age': 30, 'main_power_set': f'Power {i}', 'secondary_power_set': f'Second {i}',
+        'skills': [], 'user_id': 1, 'created_at': start + timedelta(seconds=i)
+    } for i in ids])
+    db.session.execute(insert(Note), [{
+        'title': f'Bench note {i}', 'content': 'Bench content', 'user_id': 1, 'created_at': start + timedelta(seconds=i)
+    } for i in ids])
+    db.session.execute(insert(Location), [{
+        'name': f'Bench location {i}', 'location_type': LocationType.TOWN, 'universe_id': 1,
+        'user_id': 1, 'created_at': start + timedelta(seconds=i)
+    } for i in ids])
+    # Record #1 of each kind is linked to every record of the other kinds.
+    for table, left, right in (
+        (character_universes, 'character_id', 'universe_id'),
+        (character_notes, 'character_id', 'note_id'),
+        (note_universes, 'note_id', 'universe_id'),
+        (character_locations, 'character_id', 'location_id'),
+        (location_notes, 'location_id', 'note_id'),
+    ):
+        pairs = {(1, i) for i in ids} | {(i, 1) for i in ids}
+        db.session.execute(insert(table), [{left: a, right: b} for a, b in sorted(pairs)])
+    db.session.commit()
+    return create_access_token(identity='1')
+
+
+def measure(app, client, token, route, repeat):
+    from sqlalchemy import event
+    from config import db
+    name, method, url, body, expected = route
+    headers = {'Authorization': f'Bearer {token}'}
+    if expected == 304:
+        headers['If-None-Match'] = client.get(url, headers=headers).headers['ETag']
+    statements = []
+    count = lambda *args: statements.append(1)
+
+    def call(i):
+        return client.open(url, method=method, headers=headers, json=body(i) if body else None)
+
+    call(0)  # warm-up: caches, compiled statements
+    latencies, queries, allocs, statuses = [], set(), [], set()
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        for i in range(1, repeat + 1):
+            statements.clear()
+            with timer() as t:
+                response = call(i)
+            latencies.append(t['elapsed'])
+            queries.add(len(statements))
+            statuses.add(response.status_code)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    # Allocation pass is separate: tracemalloc slows every allocation down.
+    tracemalloc.start()
+    try:
+        for i in range(repeat + 1, repeat + 6):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            call(i)
+            allocs.append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+    finally:
+        tracemalloc.stop()
+    return {
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'queries': max(queries),
+        'query_range': (min(queries), max(queries)),
+        'alloc_kb': max(allocs),
+        'statuses': statuses,
+    }
+
+
+def check(name, expected, size, result, budget):
+    problems = []
+    if budget is None:
+        return [f'{name}: no budget in budgets.json']
+    if result['statuses'] != {expected}:
+        problems.append(f'{name} @ {size}: status {sorted(result["statuses"])}, expected {expected}')
+    if result['queries'] > budget['max_queries']:
+        problems.append(f'{name} @ {size}: {result["queries"]} queries > budget {budget["max_queries"]}')
+    if 'p95_ms' in budget and result['p95_ms'] > budget['p95_ms']:
+        problems.append(f'{name} @ {size}: p95 {result["p95_ms"]:.1f}ms > budget {budget["p95_ms"]}ms')
+    if 'max_alloc_kb' in budget and result['alloc_kb'] > budget['max_alloc_kb']:
+        problems.append(f'{name} @ {size}: {result["alloc_kb"]:.0f} KiB allocated > budget {budget["max_alloc_kb"]} KiB')
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100,1000,5000', help='records per entity kind, comma separated')
+    parser.add_argument('--repeat', type=int, default=30)
+    parser.add_argument('--routes', help='only these route names, comma separated')
+    parser.add_argument('--update-budgets', action='store_true', help='write the measured max_queries into budgets.json')
+    args = parser.parse_args()
+
+    os.environ['PASSWORD_HASH_ROUNDS'] = '4'
+    # Keep the periodic blocklist re-read out of the per-request counts.
+    os.environ['REVOKED_TOKEN_REFRESH_SECONDS'] = '3600'
+    app = load_app()
+    client = app.test_client()
+    with open(BUDGETS_PATH) as f:
+        budgets = json.load(f)
+    routes = [r for r in ROUTES if not args.routes or r[0] in args.routes.split(',')]
+
+    problems, worst = [], {}
+    print(f'{"route":>32} {"size":>6} {"p50":>8} {"p95":>8} {"queries":>8} {"alloc":>9}')
+    for size in map(int, args.sizes.split(',')):
+        with app.app_context():
+            token = seed(size)
+        for route in routes:
+            name, expected = route[0], route[4]
+            result = measure(app, client, token, route, args.repeat)
+            worst[name] = max(worst.get(name, 0), result['queries'])
+            low, high = result['query_range']
+            queries = f'{high}' if low == high else f'{low}-{high}'
+            print(f'{name:>32} {size:>6} {result["p50_ms"]:>6.1f}ms {result["p95_ms"]:>6.1f}ms '
+                  f'{queries:>8} {result["alloc_kb"]:>6.0f}KiB')
+            problems += check(name, expected, size, result, budgets.get(name))
+
+    if args.update_budgets:
+        for name, queries in worst.items():
+            budgets.setdefault(name, {})['max_queries'] = queries
+        with open(BUDGETS_PATH, 'w') as f:
+            json.dump(budgets, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Updated {BUDGETS_PATH}')
+        problems = [p for p in problems if 'queries >' not in p and 'no budget' not in p]
+
+    for problem in problems:
+        print(f'BUDGET: {problem}')
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
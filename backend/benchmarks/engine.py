@@ -0,0 +1,109 @@
+"""
+Read/write throughput under the 'stock' and 'production' DB_ENGINE_PROFILE.
+
+Each profile runs in its own process (the app reads its config at import) against
+a fresh SQLite file: reader threads page through /api/characters/ while writer
+threads create notes, for a fixed duration.
+
+    python -m benchmarks.engine --readers 4 --writers 4 --seconds 10
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from benchmarks.common import load_app, percentile, timer
+
+
+def run_profile(args):
+    os.environ['DB_ENGINE_PROFILE'] = args.profile
+    os.environ['PASSWORD_HASH_ROUNDS'] = '4'
+    db_path = os.path.join(args.db_dir, f'engine-{args.profile}.db') if args.db_dir else None
+    app = load_app(db_path)
+    from config import db
+    from database import pool_timings, pool_status
+
+    client = app.test_client()
+    client.post('/api/auth/register', json={
+        'name': 'Bench', 'username': 'bench', 'email': 'bench@example.com', 'password': 'bench-password', 'is_admin': False
+    })
+    token = client.post('/api/auth/login', json={'username': 'Bench', 'password': 'bench-password'}).get_json()['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/api/characters/bulk', headers=headers, json={'items': [{
+        'name': f'Hero {i}', 'main_power_set': f'Power {i}', 'secondary_power_set': f'Second {i}', 'skills': []
+    } for i in range(200)]})
+    pool_timings.reset()
+
+    results = {'read': [], 'write': [], 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+
+    def worker(kind, index):
+        local = app.test_client()
+        count = 0
+        while time.monotonic() < deadline:
+            with timer() as t:
+                if kind == 'read':
+                    response = local.get('/api/characters/?limit=20', headers=headers)
+                else:
+                    response = local.post('/api/notes/', headers=headers, json={
+                        'title': f'Note {index}-{count}', 'content': 'Benchmark note body'
+                    })
+            count += 1
+            with lock:
+                if response.status_code >= 400:
+                    results['errors'] += 1
+                else:
+                    results[kind].append(t['elapsed'])
+
+    threads = [threading.Thread(target=worker, args=('read', i)) for i in range(args.readers)]
+    threads += [threading.Thread(target=worker, args=('write', i)) for i in range(args.writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        status = pool_status(db.engine)
+    print(json.dumps({
+        'profile': args.profile,
+        'reads_per_s': len(results['read']) / args.seconds,
+        'writes_per_s': len(results['write']) / args.seconds,
+        'read_p95_ms': percentile(results['read'], 95) * 1000,
+        'write_p95_ms': percentile(results['write'], 95) * 1000,
+        'errors': results['errors'],
+        'pool': status['pool'],
+        'pool_wait_avg_ms': status['wait_avg_ms'],
+        'pool_held_avg_ms': status['held_avg_ms'],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--db-dir', help='directory for the database files (default: a temp dir); use a real disk to see fsync costs')
+    parser.add_argument('--profile', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.profile:
+        return run_profile(args)
+
+    print(f'readers={args.readers} writers={args.writers} seconds={args.seconds}')
+    print(f'{"profile":>10} {"reads/s":>8} {"writes/s":>9} {"read p95":>9} {"write p95":>10} {"errors":>7} {"pool wait":>10}')
+    for profile in ('stock', 'production'):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.engine', '--profile', profile, '--readers', str(args.readers),
+             '--writers', str(args.writers), '--seconds', str(args.seconds)] + (['--db-dir', args.db_dir] if args.db_dir else []),
+            capture_output=True, text=True, check=True
+        ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        wait = f'{r["pool_wait_avg_ms"]:.3f}ms' if r['pool'] == 'TimedQueuePool' else '-'
+        print(f'{profile:>10} {r["reads_per_s"]:>8.1f} {r["writes_per_s"]:>9.1f} {r["read_p95_ms"]:>8.1f}ms '
+              f'{r["write_p95_ms"]:>8.1f}ms {r["errors"]:>7} {wait:>10}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Login throughput at different password-hasher pool sizes.
+
+    python -m benchmarks.password_hashing --rounds 10 --pool-sizes 1,2,4,8
+"""
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import load_app, percentile, timer
+
+
+def run_logins(app, total, concurrency):
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    local = threading.local()
+
+    def login(_):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        with timer() as t:
+            response = local.client.post('/api/auth/login', json={'username': 'Bench', 'password': 'bench-password'})
+        with lock:
+            latencies.append(t['elapsed'])
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    with timer() as wall:
+        with ThreadPoolExecutor(max_workers=concurrency) as clients:
+            list(clients.map(login, range(total)))
+    return wall['elapsed'], latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--pool-sizes', default='1,2,4,8')
+    parser.add_argument('--requests', type=int, default=64)
+    parser.add_argument('--concurrency', type=int, default=16)
+    args = parser.parse_args()
+
+    app = load_app()
+    password_hasher = app.extensions['password_hasher']
+    password_hasher.configure(args.rounds, 1, args.requests)
+    client = app.test_client()
+    client.post('/api/auth/register', json={
+        'name': 'Bench', 'username': 'bench', 'email': 'bench@example.com',
+        'password': 'bench-password', 'is_admin': False
+    })
+
+    print(f'rounds={args.rounds} requests={args.requests} concurrency={args.concurrency}')
+    print(f'{"pool":>5} {"logins/s":>10} {"p50 ms":>8} {"p95 ms":>8}  statuses')
+    for size in [int(s) for s in args.pool_sizes.split(',')]:
+        password_hasher.configure(args.rounds, size, args.requests)
+        elapsed, latencies, statuses = run_logins(app, args.requests, args.concurrency)
+        print(f'{size:>5} {args.requests / elapsed:>10.1f} '
+              f'{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 95) * 1000:>8.1f}  {statuses}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+"""
+Query-plan regression check: drives every API route once, records each SQL
+statement the helpers emit, runs EXPLAIN QUERY PLAN on it and exits non-zero
+when any plan falls back to a full table scan or any route answers with a
+status other than the one it should. The schema is built by the migrations, so
+an index a revision forgot fails too. tests/test_query_plans.py runs the same
+check under pytest, plus EXPLAIN on each query-builder helper.
+
+    python -m benchmarks.query_plans [--verbose]
+"""
+import argparse
+import re
+import sys
+from benchmarks.common import load_app
+
+# Statements whose full scan is inherent, keyed by a pattern matched against the SQL.
+ALLOWED_SCANS = {
+    r'FROM search_index\b': 'full-text MATCH is answered by the FTS5 virtual table',
+    r'^SELECT users\.\S+(, users\.\S+)* \s*FROM users$': 'admin list of every user',
+    r'^DELETE FROM search_index$': 'search index rebuild',
+}
+
+SCAN = re.compile(r'^SCAN (\w+)')
+
+# resource_owner_required answers another user's records with 403.
+OUTSIDER_STATUS = 403
+
+
+def exercise(client):
+    """
+    Calls every route with realistic data, as the owner, an admin and another user.
+    Returns (method, url, status, expected status) per call.
+    """
+    statuses = []
+
+    def call(method, url, token=None, expect=None, **kwargs):
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        response = getattr(client, method)(url, headers=headers, **kwargs)
+        response.get_data()
+        expect = expect or (201 if method == 'post' else 200)
+        statuses.append((method.upper(), url, response.status_code, expect))
+        return response
+
+    def register(username, is_admin=False):
+        call('post', '/api/auth/register', json={
+            'name': username.capitalize(), 'username': username, 'email': f'{username}@example.com',
+            'password': 'plan-password', 'is_admin': is_admin
+        })
+        return call('post', '/api/auth/login', expect=200, json={
+            'username': username.capitalize(), 'password': 'plan-password'
+        }).get_json()['access_token']
+
+    token = register('planner')
+    admin = register('planadmin', is_admin=True)
+    call('get', '/api/auth/token-check', token)
+
+    call('post', '/api/universes/', token, json={'name': 'Plan World', 'description': 'A world', 'alignment': 'GOOD'})
+    call('post', '/api/universes/bulk', token, json={'items': [{'name': f'Plan World {i}', 'alignment': 'BAD'} for i in range(3)]})
+    call('post', '/api/notes/', token, json={'title': 'Plan note', 'content': 'Some content', 'universe_ids': [1]})
+    call('post', '/api/notes/bulk', token, json={'items': [{'title': f'Plan note {i}', 'universe_ids': [1, 2]} for i in range(3)]})
+    call('post', '/api/characters/', token, json={
+        'name': 'Planner', 'main_power_set': 'Foresight', 'secondary_power_set': 'Logistics',
+        'skills': ['Archery'], 'universe_ids': [1], 'note_ids': [1]
+    })
+    call('post', '/api/characters/bulk', token, json={'items': [{
+        'name': f'Hero {i}', 'main_power_set': f'Power {i}', 'secondary_power_set': f'Second {i}',
+        'skills': [], 'universe_ids': [1], 'note_ids': [1, 2]
+    } for i in range(3)]})
+    call('post', '/api/universes/1/locations', token, json={
+        'name': 'Plan Town', 'location_type': 'TOWN', 'universe_id': 1, 'description': 'A town', 'character_ids': [1], 'note_ids': [1]
+    })
+    call('post', '/api/locations/bulk', token, json={'items': [{
+        'name': f'Plan Place {i}', 'location_type': 'CITY', 'universe_id': 1, 'character_ids': [1], 'note_ids': [2]
+    } for i in range(3)]})
+    call('post', '/api/universes/1/locations', token, json={'name': 'Plan Hall', 'location_type': 'BUILDING', 'universe_id': 1, 'parent_id': 1})
+    call('post', '/api/universes/1/locations', token, json={'name': 'Plan Room', 'location_type': 'ROOM', 'universe_id': 1, 'parent_id': 5})
+
+    for url in ['/api/universes/', '/api/characters/', '/api/notes/', '/api/universes/1/locations',
+                '/api/universes/1', '/api/characters/1', '/api/notes/1', '/api/locations/1',
+                '/api/users/me', '/api/users/me/dashboard', '/api/search?q=plan', '/api/search?q=plan&type=note,character',
+                '/api/locations/1/descendants', '/api/locations/6/ancestors']:
+        call('get', url, token)
+    page = call('get', '/api/characters/?limit=2', token).get_json()
+    call('get', f"/api/characters/?limit=2&cursor={page['next_cursor']}", token)
+    call('get', '/api/users/', admin)
+    call('get', '/api/characters/1', admin)
+
+    call('patch', '/api/universes/1', token, json={'name': 'Plan World Renamed', 'character_ids': [1, 2]})
+    call('patch', '/api/characters/1', token, json={'name': 'Planner Renamed', 'universe_ids': [1, 2], 'note_ids': [1, 2]})
+    call('patch', '/api/notes/1', token, json={'title': 'Plan note renamed', 'content': 'More', 'universe_ids': [2]})
+    call('patch', '/api/locations/1', token, json={'name': 'Plan Town Renamed', 'character_ids': [1, 2]})
+    call('patch', '/api/universes/bulk', token, json={'items': [{'universe_id': 2, 'description': 'Changed', 'note_ids': [1]}]})
+    call('patch', '/api/characters/bulk', token, json={'items': [{'character_id': 2, 'age': 40, 'universe_ids': [2]}]})
+    call('patch', '/api/notes/bulk', token, json={'items': [{'note_id': 2, 'content': 'Changed', 'character_ids': [1]}]})
+    call('patch', '/api/locations/bulk', token, json={'items': [{'location_id': 2, 'description': 'Changed', 'note_ids': [1]}]})
+    call('patch', '/api/locations/5', token, json={'parent_id': 3})
+    call('patch', '/api/users/me', token, json={'bio': 'A planner who checks every query plan.'})
+
+    archive = call('get', '/api/universes/1/export', token).get_data()
+    call('post', '/api/universes/import', token, data=archive, content_type='application/x-ndjson')
+
+    outsider = register('outsider')
+    call('get', '/api/users/', outsider, expect=403)
+    call('get', '/api/characters/1', outsider, expect=OUTSIDER_STATUS)
+    call('patch', '/api/notes/1', outsider, expect=OUTSIDER_STATUS, json={'title': 'Not mine'})
+    call('get', '/api/locations/1/descendants', outsider, expect=OUTSIDER_STATUS)
+    call('delete', '/api/universes/1', outsider, expect=OUTSIDER_STATUS)
+    call('get', '/api/locations/1/descendants', admin)
+
+    call('delete', '/api/locations/2', token)
+    call('delete', '/api/locations/5', token)
+    call('delete', '/api/notes/3', token)
+    call('delete', '/api/characters/3', token)
+    call('delete', '/api/universes/3', token)
+    doomed = register('doomed')
+    doomed_id = call('get', '/api/users/me', doomed).get_json()['User']['user_id']
+    call('delete', f'/api/users/{doomed_id}', doomed)
+    call('get', '/api/users/me', token)
+    call('delete', '/api/auth/logout', token)
+    call('get', '/api/users/me', token, expect=401)
+    return statuses
+
+
+def record(app, client=None):
+    """
+    Runs exercise() and collects each distinct statement it sends, as
+    {normalized SQL: (statement, parameters)}. Returns (statuses, statements).
+    The requests run outside any app context, as they would in production.
+    """
+    from sqlalchemy import event
+    from config import db
+
+    statements = {}
+
+    def remember(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE', 'INSERT INTO SEARCH_INDEX')):
+            statements.setdefault(' '.join(statement.split()), (statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', remember)
+    try:
+        statuses = exercise(client or app.test_client())
+    finally:
+        event.remove(engine, 'before_cursor_execute', remember)
+    return statuses, statements
+
+
+def full_scan(connection, normalized, plan):
+    """The tables `plan` scans in full, unless ALLOWED_SCANS excuses the statement."""
+    from sqlalchemy import inspect
+    if any(re.search(pattern, normalized) for pattern in ALLOWED_SCANS):
+        return []
+    tables = set(inspect(connection).get_table_names())
+    return [m.group(1) for m in map(SCAN.match, plan) if m and m.group(1) in tables]
+
+
+def explain(connection, statement, parameters):
+    if isinstance(parameters, list):
+        parameters = parameters[0] if parameters else ()
+    return [row[3] for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--verbose', action='store_true', help='print every plan, not only the failures')
+    args = parser.parse_args()
+
+    app = load_app(migrate=True)
+    from config import db
+
+    statuses, statements = record(app)
+    failures = []
+    with app.app_context(), db.engine.connect() as connection:
+        for normalized, (statement, parameters) in statements.items():
+            plan = explain(connection, statement, parameters)
+            if full_scan(connection, normalized, plan):
+                failures.append((normalized, plan))
+            if args.verbose:
+                print(normalized, *(f'    {line}' for line in plan), sep='\n')
+
+    unexpected = [s for s in statuses if s[2] != s[3]]
+    print(f'{len(statuses)} requests, {len(statements)} distinct statements, '
+          f'{len(failures)} full scans, {len(unexpected)} unexpected statuses')
+    for method, url, status, expected in unexpected:
+        print(f'  {status} (expected {expected}) {method} {url}')
+    for normalized, plan in failures:
+        print(f'\nFULL SCAN: {normalized}', *(f'    {line}' for line in plan), sep='\n')
+    sys.exit(1 if failures or unexpected else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Full-text search latency over a large synthetic note corpus.
+
+    python -m benchmarks.search --notes 1000000 --users 100 --queries 200
+"""
+import argparse
+import random
+from datetime import datetime
+from types import SimpleNamespace
+from benchmarks.common import load_app, percentile, timer
+
+WORDS = (
+    'dragon castle river storm shadow ember crystal forest harbor tower '
+    'knight oracle comet glacier desert citadel lantern serpent meadow relic '
+    'portal winter summer thunder silver golden hidden ancient broken frozen'
+).split()
+
+
+def sentence(rng, length):
+    return ' '.join(rng.choice(WORDS) for _ in range(length))
+
+
+def seed_notes(app, total, users, rng, batch_size=10000):
+    from sqlalchemy import insert
+    from config import db
+    from models import User, Note
+    with app.app_context():
+        db.session.execute(insert(User), [{
+            'name': f'Bench {i}', 'username': f'bench{i}', 'email': f'bench{i}@example.com',
+            'password_hash': 'x', 'is_admin': False
+        } for i in range(users)])
+        user_ids = list(db.session.scalars(db.select(User.user_id)))
+        now = datetime.utcnow()
+        for start in range(0, total, batch_size):
+            db.session.execute(insert(Note), [{
+                'title': sentence(rng, 3), 'content': sentence(rng, 40),
+                'user_id': rng.choice(user_ids), 'created_at': now
+            } for _ in range(min(batch_size, total - start))])
+            db.session.commit()
+        return user_ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--notes', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    app = load_app()
+    with timer() as seeding:
+        user_ids = seed_notes(app, args.notes, args.users, rng)
+    print(f'seeded {args.notes} notes for {args.users} users in {seeding["elapsed"]:.1f}s')
+
+    from utils import execute_search
+    queries = {
+        'one word': lambda: rng.choice(WORDS),
+        'two words': lambda: sentence(rng, 2),
+        'prefix': lambda: rng.choice(WORDS)[:3],
+    }
+    print(f'{"query":>10} {"p50 ms":>8} {"p95 ms":>8} {"avg hits":>9}')
+    with app.app_context():
+        for label, make_query in queries.items():
+            latencies, hits = [], 0
+            for _ in range(args.queries):
+                user = SimpleNamespace(user_id=rng.choice(user_ids))
+                with timer() as t:
+                    hits += len(execute_search(user, make_query(), limit=20))
+                latencies.append(t['elapsed'])
+            print(f'{label:>10} {percentile(latencies, 50) * 1000:>8.2f} '
+                  f'{percentile(latencies, 95) * 1000:>8.2f} {hits / args.queries:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
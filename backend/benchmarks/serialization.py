@@ -0,0 +1,86 @@
+"""
+Response encoding cost for list endpoints: per-row to_dict/summary_from_row + stdlib
+json (the previous path) against the row summary serializers + FastJSONProvider.
+
+    python -m benchmarks.serialization --rows 10000 --repeat 20
+"""
+import argparse
+import json
+from datetime import datetime
+from benchmarks.common import load_app, percentile, timer
+
+
+def seed(app, rows):
+    from sqlalchemy import insert
+    from config import db
+    from models import User, Universe, Character, Note, Location, AlignmentType, LocationType
+    now = datetime.utcnow()
+    with app.app_context():
+        db.session.execute(insert(User), [{
+            'name': 'Bench', 'username': 'bench', 'email': 'bench@example.com', 'password_hash': 'x', 'is_admin': False
+        }])
+        db.session.execute(insert(Universe), [{
+            'name': f'Universe {i}', 'description': 'A universe', 'alignment': AlignmentType.GOOD,
+            'user_id': 1, 'created_at': now
+        } for i in range(rows)])
+        db.session.execute(insert(Character), [{
+            'name': f'Character {i}', 'age': 30, 'main_power_set': f'power {i}', 'secondary_power_set': f'second {i}',
+            'skills': [], 'user_id': 1, 'created_at': now
+        } for i in range(rows)])
+        db.session.execute(insert(Note), [{
+            'title': f'Note {i}', 'content': 'Some content', 'user_id': 1, 'created_at': now
+        } for i in range(rows)])
+        db.session.execute(insert(Location), [{
+            'name': f'Location {i}', 'location_type': LocationType.TOWN, 'universe_id': 1,
+            'user_id': 1, 'created_at': now
+        } for i in range(rows)])
+        db.session.commit()
+
+
+def legacy_dumps(payload):
+    """What Flask's DefaultJSONProvider did: stdlib json with sorted keys."""
+    from flask.json.provider import _default
+    return json.dumps(payload, default=_default, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def measure(fn, repeat):
+    latencies = []
+    for _ in range(repeat):
+        with timer() as t:
+            fn()
+        latencies.append(t['elapsed'])
+    return percentile(latencies, 50) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = load_app()
+    seed(app, args.rows)
+    from sqlalchemy import select
+    from config import db
+    from models import Universe, Character, Note, Location
+
+    print(f'rows={args.rows}, median of {args.repeat} runs (ms)')
+    print(f'{"model":>10} {"to_dict+json":>13} {"summary+json":>13} {"rows+fast":>14} {"bytes":>9}')
+    with app.app_context():
+        for model in (Universe, Character, Note, Location):
+            objects = db.session.scalars(select(model)).all()
+            rows = db.session.execute(select(*model.summary_columns())).all()
+            if model is Note:
+                summarize = lambda: [Note.summary_from_row(r, [], []) for r in rows]
+            else:
+                summarize = lambda: [model.summary_from_row(r) for r in rows]
+            serializer = model.summary_serializer()
+            orm = measure(lambda: legacy_dumps([o.to_dict() for o in objects]), args.repeat)
+            legacy = measure(lambda: legacy_dumps(summarize()), args.repeat)
+            fast = measure(lambda: app.json._encode(serializer(rows)), args.repeat)
+            size = len(app.json._encode(serializer(rows)))
+            print(f'{model.__tablename__:>10} {orm:>13.2f} {legacy:>13.2f} {fast:>14.2f} {size:>9}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Cold-start cost of a worker. Every run is a fresh interpreter against a seeded SQLite
+file, timing each phase separately:
+
+  import      `import app`: module imports only, no app is built
+  create      create_app()
+  warm_up     warm_up(app): engine connect and compiled-statement priming (warm runs only)
+  first_get   the first authenticated GET /api/universes/
+  second_get  the next one, for comparison
+
+'cold' runs skip warm_up, so first_get pays for connecting and compiling instead.
+
+    python -m benchmarks.startup --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks.common import load_app
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHILD = """
+import json, os, sys, time
+started = time.perf_counter()
+import app as module
+imported = time.perf_counter()
+app = module.create_app()
+created = time.perf_counter()
+timings = {'import': imported - started, 'create': created - imported}
+if sys.argv[1] == 'warm':
+    module.warm_up(app)
+    timings['warm_up'] = time.perf_counter() - created
+client = app.test_client()
+headers = {'Authorization': 'Bearer ' + os.environ['BENCH_TOKEN']}
+for phase in ('first_get', 'second_get'):
+    before = time.perf_counter()
+    status = client.get('/api/universes/', headers=headers).status_code
+    timings[phase] = time.perf_counter() - before
+    assert status == 200, status
+print(json.dumps(timings))
+"""
+PHASES = ('import', 'create', 'warm_up', 'first_get', 'second_get')
+
+
+def seed(db_path):
+    app = load_app(db_path)
+    client = app.test_client()
+    client.post('/api/auth/register', json={
+        'name': 'Bench', 'username': 'bench', 'email': 'bench@example.com', 'password': 'bench-password', 'is_admin': False
+    })
+    token = client.post('/api/auth/login', json={'username': 'Bench', 'password': 'bench-password'}).get_json()['access_token']
+    client.post('/api/universes/bulk', headers={'Authorization': f'Bearer {token}'}, json={'items': [
+        {'name': f'Universe {i}', 'alignment': 'GOOD'} for i in range(20)
+    ]})
+    return token
+
+
+def run_child(mode, env):
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD, mode], env=env, cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings['process'] = time.perf_counter() - started
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='harmonic-bench-'), 'startup.db')
+    os.environ['PASSWORD_HASH_ROUNDS'] = '4'
+    token = seed(db_path)
+    env = dict(os.environ, DATABASE_URL=f'sqlite:///{db_path}', REVOKED_TOKEN_PURGE_SECONDS='0', BENCH_TOKEN=token)
+
+    print(f'median of {args.runs} fresh processes, ms')
+    print(f'{"mode":>6} ' + ' '.join(f'{phase:>10}' for phase in (*PHASES, 'process')))
+    for mode in ('cold', 'warm'):
+        runs = [run_child(mode, env) for _ in range(args.runs)]
+        medians = [
+            f'{statistics.median(r[phase] for r in runs) * 1000:>10.1f}' if phase in runs[0] else f'{"-":>10}'
+            for phase in (*PHASES, 'process')
+        ]
+        print(f'{mode:>6} ' + ' '.join(medians))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,13 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 from datetime import timedelta
 from flask_jwt_extended import JWTManager
 from flask_sqlalchemy import  SQLAlchemy
+from database import RoutingSession
 
 load_dotenv()
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
 
 class Config:
@@ -14,3 +16,65 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'super-secret-jwt-key'
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours = 1)
+    PAGE_SIZE_DEFAULT = int(os.environ.get('PAGE_SIZE_DEFAULT') or 50)
+    PAGE_SIZE_MAX = int(os.environ.get('PAGE_SIZE_MAX') or 200)
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE') or 1024)
+    # Per-worker cache of the authenticated user's id, is_admin and username. Only the
+    # worker handling a change drops its entry; others may serve a stale username or a
+    # deleted account for up to USER_CACHE_TTL seconds. Admin users are never cached, so
+    # a demotion takes effect everywhere immediately.
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 30)
+    # Most recently modified universes embedded in the profile, login and dashboard responses.
+    PROFILE_UNIVERSE_LIMIT = int(os.environ.get('PROFILE_UNIVERSE_LIMIT') or 50)
+    # GET /api/users/me/dashboard: recent items per type, and its per-worker cache (size 0 disables it).
+    DASHBOARD_RECENT_ITEMS = int(os.environ.get('DASHBOARD_RECENT_ITEMS') or 5)
+    DASHBOARD_CACHE_SIZE = int(os.environ.get('DASHBOARD_CACHE_SIZE') or 256)
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL') or 10)
+    # How stale another worker's view of a logout may be, and how often expired rows are deleted.
+    REVOKED_TOKEN_REFRESH_SECONDS = int(os.environ.get('REVOKED_TOKEN_REFRESH_SECONDS') or 5)
+    REVOKED_TOKEN_PURGE_SECONDS = int(os.environ.get('REVOKED_TOKEN_PURGE_SECONDS') or 3600)
+    # bcrypt work factor; existing hashes are upgraded to it on the next successful login.
+    PASSWORD_HASH_ROUNDS = int(os.environ.get('PASSWORD_HASH_ROUNDS') or 12)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or 4)
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING') or 64)
+    BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS') or 1000)
+    IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE') or 1000)
+    # 'production' sizes the pool and tunes SQLite per connection; 'stock' keeps SQLAlchemy's defaults.
+    DB_ENGINE_PROFILE = os.environ.get('DB_ENGINE_PROFILE') or 'production'
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 20)
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT') or 30)
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 1800)
+    DB_POOL_PRE_PING = (os.environ.get('DB_POOL_PRE_PING') or 'true').lower() == 'true'
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE') or 'WAL'
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS') or 5000)
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE') or 256 * 1024 * 1024)
+    # Negative values are KiB, so this is a 64 MiB page cache per connection.
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE') or -64000)
+    SQLITE_TEMP_STORE = os.environ.get('SQLITE_TEMP_STORE') or 'MEMORY'
+    # Optional read replica for GET requests, e.g. sqlite:///file:/path/replica.db?mode=ro&uri=true
+    DATABASE_REPLICA_URL = os.environ.get('DATABASE_REPLICA_URL')
+    SQLALCHEMY_BINDS = {'replica': DATABASE_REPLICA_URL} if DATABASE_REPLICA_URL else {}
+    # Reads stay on the primary this long after a client's write, so they see their own changes
+    # (carried across workers by a cookie of the same lifetime; see database.STICKY_COOKIE).
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS') or 5)
+    REPLICA_RETRY_SECONDS = int(os.environ.get('REPLICA_RETRY_SECONDS') or 30)
+    REPLICA_PROBE_SECONDS = int(os.environ.get('REPLICA_PROBE_SECONDS') or 5)
+    # ASGI entry point (asgi.py): async driver URL override and threads serving the routes handed to Flask.
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
+    ASGI_SYNC_WORKERS = int(os.environ.get('ASGI_SYNC_WORKERS') or 10)
+    # Run warm_up() (connect engines, prime compiled statements) during ASGI lifespan startup.
+    WARM_UP_ON_START = (os.environ.get('WARM_UP_ON_START') or 'false').lower() == 'true'
+    # Per-request SQL counts/timings in a Server-Timing header and the admin-only /api/metrics histograms.
+    REQUEST_METRICS_ENABLED = (os.environ.get('REQUEST_METRICS_ENABLED') or 'true').lower() == 'true'
+    # Background jobs (jobs.py): worker threads per web process (0 = only `flask run-jobs` runs them),
+    # idle poll interval, lease after which a silent running job is reclaimed, retries, and where
+    # uploads and results are kept (must be shared when workers run beside the app).
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS') or 2)
+    JOB_POLL_SECONDS = float(os.environ.get('JOB_POLL_SECONDS') or 1)
+    JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS') or 600)
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS') or 3)
+    JOB_RETRY_SECONDS = int(os.environ.get('JOB_RETRY_SECONDS') or 10)
+    JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS') or 7)
+    JOB_FILES_DIR = os.environ.get('JOB_FILES_DIR') or os.path.join(tempfile.gettempdir(), 'harmonic-jobs')
@@ -0,0 +1,388 @@
+import sqlite3
+import threading
+import time
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DatabaseError, DataError, DBAPIError, IntegrityError, ProgrammingError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from werkzeug.local import LocalProxy
+from cache import TTLCache
+
+
+class PoolTimings:
+    """Running totals for pool checkouts: time spent waiting for a connection and time it was held."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total = self.wait_max = 0.0
+            self.held_total = self.held_max = 0.0
+            self.checkins = 0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_held(self, seconds):
+        with self._lock:
+            self.checkins += 1
+            self.held_total += seconds
+            self.held_max = max(self.held_max, seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_avg_ms': round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+                'held_avg_ms': round(self.held_total / self.checkins * 1000, 3) if self.checkins else 0.0,
+                'held_max_ms': round(self.held_max * 1000, 3),
+            }
+
+
+pool_timings = PoolTimings()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a free connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            pool_timings.record_wait(time.perf_counter() - start, timed_out)
+
+
+def _is_sqlite_memory(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the configured DB_ENGINE_PROFILE.
+    'stock' leaves SQLAlchemy's defaults alone; 'production' sizes and times the pool.
+    In-memory SQLite keeps Flask-SQLAlchemy's single static connection.
+    """
+    if config['DB_ENGINE_PROFILE'] == 'stock':
+        return {}
+    options = {
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+    }
+    if not _is_sqlite_memory(make_url(config['SQLALCHEMY_DATABASE_URI'])):
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=config['DB_POOL_SIZE'],
+            max_overflow=config['DB_MAX_OVERFLOW'],
+            pool_timeout=config['DB_POOL_TIMEOUT'],
+        )
+    return options
+
+
+def sqlite_pragmas(config, read_only=False):
+    write_pragmas = [] if read_only else [
+        f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}",
+        f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}",
+    ]
+    return write_pragmas + [
+        f"PRAGMA busy_timeout = {config['SQLITE_BUSY_TIMEOUT_MS']}",
+        f"PRAGMA mmap_size = {config['SQLITE_MMAP_SIZE']}",
+        f"PRAGMA cache_size = {config['SQLITE_CACHE_SIZE']}",
+        f"PRAGMA temp_store = {config['SQLITE_TEMP_STORE']}",
+    ]
+
+
+def configure_engine(engine, config, read_only=False):
+    """
+    Applies the SQLite pragmas to every new connection and tracks how long connections are held.
+    `read_only` engines (the replica) skip the pragmas that would write to the database file.
+    Foreign-key enforcement is switched on under every profile: deletes rely on ON DELETE CASCADE.
+    """
+    if engine.dialect.name == 'sqlite':
+
+        @event.listens_for(engine, 'connect')
+        def enforce_foreign_keys(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute('PRAGMA foreign_keys = ON')
+            cursor.close()
+
+    if config['DB_ENGINE_PROFILE'] == 'stock':
+        return
+    if engine.dialect.name == 'sqlite':
+        pragmas = sqlite_pragmas(config, read_only)
+
+        @event.listens_for(engine, 'connect')
+        def apply_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+    @event.listens_for(engine, 'checkout')
+    def mark_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['checked_out_at'] = time.perf_counter()
+
+    @event.listens_for(engine, 'checkin')
+    def record_checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop('checked_out_at', None)
+        if started is not None:
+            pool_timings.record_held(time.perf_counter() - started)
+
+
+#! ------------ Async engine -----------
+
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg', 'mysql': 'mysql+aiomysql'}
+
+
+def create_async_database(sync_url, config):
+    """
+    Async engine and session factory for the ASGI entry point.
+    Uses ASYNC_DATABASE_URL when set, otherwise the resolved sync URL with its driver
+    swapped for the asyncio one, and the same engine profile and pragmas as the sync engine.
+    In-memory SQLite is not shared between the two engines.
+    """
+    # Imported here so the WSGI app never loads the asyncio stack.
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    url = make_url(config.get('ASYNC_DATABASE_URL') or sync_url)
+    if not config.get('ASYNC_DATABASE_URL'):
+        url = url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+    options = engine_options(config)
+    if options.get('poolclass') is TimedQueuePool:
+        options['poolclass'] = AsyncAdaptedQueuePool
+    engine = create_async_engine(url, **options)
+    configure_engine(engine.sync_engine, config)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+def pool_status(engine):
+    """Current pool occupancy plus the cumulative checkout timings (summed over every bind)."""
+    pool = engine.pool
+    status = {'pool': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+    status.update(pool_timings.snapshot())
+    return status
+
+
+#! ------------ Read replica routing -----------
+
+READ_METHODS = ('GET', 'HEAD')
+
+# Set on a successful write to the time (epoch seconds) until which the client's reads stay on
+# the primary, whichever worker serves them. Checked here too, for clients that ignore Max-Age.
+STICKY_COOKIE = 'read_primary_until'
+
+
+def _is_replica_failure(error):
+    """Connection and storage errors; mistakes in the statement itself would fail on the primary too."""
+    return isinstance(error, DatabaseError) and not isinstance(error, (ProgrammingError, IntegrityError, DataError))
+
+
+class ReplicaRouter:
+    """
+    Sends the queries of GET/HEAD requests to the replica bind.
+
+    Everything else stays on the primary: writes, flushes, work outside a request,
+    and reads by a client that wrote within the last `sticky_seconds` (read-your-writes).
+    That is tracked by a STICKY_COOKIE on the response, which follows the client to any
+    worker, and by the user id in this worker, for clients that drop cookies. A replica error marks it down for `retry_seconds` and the
+    failed statement is retried on the primary; while up, the replica is re-probed
+    every `probe_seconds` so an unreachable one is noticed before it is used.
+    """
+
+    def __init__(self, bind_key='replica', sticky_seconds=5, retry_seconds=30, probe_seconds=5):
+        self.bind_key = bind_key
+        self.sticky_seconds = sticky_seconds
+        self.recent_writers = TTLCache(maxsize=10000, ttl=sticky_seconds)
+        self.retry_seconds = retry_seconds
+        self.probe_seconds = probe_seconds
+        self.db = None
+        self._down_until = 0.0
+        self._next_probe = 0.0
+
+    def init_app(self, app, db):
+        app.extensions['replica_router'] = self
+        self.db = db
+        self.sticky_seconds = app.config['REPLICA_STICKY_SECONDS']
+        self.recent_writers.configure(10000, self.sticky_seconds)
+        self.retry_seconds = app.config['REPLICA_RETRY_SECONDS']
+        self.probe_seconds = app.config['REPLICA_PROBE_SECONDS']
+        if self.bind_key not in app.config.get('SQLALCHEMY_BINDS', {}):
+            return
+        with app.app_context():
+            event.listen(db.engines[self.bind_key], 'handle_error', self._on_error)
+        app.after_request(self._remember_writer)
+
+    def engine_for(self, session, clause=None):
+        """The replica engine when this query may be served from it, otherwise None."""
+        if self.db is None or not has_request_context() or request.method not in READ_METHODS:
+            return None
+        if _writes(session, clause):
+            return None
+        if g.get('read_from_primary') or _sticky(request.cookies.get(STICKY_COOKIE)):
+            return None
+        engine = self.db.engines.get(self.bind_key)
+        if engine is None:
+            return None
+        identity = _current_identity()
+        if identity is not None and self.recent_writers.get(identity):
+            return None
+        return engine if self.available(engine) else None
+
+    def available(self, engine):
+        now = time.monotonic()
+        if now < self._down_until:
+            return False
+        if now >= self._next_probe:
+            self._next_probe = now + self.probe_seconds
+            try:
+                with engine.connect() as connection:
+                    connection.exec_driver_sql('SELECT 1')
+            except Exception as e:
+                self.mark_down(e)
+                return False
+        return True
+
+    def use_primary(self):
+        """before_request hook for views whose reads must be current, e.g. polled job progress."""
+        g.read_from_primary = True
+
+    def mark_down(self, error):
+        print(f'Error: read replica unavailable, using primary: {str(error)}')
+        self._down_until = time.monotonic() + self.retry_seconds
+
+    def _on_error(self, context):
+        if context.is_disconnect or _is_replica_failure(context.sqlalchemy_exception):
+            self.mark_down(context.original_exception)
+            if context.sqlalchemy_exception is not None:
+                context.sqlalchemy_exception.from_replica = True
+
+    def _remember_writer(self, response):
+        if request.method not in READ_METHODS and request.method != 'OPTIONS' and response.status_code < 400:
+            response.set_cookie(
+                STICKY_COOKIE, f'{time.time() + self.sticky_seconds:.3f}',
+                max_age=self.sticky_seconds, httponly=True, samesite='Lax'
+            )
+            identity = _current_identity()
+            if identity is not None:
+                self.recent_writers.set(identity, True)
+        return response
+
+
+def _writes(session, clause):
+    """
+    True for a DML statement, while the session holds changes (a flush asks for its
+    bind with no statement at all, and an autoflush is about to write them anyway),
+    and for the rest of a transaction that has written: the replica cannot see it yet.
+    """
+    if (clause is not None and getattr(clause, 'is_dml', False)) or session.new or session.deleted or session.dirty:
+        session.info['wrote'] = True
+    return session.info.get('wrote', False)
+
+
+def _sticky(until):
+    try:
+        return until is not None and float(until) > time.time()
+    except ValueError:
+        return False
+
+
+def _current_identity():
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
+
+
+# The app's router (create_app keeps one per app in app.extensions).
+replica_router = LocalProxy(lambda: current_app.extensions['replica_router'])
+
+
+class RoutingSession(Session):
+    """
+    Flask-SQLAlchemy session that lets replica_router pick the replica for read-only requests.
+
+    Every ORM read (execute, get, lazy and relationship loads, refresh) asks get_bind
+    for an engine, so failover lives there: the replica is only returned once this
+    session's transaction holds a working connection to it, and a failure to connect
+    marks it down and answers with the primary instead. A statement that fails on an
+    already-open replica connection is retried once on the primary by
+    _with_failover; get, refresh and loader queries reach it through execute().
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            replica = replica_router.engine_for(self, clause)
+            if replica is not None:
+                try:
+                    # Opens (or reuses) the transaction's replica connection; public API, no re-entry into get_bind.
+                    self.connection(bind_arguments={'bind': replica})
+                    return replica
+                except (DBAPIError, PoolTimeoutError) as e:
+                    replica_router.mark_down(e)
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _with_failover(self, method, *args, **kwargs):
+        try:
+            return method(*args, **kwargs)
+        except DatabaseError as e:
+            if not getattr(e, 'from_replica', False):
+                raise
+            # The replica is now marked down, so the retry binds to the primary.
+            self.rollback()
+            return method(*args, **kwargs)
+
+    def execute(self, *args, **kwargs):
+        return self._with_failover(super().execute, *args, **kwargs)
+
+    def scalar(self, *args, **kwargs):
+        return self._with_failover(super().scalar, *args, **kwargs)
+
+    def scalars(self, *args, **kwargs):
+        return self._with_failover(super().scalars, *args, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _forget_writes(session, transaction):
+    if transaction.parent is None:
+        session.info.pop('wrote', None)
+
+
+def sqlite_path(url):
+    url = make_url(url)
+    path = url.database
+    return path[len('file:'):] if url.query.get('uri') and path.startswith('file:') else path
+
+
+def replicate_sqlite(source_path, target_path):
+    """
+    Local stand-in for replication: copies the primary into the replica file with
+    SQLite's online backup API, which is consistent while the primary takes writes.
+    The copy is switched to a rollback journal so read-only connections can open it.
+    """
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+        target.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        target.close()
+        source.close()
+
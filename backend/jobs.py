@@ -0,0 +1,242 @@
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, update, delete, and_, or_
+from werkzeug.local import LocalProxy
+from config import db
+from models import Job, JOB_FINISHED_STATUSES
+
+# Errors that would fail the same way on every attempt (bad input, missing records).
+PERMANENT_ERRORS = (ValueError, PermissionError, LookupError)
+
+
+# kind -> handler(context, **payload); filled at import time by @job_handler, shared by every app.
+handlers = {}
+
+
+def job_handler(kind):
+    def decorator(fn):
+        handlers[kind] = fn
+        return fn
+    return decorator
+
+
+class JobCancelled(Exception):
+    """Raised by JobContext.checkpoint() once cancellation has been requested."""
+
+
+class JobContext:
+    """What a handler gets besides its payload: progress reporting and cancellation checks."""
+
+    def __init__(self, job):
+        self.job_id = job.job_id
+        self.user_id = job.user_id
+        self.attempt = job.attempts
+
+    def checkpoint(self, done, total=None):
+        """
+        Records progress and renews the lease, then raises JobCancelled if a cancel was
+        requested. It writes in its own short transaction, leaving the handler's session
+        alone; on SQLite, call it while that session has no uncommitted writes, or the
+        two connections wait on each other. A handler that runs longer than the lease
+        without calling it may be picked up again by another worker.
+        """
+        values = {'progress': done, 'heartbeat_at': datetime.utcnow()}
+        if total is not None:
+            values['total'] = total
+        jobs = Job.__table__
+        with db.engine.begin() as connection:
+            connection.execute(update(jobs).where(jobs.c.job_id == self.job_id).values(**values))
+            cancelled = connection.scalar(select(jobs.c.cancel_requested).where(jobs.c.job_id == self.job_id))
+        if cancelled:
+            raise JobCancelled()
+
+
+class JobRunner:
+    """
+    Background jobs with the database as the queue, so no broker is needed and queued
+    work survives restarts.
+
+    Workers are threads, started in the web process on its first request (so each
+    forked server worker starts its own) or beside it with `flask run-jobs`. A worker
+    claims a job with a conditional UPDATE, which is safe between processes on every
+    backend. A running job whose heartbeat is older than `lease_seconds` is assumed
+    lost and claimed again. Failures are retried with exponential backoff up to the
+    job's max_attempts, except PERMANENT_ERRORS, which fail it straight away.
+    Handlers are registered with @job_handler(kind) and called as
+    handler(context, **payload) inside an app context; they return the job's result.
+    Each app has its own runner (app.extensions['job_runner']) and worker threads.
+    """
+
+    def __init__(self, workers=2, poll_seconds=1, lease_seconds=600, max_attempts=3, retry_seconds=10, files_dir=None):
+        self._threads = []
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self.configure(workers, poll_seconds, lease_seconds, max_attempts, retry_seconds, files_dir)
+
+    def configure(self, workers, poll_seconds, lease_seconds, max_attempts, retry_seconds, files_dir=None):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.files_dir = files_dir
+
+    def init_app(self, app):
+        app.extensions['job_runner'] = self
+        self.configure(
+            app.config['JOB_WORKERS'], app.config['JOB_POLL_SECONDS'], app.config['JOB_LEASE_SECONDS'],
+            app.config['JOB_MAX_ATTEMPTS'], app.config['JOB_RETRY_SECONDS'], app.config['JOB_FILES_DIR']
+        )
+        if self.workers > 0:
+            app.before_request(lambda: self.start(app))
+
+    def file_path(self, job_id, suffix):
+        """Where a job keeps its upload or output file."""
+        os.makedirs(self.files_dir, exist_ok=True)
+        return os.path.join(self.files_dir, f'{job_id}{suffix}')
+
+    def enqueue(self, kind, user_id, payload=None, job_id=None, max_attempts=None):
+        """Adds a job and commits; returns it."""
+        if kind not in handlers:
+            raise ValueError(f'Unknown job kind: {kind}')
+        job = Job(
+            job_id=job_id or str(uuid.uuid4()), user_id=user_id, kind=kind, payload=payload or {},
+            max_attempts=max_attempts or self.max_attempts
+        )
+        db.session.add(job)
+        db.session.commit()
+        self._wake.set()
+        return job
+
+    def cancel(self, job):
+        """
+        Cancels a queued job at once; a running one is flagged and stops at its next
+        checkpoint(). Returns False when the job had already finished.
+        """
+        if job.status in JOB_FINISHED_STATUSES:
+            return False
+        cancelled = db.session.execute(
+            update(Job).where(Job.job_id == job.job_id, Job.status == 'queued')
+            .values(status='cancelled', cancel_requested=True, finished_at=datetime.utcnow())
+        ).rowcount
+        if not cancelled:
+            db.session.execute(update(Job).where(Job.job_id == job.job_id).values(cancel_requested=True))
+        db.session.commit()
+        db.session.refresh(job)
+        return True
+
+    def purge_finished(self, older_than):
+        """Deletes jobs that finished more than `older_than` (a timedelta) ago, and their files."""
+        cutoff = datetime.utcnow() - older_than
+        finished = and_(Job.status.in_(JOB_FINISHED_STATUSES), Job.finished_at < cutoff)
+        job_ids = db.session.scalars(select(Job.job_id).where(finished)).all()
+        db.session.execute(delete(Job).where(finished))
+        db.session.commit()
+        if self.files_dir and os.path.isdir(self.files_dir):
+            for name in os.listdir(self.files_dir):
+                if name.split('.', 1)[0] in job_ids:
+                    os.remove(os.path.join(self.files_dir, name))
+        return len(job_ids)
+
+    def start(self, app, workers=None):
+        """Starts the worker threads for this process, once (again after a fork)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopping.clear()
+            self._threads = []
+            for index in range(workers or self.workers):
+                name = f'{socket.gethostname()}:{self._pid}:job-worker-{index}'
+                thread = threading.Thread(target=self._work, args=(app, name), name=f'job-worker-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._pid = None
+
+    def _work(self, app, name):
+        while not self._stopping.is_set():
+            with app.app_context():
+                try:
+                    ran = self.run_next(name)
+                except Exception as e:
+                    db.session.rollback()
+                    print(f'Error: {str(e)}')
+                    ran = False
+            if not ran:
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+
+    def _claimable(self, now):
+        return or_(
+            and_(Job.status == 'queued', Job.run_after <= now),
+            and_(Job.status == 'running', Job.heartbeat_at < now - timedelta(seconds=self.lease_seconds))
+        )
+
+    def run_next(self, worker='inline'):
+        """Claims and runs one due job. Returns False when there was nothing to claim."""
+        now = datetime.utcnow()
+        job_id = db.session.scalar(
+            select(Job.job_id).where(self._claimable(now)).order_by(Job.run_after).limit(1)
+        )
+        if job_id is None:
+            db.session.rollback()
+            return False
+        claimed = db.session.execute(
+            update(Job).where(Job.job_id == job_id, self._claimable(now))
+            .values(status='running', worker=worker, attempts=Job.attempts + 1, started_at=now, heartbeat_at=now)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            self._run(db.session.get(Job, job_id))
+        return True
+
+    def _run(self, job):
+        if job.attempts > job.max_attempts:
+            # Only reachable through lease expiry: the worker died during the last attempt.
+            return self._finish(job, 'failed', error='Worker lost while running the job.')
+        handler = handlers.get(job.kind)
+        if handler is None:
+            return self._finish(job, 'failed', error=f'Unknown job kind: {job.kind}')
+        context = JobContext(job)
+        try:
+            result = handler(context, **job.payload)
+        except JobCancelled:
+            db.session.rollback()
+            return self._finish(job, 'cancelled')
+        except Exception as e:
+            db.session.rollback()
+            print(f'Error: job {job.job_id} ({job.kind}) attempt {job.attempts}: {str(e)}')
+            if isinstance(e, PERMANENT_ERRORS) or job.attempts >= job.max_attempts:
+                return self._finish(job, 'failed', error=str(e))
+            delay = self.retry_seconds * 2 ** (job.attempts - 1)
+            db.session.execute(update(Job).where(Job.job_id == job.job_id).values(
+                status='queued', error=str(e), worker=None, heartbeat_at=None,
+                run_after=datetime.utcnow() + timedelta(seconds=delay)
+            ))
+            db.session.commit()
+            return
+        self._finish(job, 'succeeded', result=result, error=None)
+
+    def _finish(self, job, status, **values):
+        db.session.execute(update(Job).where(Job.job_id == job.job_id).values(
+            status=status, finished_at=datetime.utcnow(), heartbeat_at=None, **values
+        ))
+        db.session.commit()
+
+
+job_runner = LocalProxy(lambda: current_app.extensions['job_runner'])
@@ -0,0 +1,163 @@
+import bisect
+import threading
+import time
+from flask import g, has_app_context, request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram keyed by a tuple of label values."""
+
+    def __init__(self, name, help_text, buckets, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.label_names = label_names
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def exposition(self):
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        for labels in sorted(series):
+            counts, total, count = series[labels]
+            label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return '\n'.join(lines)
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels):
+        with self._lock:
+            self._series[labels] = self._series.get(labels, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def exposition(self):
+        with self._lock:
+            series = dict(self._series)
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        for labels in sorted(series):
+            label_text = ','.join(f'{k}="{_escape(v)}"' for k, v in zip(self.label_names, labels))
+            lines.append(f'{self.name}{{{label_text}}} {series[labels]}')
+        return '\n'.join(lines)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class RequestMetrics:
+    """
+    Per-request SQL statement count and DB time, reported in a Server-Timing header
+    and aggregated into histograms labelled by blueprint and endpoint.
+
+    The cursor hooks only add two perf_counter() calls and a few additions per
+    statement, and the histograms take one short lock per request, so it is meant
+    to stay on in production. Figures are per worker process.
+    """
+
+    def __init__(self):
+        labels = ('blueprint', 'endpoint')
+        self.latency = Histogram('http_request_duration_seconds', 'Time spent serving the request.', LATENCY_BUCKETS, labels)
+        self.db_time = Histogram('http_request_db_seconds', 'Time spent executing SQL per request.', LATENCY_BUCKETS, labels)
+        self.queries = Histogram('http_request_queries', 'SQL statements executed per request.', QUERY_BUCKETS, labels)
+        self.responses = Counter('http_responses_total', 'Responses sent, by status code.', (*labels, 'status'))
+        self.enabled = True
+
+    def init_app(self, app, engines):
+        self.enabled = app.config['REQUEST_METRICS_ENABLED']
+        if not self.enabled:
+            return
+        for engine in engines:
+            self.instrument(engine)
+        app.before_request(self.start)
+        app.after_request(self._finish_request)
+
+    def instrument(self, engine):
+        """Counts statements on `engine` (a sync Engine; pass `.sync_engine` for async ones) into the current request."""
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def start(self):
+        g.sql_stats = [0, 0.0]
+        g.request_started = time.perf_counter()
+
+    def finish(self, response, blueprint, endpoint):
+        """Records the request and adds the Server-Timing header; needs the app context start() ran in."""
+        stats = g.pop('sql_stats', None)
+        started = g.pop('request_started', None)
+        if stats is None or started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        statements, db_seconds = stats
+        labels = (blueprint or '', endpoint or 'unmatched')
+        self.latency.observe(labels, elapsed)
+        self.db_time.observe(labels, db_seconds)
+        self.queries.observe(labels, statements)
+        self.responses.inc((*labels, response.status_code))
+        response.headers['Server-Timing'] = (
+            f'db;dur={db_seconds * 1000:.2f};desc="{statements} queries", total;dur={elapsed * 1000:.2f}'
+        )
+        return response
+
+    def reset(self):
+        for metric in (self.latency, self.db_time, self.queries, self.responses):
+            metric.reset()
+
+    def exposition(self):
+        return '\n'.join(m.exposition() for m in (self.latency, self.db_time, self.queries, self.responses)) + '\n'
+
+    def _finish_request(self, response):
+        endpoint = request.endpoint
+        return self.finish(response, request.blueprint, endpoint.rsplit('.', 1)[-1] if endpoint else None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'metrics_started', None)
+    if started is None or not has_app_context():
+        return
+    stats = g.get('sql_stats')
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - started
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,177 @@
+"""
+Versioned schema migrations.
+
+Revisions live in migrations/versions as NNNN_description.py modules, each
+defining upgrade(connection). Applied revisions are recorded in the
+schema_migrations table and pending ones run in order, one transaction each.
+Revisions inspect the live schema before changing it, so they also bring
+forward databases that were created by db.create_all() before versioning.
+Each revision carries its own DDL, as Table definitions on a private MetaData
+or literal SQL, and never reads the models: a revision must build the same
+schema however the models change after it.
+"""
+import importlib
+import pkgutil
+import re
+from datetime import datetime
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, inspect, select, insert
+
+schema_migrations = Table(
+    'schema_migrations', MetaData(),
+    Column('revision', Integer, primary_key=True),
+    Column('name', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+
+def load_migrations():
+    """Returns [(revision, name, module)] sorted by revision."""
+    from . import versions
+    found = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        revision, _, name = info.name.partition('_')
+        found.append((int(revision), name, importlib.import_module(f'{versions.__name__}.{info.name}')))
+    return sorted(found, key=lambda migration: migration[0])
+
+
+def applied_revisions(connection):
+    schema_migrations.create(connection, checkfirst=True)
+    return set(connection.scalars(select(schema_migrations.c.revision)))
+
+
+def upgrade(engine, target=None, delete_orphans=False):
+    """
+    Applies pending revisions up to `target` (default: all). Returns the names applied.
+    Revisions only delete user data the operator asked them to: see delete_orphans().
+    """
+    with engine.begin() as connection:
+        applied = applied_revisions(connection)
+    done = []
+    for revision, name, module in load_migrations():
+        if revision in applied or (target is not None and revision > target):
+            continue
+        with engine.begin() as connection:
+            connection.info['delete_orphans'] = delete_orphans
+            module.upgrade(connection)
+            connection.execute(insert(schema_migrations).values(
+                revision=revision, name=name, applied_at=datetime.utcnow()
+            ))
+        done.append(f'{revision:04d}_{name}')
+    return done
+
+
+#! ------------ Operations used by revisions -----------
+
+def column_names(connection, table):
+    return {column['name'] for column in inspect(connection).get_columns(table)}
+
+
+def add_column(connection, table, name, ddl):
+    """
+    ALTER TABLE ... ADD COLUMN unless the column already exists. Returns True when added.
+    NOT NULL columns need a constant DEFAULT in `ddl` for SQLite to accept them.
+    """
+    if name in column_names(connection, table):
+        return False
+    connection.exec_driver_sql(f'ALTER TABLE {table} ADD COLUMN {name} {ddl}')
+    return True
+
+
+def create_indexes(connection, *indexes):
+    """Creates each (name, table, columns) index, skipping any that already exist."""
+    live = inspect(connection)
+    quote = connection.dialect.identifier_preparer.quote
+    for name, table, columns in indexes:
+        if name in {index['name'] for index in live.get_indexes(table)}:
+            continue
+        connection.exec_driver_sql(
+            f'CREATE INDEX {quote(name)} ON {quote(table)} ({", ".join(quote(column) for column in columns)})'
+        )
+
+
+def cascade_foreign_keys(connection, keys):
+    """
+    Gives each existing foreign key in `keys`, as (table, columns, referred table,
+    referred columns), ON DELETE CASCADE. Returns the (table, columns) pairs changed.
+
+    SQLite cannot alter a constraint, but the action only lives in the CREATE TABLE
+    text, so that text is rewritten in place: SQLite's documented procedure for schema
+    changes that leave the stored rows alone. Other backends drop and re-add the key.
+    """
+    live = inspect(connection)
+    changes = []
+    for table, columns, referred_table, referred_columns in keys:
+        if not live.has_table(table):
+            continue
+        current = {tuple(fk['constrained_columns']): fk for fk in live.get_foreign_keys(table)}
+        existing = current.get(tuple(columns))
+        if existing is None or (existing['options'].get('ondelete') or '').upper() == 'CASCADE':
+            continue
+        changes.append((table, tuple(columns), referred_table, tuple(referred_columns), existing))
+    if not changes:
+        return []
+
+    if connection.dialect.name == 'sqlite':
+        _cascade_sqlite_foreign_keys(connection, changes)
+    else:
+        quote = connection.dialect.identifier_preparer.quote
+        drop = 'DROP FOREIGN KEY' if connection.dialect.name == 'mysql' else 'DROP CONSTRAINT'
+        for table, columns, referred_table, referred_columns, existing in changes:
+            connection.exec_driver_sql(f'ALTER TABLE {quote(table)} {drop} {quote(existing["name"])}')
+            connection.exec_driver_sql(
+                f'ALTER TABLE {quote(table)} ADD FOREIGN KEY ({", ".join(map(quote, columns))}) '
+                f'REFERENCES {quote(referred_table)} ({", ".join(map(quote, referred_columns))}) ON DELETE CASCADE'
+            )
+    return [(table, columns) for table, columns, _, _, _ in changes]
+
+
+def _cascade_sqlite_foreign_keys(connection, changes):
+    statements = {}
+    for table, columns, referred_table, _, _ in changes:
+        sql = statements.get(table) or connection.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).scalar()
+        pattern = (
+            r'(FOREIGN KEY\s*\(\s*' + r'\s*,\s*'.join(f'"?{column}"?' for column in columns) + r'\s*\)'
+            r'\s*REFERENCES\s+"?' + referred_table + r'"?\s*\([^)]*\))(?!\s*ON DELETE)'
+        )
+        sql, found = re.subn(pattern, r'\1 ON DELETE CASCADE', sql, flags=re.IGNORECASE)
+        if not found:
+            raise RuntimeError(f'Could not find the foreign key {table}{columns} in its CREATE TABLE statement.')
+        statements[table] = sql
+
+    version = connection.exec_driver_sql('PRAGMA schema_version').scalar()
+    connection.exec_driver_sql('PRAGMA writable_schema = ON')
+    for name, sql in statements.items():
+        connection.exec_driver_sql("UPDATE sqlite_master SET sql = ? WHERE type = 'table' AND name = ?", (sql, name))
+    connection.exec_driver_sql(f'PRAGMA schema_version = {version + 1}')
+    connection.exec_driver_sql('PRAGMA writable_schema = OFF')
+    if connection.exec_driver_sql('PRAGMA integrity_check').scalar() != 'ok':
+        raise RuntimeError('SQLite integrity check failed after rewriting foreign keys.')
+
+
+def delete_orphans(connection):
+    """
+    SQLite only: deletes rows whose parent is gone, left behind while foreign keys were
+    not enforced, and prints how many per table. Returns {table: rows deleted}.
+
+    Only when the operator opted in (upgrade(..., delete_orphans=True), or
+    `flask db-upgrade --delete-orphans`); otherwise finding any raises with the counts,
+    and the revision is rolled back, so no data goes without it being seen first.
+    """
+    orphans = {}
+    for table, rowid, _, _ in connection.exec_driver_sql('PRAGMA foreign_key_check').fetchall():
+        orphans.setdefault(table, set()).add(rowid)
+    counts = {table: len(rowids) for table, rowids in orphans.items()}
+    if not orphans:
+        return counts
+    summary = ', '.join(f'{table}: {count}' for table, count in sorted(counts.items()))
+    if not connection.info.get('delete_orphans'):
+        raise RuntimeError(
+            f'Rows whose parent no longer exists ({summary}). Back them up if needed, then '
+            f'run `flask db-upgrade --delete-orphans` to delete them.'
+        )
+    for table, rowids in orphans.items():
+        connection.exec_driver_sql(f'DELETE FROM "{table}" WHERE rowid IN ({", ".join(map(str, rowids))})')
+    print(f'Deleted orphaned rows: {summary}')
+    return counts
@@ -0,0 +1,169 @@
+"""
+Creates every table missing from the database; on a fresh install that is the whole
+schema as it stood when versioning began. Later revisions add what came after.
+"""
+from sqlalchemy import (
+    MetaData, Table, Column, ForeignKey, Index, Integer, Boolean, String, Text, DateTime, JSON, Enum
+)
+
+metadata = MetaData()
+
+Table(
+    'users', metadata,
+    Column('user_id', Integer, primary_key=True),
+    Column('is_admin', Boolean, nullable=False),
+    Column('name', String(100), nullable=False),
+    Column('username', String(200), nullable=False, unique=True),
+    Column('email', String(200), nullable=False, unique=True),
+    Column('password_hash', String(250), nullable=False),
+    Column('bio', String(500)),
+    Column('created_at', DateTime, nullable=False),
+    Column('updated_at', DateTime, nullable=False),
+    Column('version', Integer, nullable=False),
+    Column('collection_version', Integer, nullable=False),
+)
+
+Table(
+    'token_blocklist', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('jti', String(36), nullable=False, index=True),
+    Column('created_at', DateTime, nullable=False, index=True),
+    Column('expires_at', DateTime, nullable=False, index=True),
+)
+
+Table(
+    'universes', metadata,
+    Column('universe_id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.user_id'), nullable=False),
+    Column('name', String(100), nullable=False),
+    Column('description', String(300)),
+    Column('alignment', Enum('GOOD', 'BAD', 'NEUTRAL', 'CHAOTIC', 'LAWFUL', name='alignmenttype'), nullable=False),
+    Column('created_at', DateTime, nullable=False),
+    Column('updated_at', DateTime, nullable=False),
+    Column('version', Integer, nullable=False),
+    Index('ix_universes_user_id_created_at', 'user_id', 'created_at', 'universe_id'),
+)
+
+Table(
+    'characters', metadata,
+    Column('character_id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.user_id'), nullable=False),
+    Column('name', String(100), nullable=False),
+    Column('age', Integer),
+    Column('origin', String(200)),
+    Column('main_power_set', String(100), nullable=False, unique=True),
+    Column('secondary_power_set', String(100), nullable=False, unique=True),
+    Column('skills', JSON, nullable=False),
+    Column('created_at', DateTime, nullable=False),
+    Column('updated_at', DateTime, nullable=False),
+    Column('version', Integer, nullable=False),
+    Index('ix_characters_user_id_created_at', 'user_id', 'created_at', 'character_id'),
+)
+
+Table(
+    'notes', metadata,
+    Column('note_id', Integer, primary_key=True),
+    Column('title', String(100), nullable=False),
+    Column('content', Text),
+    Column('user_id', Integer, ForeignKey('users.user_id'), nullable=False),
+    Column('created_at', DateTime, nullable=False),
+    Column('updated_at', DateTime, nullable=False),
+    Column('version', Integer, nullable=False),
+    Index('ix_notes_user_id_created_at', 'user_id', 'created_at', 'note_id'),
+)
+
+Table(
+    'locations', metadata,
+    Column('location_id', Integer, primary_key=True),
+    Column('universe_id', Integer, ForeignKey('universes.universe_id'), nullable=False),
+    Column('user_id', Integer, ForeignKey('users.user_id'), nullable=False),
+    Column('name', String(150), nullable=False),
+    Column('location_type', Enum(
+        'GALAXY', 'SYSTEM', 'PLANET', 'CONTINENT', 'KINGDOM', 'STATE', 'CITY', 'TOWN', 'VILLAGE',
+        'STREET', 'BUILDING', 'ROOM', 'LANDMARK', name='locationtype'
+    ), nullable=False),
+    Column('description', String(500)),
+    Column('created_at', DateTime, nullable=False),
+    Column('updated_at', DateTime, nullable=False),
+    Column('version', Integer, nullable=False),
+    Index('ix_locations_universe_id_created_at', 'universe_id', 'user_id', 'created_at', 'location_id'),
+    Index('ix_locations_user_id', 'user_id'),
+)
+
+Table(
+    'import_checkpoints', metadata,
+    Column('import_id', String(36), primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.user_id'), nullable=False, index=True),
+    Column('lines_processed', Integer, nullable=False),
+    Column('status', String(20), nullable=False),
+    Column('created_at', DateTime, nullable=False),
+    Column('updated_at', DateTime, nullable=False),
+)
+
+Table(
+    'import_id_map', metadata,
+    Column('import_id', String(36), ForeignKey('import_checkpoints.import_id'), primary_key=True),
+    Column('record_type', String(20), primary_key=True),
+    Column('old_id', Integer, primary_key=True),
+    Column('new_id', Integer, nullable=False),
+)
+
+
+def _association(name, left, right):
+    """A link table keyed (left, right), with the reverse index for lookups from `right`."""
+    (left_id, left_table), (right_id, right_table) = left, right
+    Table(
+        name, metadata,
+        Column(left_id, Integer, ForeignKey(f'{left_table}.{left_id}'), primary_key=True),
+        Column(right_id, Integer, ForeignKey(f'{right_table}.{right_id}'), primary_key=True),
+        Index(f'ix_{name}_{right_id}', right_id, left_id),
+    )
+
+
+_association('character_universes', ('character_id', 'characters'), ('universe_id', 'universes'))
+_association('character_notes', ('character_id', 'characters'), ('note_id', 'notes'))
+_association('note_universes', ('note_id', 'notes'), ('universe_id', 'universes'))
+_association('character_locations', ('character_id', 'characters'), ('location_id', 'locations'))
+_association('location_notes', ('location_id', 'locations'), ('note_id', 'notes'))
+
+# SQLite FTS5 index: rowid = entity id * 4 + kind code, owner is the 'u<user_id>' token.
+# kind code: (table, id column, title expression, body expression); '{row}' is new/old inside triggers.
+SEARCH_SOURCES = {
+    0: ('notes', 'note_id', "{row}.title", "coalesce({row}.content, '')"),
+    1: (
+        'characters', 'character_id', "{row}.name",
+        "coalesce({row}.origin, '') || ' ' || {row}.main_power_set || ' ' || "
+        "{row}.secondary_power_set || ' ' || coalesce({row}.skills, '')"
+    ),
+    2: ('locations', 'location_id', "{row}.name", "coalesce({row}.description, '')"),
+    3: ('universes', 'universe_id', "{row}.name", "coalesce({row}.description, '')"),
+}
+
+
+def search_index_ddl():
+    statements = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index "
+        "USING fts5(title, body, owner, tokenize = 'porter unicode61')"
+    ]
+    for code, (table, id_column, title, body) in SEARCH_SOURCES.items():
+        values = (
+            f"new.{id_column} * 4 + {code}, {title.format(row='new')}, "
+            f"{body.format(row='new')}, 'u' || new.user_id"
+        )
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO search_index(rowid, title, body, owner) VALUES ({values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE ON {table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = old.{id_column} * 4 + {code}; "
+            f"INSERT INTO search_index(rowid, title, body, owner) VALUES ({values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = old.{id_column} * 4 + {code}; END",
+        ]
+    return statements
+
+
+def upgrade(connection):
+    metadata.create_all(connection)
+    if connection.dialect.name == 'sqlite':
+        for statement in search_index_ddl():
+            connection.exec_driver_sql(statement)
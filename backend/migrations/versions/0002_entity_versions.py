@@ -0,0 +1,24 @@
+"""Adds the columns introduced after the original schema to tables that predate them."""
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from migrations import add_column
+
+VERSIONED_TABLES = ['users', 'universes', 'characters', 'notes', 'locations']
+
+# The access-token lifetime when this revision was written (JWT_ACCESS_TOKEN_EXPIRES).
+TOKEN_LIFETIME = timedelta(hours=1)
+
+
+def upgrade(connection):
+    for table in VERSIONED_TABLES:
+        add_column(connection, table, 'version', 'INTEGER NOT NULL DEFAULT 1')
+        if add_column(connection, table, 'updated_at', "DATETIME NOT NULL DEFAULT '1970-01-01 00:00:00'"):
+            connection.exec_driver_sql(f'UPDATE {table} SET updated_at = created_at')
+    add_column(connection, 'users', 'collection_version', 'INTEGER NOT NULL DEFAULT 1')
+
+    if add_column(connection, 'token_blocklist', 'expires_at', "DATETIME NOT NULL DEFAULT '1970-01-01 00:00:00'"):
+        # The original expiry is unknown; keep existing revocations until every token they could cover has lapsed.
+        connection.execute(
+            text('UPDATE token_blocklist SET expires_at = :expires_at'),
+            {'expires_at': datetime.utcnow() + TOKEN_LIFETIME}
+        )
@@ -0,0 +1,27 @@
+"""
+Indexes every foreign-key lookup path.
+
+Owner lookups on characters/universes/notes are served by their
+(user_id, created_at, id) indexes, locations by (universe_id, user_id, ...)
+plus user_id on its own. Association tables get the reverse of their
+composite primary key.
+"""
+from migrations import create_indexes
+
+
+def upgrade(connection):
+    create_indexes(
+        connection,
+        ('ix_characters_user_id_created_at', 'characters', ['user_id', 'created_at', 'character_id']),
+        ('ix_universes_user_id_created_at', 'universes', ['user_id', 'created_at', 'universe_id']),
+        ('ix_notes_user_id_created_at', 'notes', ['user_id', 'created_at', 'note_id']),
+        ('ix_locations_universe_id_created_at', 'locations', ['universe_id', 'user_id', 'created_at', 'location_id']),
+        ('ix_locations_user_id', 'locations', ['user_id']),
+        ('ix_character_universes_universe_id', 'character_universes', ['universe_id', 'character_id']),
+        ('ix_character_notes_note_id', 'character_notes', ['note_id', 'character_id']),
+        ('ix_note_universes_universe_id', 'note_universes', ['universe_id', 'note_id']),
+        ('ix_character_locations_location_id', 'character_locations', ['location_id', 'character_id']),
+        ('ix_location_notes_note_id', 'location_notes', ['note_id', 'location_id']),
+        ('ix_token_blocklist_created_at', 'token_blocklist', ['created_at']),
+        ('ix_token_blocklist_expires_at', 'token_blocklist', ['expires_at']),
+    )
@@ -0,0 +1,22 @@
+"""Fills the full-text index for rows written before it existed (SQLite only)."""
+
+# (table, id column, kind code, title expression, body expression), as indexed by 0001's triggers.
+SEARCH_SOURCES = [
+    ('notes', 'note_id', 0, "title", "coalesce(content, '')"),
+    ('characters', 'character_id', 1, "name",
+     "coalesce(origin, '') || ' ' || main_power_set || ' ' || secondary_power_set || ' ' || coalesce(skills, '')"),
+    ('locations', 'location_id', 2, "name", "coalesce(description, '')"),
+    ('universes', 'universe_id', 3, "name", "coalesce(description, '')"),
+]
+
+
+def upgrade(connection):
+    if connection.dialect.name != 'sqlite':
+        return
+    if connection.exec_driver_sql('SELECT 1 FROM search_index LIMIT 1').first():
+        return
+    for table, id_column, code, title, body in SEARCH_SOURCES:
+        connection.exec_driver_sql(
+            f"INSERT INTO search_index(rowid, title, body, owner) "
+            f"SELECT {id_column} * 4 + {code}, {title}, {body}, 'u' || user_id FROM {table}"
+        )
@@ -0,0 +1,38 @@
+"""
+Adds ON DELETE CASCADE to the foreign keys of every child and association table, so
+deleting a user, universe or any linked record is a few set-based statements in the
+database instead of the ORM loading and deleting each dependent row.
+
+SQLite only enforces foreign keys (and so cascades) with PRAGMA foreign_keys, which
+the engine now always sets. Rows orphaned while it was off stop the upgrade, with
+counts per table, unless the operator ran it with --delete-orphans; then they are
+deleted first and reported.
+"""
+from migrations import cascade_foreign_keys, delete_orphans
+
+# (table, columns, referred table, referred columns)
+CASCADING_KEYS = [
+    ('universes', ['user_id'], 'users', ['user_id']),
+    ('characters', ['user_id'], 'users', ['user_id']),
+    ('notes', ['user_id'], 'users', ['user_id']),
+    ('locations', ['user_id'], 'users', ['user_id']),
+    ('locations', ['universe_id'], 'universes', ['universe_id']),
+    ('import_checkpoints', ['user_id'], 'users', ['user_id']),
+    ('import_id_map', ['import_id'], 'import_checkpoints', ['import_id']),
+    ('character_universes', ['character_id'], 'characters', ['character_id']),
+    ('character_universes', ['universe_id'], 'universes', ['universe_id']),
+    ('character_notes', ['character_id'], 'characters', ['character_id']),
+    ('character_notes', ['note_id'], 'notes', ['note_id']),
+    ('note_universes', ['note_id'], 'notes', ['note_id']),
+    ('note_universes', ['universe_id'], 'universes', ['universe_id']),
+    ('character_locations', ['character_id'], 'characters', ['character_id']),
+    ('character_locations', ['location_id'], 'locations', ['location_id']),
+    ('location_notes', ['location_id'], 'locations', ['location_id']),
+    ('location_notes', ['note_id'], 'notes', ['note_id']),
+]
+
+
+def upgrade(connection):
+    if connection.dialect.name == 'sqlite':
+        delete_orphans(connection)
+    cascade_foreign_keys(connection, CASCADING_KEYS)
@@ -0,0 +1,35 @@
+"""Adds the jobs table that backs the background job runner."""
+from sqlalchemy import MetaData, Table, Column, ForeignKey, Index, Integer, Boolean, String, Text, DateTime, JSON
+
+metadata = MetaData()
+
+# Referenced by jobs.user_id; never created here.
+Table('users', metadata, Column('user_id', Integer, primary_key=True))
+
+jobs = Table(
+    'jobs', metadata,
+    Column('job_id', String(36), primary_key=True),
+    Column('user_id', Integer, ForeignKey('users.user_id', ondelete='SET NULL')),
+    Column('kind', String(50), nullable=False),
+    Column('status', String(20), nullable=False),
+    Column('payload', JSON, nullable=False),
+    Column('result', JSON),
+    Column('error', Text),
+    Column('progress', Integer, nullable=False),
+    Column('total', Integer),
+    Column('attempts', Integer, nullable=False),
+    Column('max_attempts', Integer, nullable=False),
+    Column('cancel_requested', Boolean, nullable=False),
+    Column('worker', String(100)),
+    Column('run_after', DateTime, nullable=False),
+    Column('heartbeat_at', DateTime),
+    Column('created_at', DateTime, nullable=False),
+    Column('started_at', DateTime),
+    Column('finished_at', DateTime),
+    Index('ix_jobs_status_run_after', 'status', 'run_after'),
+    Index('ix_jobs_user_id_created_at', 'user_id', 'created_at'),
+)
+
+
+def upgrade(connection):
+    jobs.create(connection, checkfirst=True)
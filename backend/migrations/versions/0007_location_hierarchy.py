@@ -0,0 +1,32 @@
+"""
+Adds locations.parent_id and the location_closure table behind subtree queries.
+Existing locations become roots, which need no closure rows.
+"""
+from sqlalchemy import MetaData, Table, Column, ForeignKey, Index, Integer
+from migrations import add_column, create_indexes
+
+metadata = MetaData()
+
+# Referenced by location_closure; never created here.
+Table('locations', metadata, Column('location_id', Integer, primary_key=True))
+
+location_closure = Table(
+    'location_closure', metadata,
+    Column('ancestor_id', Integer, ForeignKey('locations.location_id', ondelete='CASCADE'), primary_key=True),
+    Column('descendant_id', Integer, ForeignKey('locations.location_id', ondelete='CASCADE'), primary_key=True),
+    Column('depth', Integer, nullable=False),
+    Index('ix_location_closure_descendant_id', 'descendant_id', 'depth', 'ancestor_id'),
+)
+
+
+def upgrade(connection):
+    if connection.dialect.name == 'sqlite':
+        # SQLite takes the foreign key inline; it cannot add a constraint afterwards.
+        add_column(connection, 'locations', 'parent_id',
+                   'INTEGER REFERENCES locations (location_id) ON DELETE CASCADE')
+    elif add_column(connection, 'locations', 'parent_id', 'INTEGER NULL'):
+        connection.exec_driver_sql(
+            'ALTER TABLE locations ADD FOREIGN KEY (parent_id) REFERENCES locations (location_id) ON DELETE CASCADE'
+        )
+    create_indexes(connection, ('ix_locations_parent_id', 'locations', ['parent_id']))
+    location_closure.create(connection, checkfirst=True)
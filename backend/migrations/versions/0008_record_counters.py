@@ -0,0 +1,30 @@
+"""
+Adds the denormalized record counters on users and universes (see models/counters.py)
+and fills them in from the existing rows.
+"""
+from migrations import add_column
+
+COUNTERS = {
+    'users': ['universe_count', 'character_count', 'note_count', 'location_count'],
+    'universes': ['character_count', 'note_count', 'location_count'],
+}
+
+RECOUNT_SQL = [
+    'UPDATE universes SET '
+    'character_count = (SELECT count(*) FROM character_universes WHERE character_universes.universe_id = universes.universe_id), '
+    'note_count = (SELECT count(*) FROM note_universes WHERE note_universes.universe_id = universes.universe_id), '
+    'location_count = (SELECT count(*) FROM locations WHERE locations.universe_id = universes.universe_id)',
+    'UPDATE users SET '
+    'universe_count = (SELECT count(*) FROM universes WHERE universes.user_id = users.user_id), '
+    'character_count = (SELECT count(*) FROM characters WHERE characters.user_id = users.user_id), '
+    'note_count = (SELECT count(*) FROM notes WHERE notes.user_id = users.user_id), '
+    'location_count = (SELECT count(*) FROM locations WHERE locations.user_id = users.user_id)',
+]
+
+
+def upgrade(connection):
+    for table, columns in COUNTERS.items():
+        for column in columns:
+            add_column(connection, table, column, 'INTEGER NOT NULL DEFAULT 0')
+    for statement in RECOUNT_SQL:
+        connection.exec_driver_sql(statement)
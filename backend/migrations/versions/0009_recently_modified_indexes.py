@@ -0,0 +1,12 @@
+"""Indexes (user_id, updated_at) for the dashboard's most-recently-modified lists."""
+from migrations import create_indexes
+
+
+def upgrade(connection):
+    create_indexes(
+        connection,
+        ('ix_universes_user_id_updated_at', 'universes', ['user_id', 'updated_at']),
+        ('ix_characters_user_id_updated_at', 'characters', ['user_id', 'updated_at']),
+        ('ix_notes_user_id_updated_at', 'notes', ['user_id', 'updated_at']),
+        ('ix_locations_user_id_updated_at', 'locations', ['user_id', 'updated_at']),
+    )
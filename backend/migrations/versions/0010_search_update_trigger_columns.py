@@ -0,0 +1,27 @@
+"""
+Narrows the full-text update triggers to the indexed columns and user_id (SQLite only),
+so version, timestamp and counter updates no longer rewrite the index row.
+"""
+
+# (table, id column, kind code, indexed columns, title expression, body expression), as in 0001.
+SEARCH_SOURCES = [
+    ('notes', 'note_id', 0, 'title, content', "new.title", "coalesce(new.content, '')"),
+    ('characters', 'character_id', 1, 'name, origin, main_power_set, secondary_power_set, skills', "new.name",
+     "coalesce(new.origin, '') || ' ' || new.main_power_set || ' ' || "
+     "new.secondary_power_set || ' ' || coalesce(new.skills, '')"),
+    ('locations', 'location_id', 2, 'name, description', "new.name", "coalesce(new.description, '')"),
+    ('universes', 'universe_id', 3, 'name, description', "new.name", "coalesce(new.description, '')"),
+]
+
+
+def upgrade(connection):
+    if connection.dialect.name != 'sqlite':
+        return
+    for table, id_column, code, columns, title, body in SEARCH_SOURCES:
+        connection.exec_driver_sql(f'DROP TRIGGER IF EXISTS {table}_search_update')
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE OF {columns}, user_id ON {table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = old.{id_column} * 4 + {code}; "
+            f"INSERT INTO search_index(rowid, title, body, owner) "
+            f"VALUES (new.{id_column} * 4 + {code}, {title}, {body}, 'u' || new.user_id); END"
+        )
@@ -1,17 +1,15 @@
-from flask_sqlalchemy import SQLAlchemy
-
-
-db = SQLAlchemy()
-
-
 from .enums import AlignmentType, LocationType
-from .associations import character_universes, character_notes, note_universes, character_locations, location_notes
+from .associations import character_universes, character_notes, note_universes, character_locations, location_notes, location_closure
 from .users import User, bcrypt
 from .universes import Universe
 from .characters import Character
 from .notes import Note
 from .locations import Location
 from .token_blocklist import TokenBlocklist
-from utils import get_current_user
+from .imports import ImportCheckpoint, import_id_map
+from .jobs import Job, JOB_STATUSES, JOB_FINISHED_STATUSES
+from .search import SEARCH_KINDS, SEARCH_KIND_COUNT, search_index_ddl, search_index_rebuild_sql, search_trigger_drop_sql
+from .versioning import touch_collections
+from .counters import count_records, count_links, uncount_links, recount_counters
 
-__all__ = ['db', 'User', 'Universe', 'AlignmentType','LocationType', 'Character', 'character_universes', 'character_notes', 'Note', 'Location', 'note_universes', 'character_locations', 'location_notes', 'TokenBlocklist']
\ No newline at end of file
+__all__ = ['User', 'Universe', 'AlignmentType','LocationType', 'Character', 'character_universes', 'character_notes', 'Note', 'Location', 'note_universes', 'character_locations', 'location_notes', 'location_closure', 'TokenBlocklist', 'ImportCheckpoint', 'import_id_map', 'Job']
\ No newline at end of file
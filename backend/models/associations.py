@@ -1,23 +1,40 @@
 from config import db
 
+# Each composite primary key serves lookups from its first column; the
+# reverse index serves lookups from the second (e.g. all characters in a note).
+
 character_universes = db.Table('character_universes',
-    db.Column('character_id', db.Integer, db.ForeignKey('characters.character_id'), primary_key=True), 
-    db.Column('universe_id', db.Integer, db.ForeignKey('universes.universe_id'), primary_key=True))
+    db.Column('character_id', db.Integer, db.ForeignKey('characters.character_id', ondelete='CASCADE'), primary_key=True), 
+    db.Column('universe_id', db.Integer, db.ForeignKey('universes.universe_id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_character_universes_universe_id', 'universe_id', 'character_id'))
 
 
 character_notes = db.Table('character_notes', 
-db.Column('character_id', db.Integer, db.ForeignKey('characters.character_id'), primary_key=True),
-db.Column('note_id', db.Integer, db.ForeignKey('notes.note_id'), primary_key = True))
+db.Column('character_id', db.Integer, db.ForeignKey('characters.character_id', ondelete='CASCADE'), primary_key=True),
+db.Column('note_id', db.Integer, db.ForeignKey('notes.note_id', ondelete='CASCADE'), primary_key = True),
+db.Index('ix_character_notes_note_id', 'note_id', 'character_id'))
 
 
 note_universes = db.Table('note_universes',
-db.Column('note_id', db.Integer, db.ForeignKey('notes.note_id'), primary_key=True),
-db.Column('universe_id', db.Integer, db.ForeignKey('universes.universe_id'), primary_key=True))
+db.Column('note_id', db.Integer, db.ForeignKey('notes.note_id', ondelete='CASCADE'), primary_key=True),
+db.Column('universe_id', db.Integer, db.ForeignKey('universes.universe_id', ondelete='CASCADE'), primary_key=True),
+db.Index('ix_note_universes_universe_id', 'universe_id', 'note_id'))
 
 character_locations = db.Table('character_locations',
-db.Column('character_id', db.Integer, db.ForeignKey('characters.character_id'), primary_key=True),
-db.Column('location_id', db.Integer, db.ForeignKey('locations.location_id'), primary_key=True))
+db.Column('character_id', db.Integer, db.ForeignKey('characters.character_id', ondelete='CASCADE'), primary_key=True),
+db.Column('location_id', db.Integer, db.ForeignKey('locations.location_id', ondelete='CASCADE'), primary_key=True),
+db.Index('ix_character_locations_location_id', 'location_id', 'character_id'))
 
 location_notes = db.Table('location_notes',
-db.Column('location_id', db.Integer, db.ForeignKey('locations.location_id'), primary_key=True),
-db.Column('note_id', db.Integer, db.ForeignKey('notes.note_id'), primary_key=True))
\ No newline at end of file
+db.Column('location_id', db.Integer, db.ForeignKey('locations.location_id', ondelete='CASCADE'), primary_key=True),
+db.Column('note_id', db.Integer, db.ForeignKey('notes.note_id', ondelete='CASCADE'), primary_key=True),
+db.Index('ix_location_notes_note_id', 'note_id', 'location_id'))
+
+# Closure of the location hierarchy: one row per (ancestor, descendant) pair at any
+# distance, excluding a location's pair with itself, so root locations have no rows.
+# The primary key finds a location's descendants, the index its ancestors.
+location_closure = db.Table('location_closure',
+db.Column('ancestor_id', db.Integer, db.ForeignKey('locations.location_id', ondelete='CASCADE'), primary_key=True),
+db.Column('descendant_id', db.Integer, db.ForeignKey('locations.location_id', ondelete='CASCADE'), primary_key=True),
+db.Column('depth', db.Integer, nullable=False),
+db.Index('ix_location_closure_descendant_id', 'descendant_id', 'depth', 'ancestor_id'))
@@ -1,14 +1,20 @@
 from config import db
 from sqlalchemy.orm import mapped_column, Mapped, relationship, validates
-from sqlalchemy import ForeignKey, String, JSON
+from sqlalchemy import ForeignKey, String, JSON, Index
+from serialization import row_serializer
 from datetime import datetime
+from functools import cache
 from typing import List
 
 class Character(db.Model):
     __tablename__ = 'characters'
+    __table_args__ = (
+        Index('ix_characters_user_id_created_at', 'user_id', 'created_at', 'character_id'),
+        Index('ix_characters_user_id_updated_at', 'user_id', 'updated_at'),
+    )
 
     character_id: Mapped[int] = mapped_column(primary_key = True)
-    user_id: Mapped[int] = mapped_column(ForeignKey('users.user_id'), nullable = False)
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.user_id', ondelete='CASCADE'), nullable = False)
     name: Mapped[str] = mapped_column('name', String(100), nullable = False)
     age: Mapped[int] = mapped_column(nullable = True)
     origin: Mapped[str] = mapped_column(String(200), nullable = True)
@@ -16,11 +22,13 @@ class Character(db.Model):
     secondary_power_set: Mapped[str] = mapped_column(String(100), nullable = False, unique = True)
     skills: Mapped[List[str]] = mapped_column(JSON, nullable = False, default = 'list')
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    version: Mapped[int] = mapped_column(default=1, nullable=False)
 
-    universes: Mapped[List['Universe']] = relationship(secondary = 'character_universes', back_populates = 'characters')
+    universes: Mapped[List['Universe']] = relationship(secondary = 'character_universes', back_populates = 'characters', passive_deletes = True)
     creator: Mapped['User'] = relationship(back_populates = 'created_characters')
-    notes: Mapped[List['Note']] = relationship(secondary = 'character_notes', back_populates = 'characters')
-    locations: Mapped[List['Location']] = relationship(secondary = 'character_locations', back_populates = 'characters')
+    notes: Mapped[List['Note']] = relationship(secondary = 'character_notes', back_populates = 'characters', passive_deletes = True)
+    locations: Mapped[List['Location']] = relationship(secondary = 'character_locations', back_populates = 'characters', passive_deletes = True)
 
 
     @validates('skills', 'name', 'main_power_set', 'secondary_power_set', 'user_id')
@@ -58,16 +66,36 @@ class Character(db.Model):
 
 
 
-    def to_dict(self, summary = True):
-        data = {
-        'character_id': self.character_id,
-        'user_id': self.user_id,
-        'name': self.name,
-        'age': self.age,
-        'main_power_set': self.main_power_set,
-        'created_at': self.created_at.isoformat()
+    @classmethod
+    def summary_columns(cls):
+        """Columns read by summary_from_row, for projection queries that skip the ORM."""
+        return (cls.character_id, cls.user_id, cls.name, cls.age, cls.main_power_set, cls.created_at)
+
+    @classmethod
+    @cache
+    def summary_serializer(cls):
+        """Bulk equivalent of summary_from_row; leaves created_at for the JSON provider."""
+        return row_serializer(cls.summary_columns())
+
+    @classmethod
+    def detail_options(cls):
+        """Eager loads for the detail route; its to_dict() summary reads no relationships."""
+        return ()
+
+    @staticmethod
+    def summary_from_row(row):
+        return {
+        'character_id': row.character_id,
+        'user_id': row.user_id,
+        'name': row.name,
+        'age': row.age,
+        'main_power_set': row.main_power_set,
+        'created_at': row.created_at.isoformat()
         }
 
+    def to_dict(self, summary = True):
+        data = Character.summary_from_row(self)
+
         if not summary:
             data['origin'] = self.origin
             data['secondary_power_set'] = self.secondary_power_set
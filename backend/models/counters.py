@@ -0,0 +1,180 @@
+from collections import Counter, defaultdict
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+from .associations import character_universes, note_universes
+from .users import User
+from .universes import Universe
+from .characters import Character
+from .notes import Note
+from .locations import Location
+
+# Denormalized counts, kept in the same transaction as the change that moves them.
+# ORM inserts, deletes and collection edits are counted by the flush hooks below;
+# Core statements that bypass the ORM report themselves through count_records(),
+# count_links() and uncount_links(). recount_counters() rebuilds them from scratch.
+USER_COUNTERS = {
+    Universe: 'universe_count',
+    Character: 'character_count',
+    Note: 'note_count',
+    Location: 'location_count',
+}
+# Association tables counted on their universe side: table name -> (other id column, universe counter).
+UNIVERSE_LINK_COUNTERS = {
+    character_universes.name: ('character_id', 'character_count'),
+    note_universes.name: ('note_id', 'note_count'),
+}
+# ORM collections that write those tables: (class, attribute, table).
+UNIVERSE_LINK_COLLECTIONS = (
+    (Character, 'universes', character_universes),
+    (Note, 'universes', note_universes),
+    (Universe, 'characters', character_universes),
+    (Universe, 'notes', note_universes),
+)
+
+
+def _apply(session, model, deltas):
+    """
+    Adds `deltas` ({(id, counter): n}) in SQL, one UPDATE per distinct (counter, n),
+    so a batch touching many rows by the same amount is still one statement.
+    """
+    table = model.__table__
+    key = table.c[model.__mapper__.primary_key[0].name]
+    groups = defaultdict(list)
+    for (row_id, counter), n in deltas.items():
+        if n and row_id is not None:
+            groups[counter, n].append(row_id)
+    for (counter, n), ids in groups.items():
+        session.connection().execute(
+            update(table).where(key.in_(ids)).values({counter: table.c[counter] + n})
+        )
+
+
+def count_records(session, model, rows, sign=1):
+    """For records inserted (or, with sign=-1, deleted) through Core; `rows` are the column dicts."""
+    users, universes = Counter(), Counter()
+    for row in rows:
+        users[row['user_id'], USER_COUNTERS[model]] += sign
+        if model is Location:
+            universes[row['universe_id'], 'location_count'] += sign
+    _apply(session, User, users)
+    _apply(session, Universe, universes)
+
+
+def count_links(session, table, rows, sign=1):
+    """For association rows inserted (or, with sign=-1, deleted) through Core; other tables are ignored."""
+    if table.name not in UNIVERSE_LINK_COUNTERS:
+        return
+    counter = UNIVERSE_LINK_COUNTERS[table.name][1]
+    universes = Counter()
+    for row in rows:
+        universes[row['universe_id'], counter] += sign
+    _apply(session, Universe, universes)
+
+
+def uncount_links(session, table, whereclause):
+    """Call before a Core DELETE of the association rows matching `whereclause`; other tables are ignored."""
+    if table.name not in UNIVERSE_LINK_COUNTERS:
+        return
+    counter = UNIVERSE_LINK_COUNTERS[table.name][1]
+    universes = Universe.__table__
+    removed = select(func.count()).select_from(table).where(
+        whereclause, table.c.universe_id == universes.c.universe_id
+    ).scalar_subquery()
+    session.connection().execute(
+        update(universes).where(universes.c.universe_id.in_(select(table.c.universe_id).where(whereclause)))
+        .values({counter: universes.c[counter] - removed})
+    )
+
+
+def recount_counters(connection, user_ids=None):
+    """Recomputes every counter (or those of `user_ids` and their universes) with two set-based UPDATEs."""
+    users, universes, locations = User.__table__, Universe.__table__, Location.__table__
+
+    def counted(table, column, key):
+        return select(func.count()).select_from(table).where(table.c[column] == key).scalar_subquery()
+
+    universe_update = update(universes).values(
+        character_count=counted(character_universes, 'universe_id', universes.c.universe_id),
+        note_count=counted(note_universes, 'universe_id', universes.c.universe_id),
+        location_count=counted(locations, 'universe_id', universes.c.universe_id),
+    )
+    user_update = update(users).values({
+        counter: counted(model.__table__, 'user_id', users.c.user_id) for model, counter in USER_COUNTERS.items()
+    })
+    if user_ids is not None:
+        universe_update = universe_update.where(universes.c.user_id.in_(user_ids))
+        user_update = user_update.where(users.c.user_id.in_(user_ids))
+    connection.execute(universe_update)
+    connection.execute(user_update)
+
+
+@event.listens_for(Session, 'before_flush')
+def uncount_deleted_records(session, flush_context, instances):
+    # Runs before the flush: the rows, and the links the database will cascade away, are still there.
+    deleted = [obj for obj in session.deleted if isinstance(obj, (User, *USER_COUNTERS))]
+    if not deleted:
+        return
+    gone_users = {obj.user_id for obj in deleted if isinstance(obj, User)}
+    gone_universes = {obj.universe_id for obj in deleted if isinstance(obj, Universe)}
+    users, universes = Counter(), Counter()
+    unlinked = defaultdict(list)
+    for obj in deleted:
+        if isinstance(obj, User) or obj.user_id in gone_users:
+            continue
+        if isinstance(obj, Location) and obj.universe_id in gone_universes:
+            # Counted with its universe's location_count below.
+            continue
+        users[obj.user_id, USER_COUNTERS[type(obj)]] -= 1
+        if isinstance(obj, Location):
+            universes[obj.universe_id, 'location_count'] -= 1
+        elif isinstance(obj, Character):
+            unlinked[character_universes].append(obj.character_id)
+        elif isinstance(obj, Note):
+            unlinked[note_universes].append(obj.note_id)
+
+    for table, ids in unlinked.items():
+        uncount_links(session, table, table.c[UNIVERSE_LINK_COUNTERS[table.name][0]].in_(ids))
+    owners = {obj.user_id for obj in deleted if isinstance(obj, Universe) and obj.user_id not in gone_users}
+    if owners:
+        # A deleted universe takes its locations with it in the database.
+        user_table, universe_table = User.__table__, Universe.__table__
+        cascaded = select(func.coalesce(func.sum(universe_table.c.location_count), 0)).where(
+            universe_table.c.universe_id.in_(gone_universes), universe_table.c.user_id == user_table.c.user_id
+        ).scalar_subquery()
+        session.connection().execute(
+            update(user_table).where(user_table.c.user_id.in_(owners))
+            .values(location_count=user_table.c.location_count - cascaded)
+        )
+    _apply(session, User, users)
+    _apply(session, Universe, universes)
+
+
+@event.listens_for(Session, 'after_flush')
+def count_flushed_records(session, flush_context):
+    # Ids are assigned by now, and attribute history still describes what was just flushed.
+    users, universes = Counter(), Counter()
+    links = set()
+    for obj in session.new:
+        if type(obj) in USER_COUNTERS:
+            users[obj.user_id, USER_COUNTERS[type(obj)]] += 1
+    for obj in (*session.new, *session.dirty):
+        if isinstance(obj, Location):
+            history = inspect(obj).attrs.universe_id.history
+            for universe_id in history.added:
+                universes[universe_id, 'location_count'] += 1
+            for universe_id in history.deleted:
+                universes[universe_id, 'location_count'] -= 1
+        for cls, attribute, table in UNIVERSE_LINK_COLLECTIONS:
+            if not isinstance(obj, cls):
+                continue
+            history = inspect(obj).attrs[attribute].history
+            for sign, others in ((1, history.added), (-1, history.deleted)):
+                for other in others:
+                    universe, member = (obj, other) if cls is Universe else (other, obj)
+                    member_id = getattr(member, UNIVERSE_LINK_COUNTERS[table.name][0])
+                    # Both ends of a back-populated collection report the same link; the set keeps one.
+                    links.add((table.name, member_id, universe.universe_id, sign))
+    for table_name, _, universe_id, sign in links:
+        universes[universe_id, UNIVERSE_LINK_COUNTERS[table_name][1]] += sign
+    _apply(session, User, users)
+    _apply(session, Universe, universes)
@@ -34,4 +34,17 @@ class LocationType(enum.Enum):
             return 'Regional'
         if self in {self.CITY, self.TOWN, self.VILLAGE}:
             return 'Settlement'
-        return 'Granular'
\ No newline at end of file
+        return 'Granular'
+
+    @property
+    def rank(self):
+        """Scale, from 0 (largest) up; a location's type must rank above its parent's."""
+        return LOCATION_TYPE_RANKS[self]
+
+
+LOCATION_TYPE_RANKS = {
+    LocationType.GALAXY: 0, LocationType.SYSTEM: 1, LocationType.PLANET: 2,
+    LocationType.CONTINENT: 3, LocationType.KINGDOM: 4, LocationType.STATE: 5,
+    LocationType.CITY: 6, LocationType.TOWN: 6, LocationType.VILLAGE: 6,
+    LocationType.STREET: 7, LocationType.BUILDING: 8, LocationType.LANDMARK: 8, LocationType.ROOM: 9,
+}
@@ -0,0 +1,31 @@
+from config import db
+from sqlalchemy import String, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+
+class ImportCheckpoint(db.Model):
+    """Progress of a streaming universe import, committed after every chunk so it can be resumed."""
+    __tablename__ = 'import_checkpoints'
+
+    import_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False, index=True)
+    lines_processed: Mapped[int] = mapped_column(default=0, nullable=False)
+    status: Mapped[str] = mapped_column(String(20), default='running', nullable=False)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'import_id': self.import_id,
+            'lines_processed': self.lines_processed,
+            'status': self.status
+        }
+
+
+# Old archive id -> newly inserted id, per import and record type.
+import_id_map = db.Table('import_id_map',
+db.Column('import_id', db.String(36), db.ForeignKey('import_checkpoints.import_id', ondelete='CASCADE'), primary_key=True),
+db.Column('record_type', db.String(20), primary_key=True),
+db.Column('old_id', db.Integer, primary_key=True),
+db.Column('new_id', db.Integer, nullable=False))
@@ -0,0 +1,53 @@
+from config import db
+from sqlalchemy import String, Text, JSON, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+
+JOB_STATUSES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+JOB_FINISHED_STATUSES = ('succeeded', 'failed', 'cancelled')
+
+
+class Job(db.Model):
+    """A unit of background work; the table is the queue (see jobs.JobRunner)."""
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        Index('ix_jobs_status_run_after', 'status', 'run_after'),
+        Index('ix_jobs_user_id_created_at', 'user_id', 'created_at'),
+    )
+
+    job_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    # Kept (owner cleared) when the account goes, so an account deletion job can still finish.
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.user_id', ondelete='SET NULL'), nullable=True)
+    kind: Mapped[str] = mapped_column(String(50), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), default='queued', nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    result: Mapped[dict] = mapped_column(JSON, nullable=True)
+    error: Mapped[str] = mapped_column(Text, nullable=True)
+    progress: Mapped[int] = mapped_column(default=0, nullable=False)
+    total: Mapped[int] = mapped_column(nullable=True)
+    attempts: Mapped[int] = mapped_column(default=0, nullable=False)
+    max_attempts: Mapped[int] = mapped_column(default=3, nullable=False)
+    cancel_requested: Mapped[bool] = mapped_column(default=False, nullable=False)
+    worker: Mapped[str] = mapped_column(String(100), nullable=True)
+    run_after: Mapped[datetime] = mapped_column(default=datetime.utcnow, nullable=False)
+    heartbeat_at: Mapped[datetime] = mapped_column(nullable=True)
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow, nullable=False)
+    started_at: Mapped[datetime] = mapped_column(nullable=True)
+    finished_at: Mapped[datetime] = mapped_column(nullable=True)
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'total': self.total,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'cancel_requested': self.cancel_requested,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
@@ -1,23 +1,36 @@
 from config import db
-from sqlalchemy.orm import mapped_column, Mapped, relationship, validates
-from sqlalchemy import ForeignKey, String
+from sqlalchemy.orm import mapped_column, Mapped, relationship, validates, joinedload
+from sqlalchemy import ForeignKey, String, Index
 from . import LocationType
+from .associations import location_closure
+from serialization import row_serializer
 from datetime import datetime
+from functools import cache
 from typing import List
 
 class Location (db.Model):
     __tablename__= 'locations'
+    __table_args__ = (
+        Index('ix_locations_universe_id_created_at', 'universe_id', 'user_id', 'created_at', 'location_id'),
+        Index('ix_locations_user_id', 'user_id'),
+        Index('ix_locations_user_id_updated_at', 'user_id', 'updated_at'),
+        Index('ix_locations_parent_id', 'parent_id'),
+    )
 
     location_id : Mapped[int] = mapped_column(primary_key=True)
-    universe_id: Mapped[int] = mapped_column(ForeignKey('universes.universe_id'), nullable=False)
-    user_id : Mapped[int] = mapped_column(ForeignKey('users.user_id'), nullable=False)
+    universe_id: Mapped[int] = mapped_column(ForeignKey('universes.universe_id', ondelete='CASCADE'), nullable=False)
+    user_id : Mapped[int] = mapped_column(ForeignKey('users.user_id', ondelete='CASCADE'), nullable=False)
+    # Enclosing location, e.g. a city's planet; maintained together with location_closure.
+    parent_id: Mapped[int] = mapped_column(ForeignKey('locations.location_id', ondelete='CASCADE'), nullable=True)
     name: Mapped[str] = mapped_column(String(150), nullable=False)
     location_type: Mapped[LocationType] = mapped_column(db.Enum(LocationType), default = LocationType.CITY, nullable=False)
     description: Mapped[str] = mapped_column(String(500), nullable = True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    version: Mapped[int] = mapped_column(default=1, nullable=False)
 
-    characters: Mapped[List['Character']] = relationship(secondary='character_locations', back_populates='locations')
-    notes: Mapped[List['Note']] = relationship(secondary='location_notes', back_populates='locations')
+    characters: Mapped[List['Character']] = relationship(secondary='character_locations', back_populates='locations', passive_deletes=True)
+    notes: Mapped[List['Note']] = relationship(secondary='location_notes', back_populates='locations', passive_deletes=True)
     creator: Mapped['User'] = relationship(back_populates='locations')
     universe: Mapped['Universe'] = relationship(back_populates='locations')
 
@@ -41,13 +54,46 @@ class Location (db.Model):
                 )
         return location_type
 
-    def to_dict(self, summary=True):
-        data = {
-            'location_id': self.location_id,
-            'name': self.name,
-            'location_type': self.location_type.value,
-            'group': self.location_type.grouping
+    @classmethod
+    def summary_columns(cls):
+        """Columns read by summary_from_row, for projection queries that skip the ORM."""
+        return (cls.location_id, cls.name, cls.location_type, cls.parent_id, cls.created_at)
+
+    @classmethod
+    @cache
+    def summary_serializer(cls):
+        """Bulk equivalent of summary_from_row; location_type is encoded by the JSON provider."""
+        return row_serializer(cls.summary_columns(), (
+            'location_id', 'name', 'location_type',
+            ('group', 'location_type', {t: t.grouping for t in LocationType}), 'parent_id'
+        ))
+
+    @classmethod
+    @cache
+    def hierarchy_serializer(cls):
+        """summary_serializer plus the closure depth, for ancestor and descendant listings."""
+        return row_serializer((*cls.summary_columns(), location_closure.c.depth), (
+            'location_id', 'name', 'location_type',
+            ('group', 'location_type', {t: t.grouping for t in LocationType}), 'parent_id', 'depth'
+        ))
+
+    @classmethod
+    def detail_options(cls):
+        """Eager loads for to_dict(summary=False)."""
+        return (joinedload(cls.universe),)
+
+    @staticmethod
+    def summary_from_row(row):
+        return {
+            'location_id': row.location_id,
+            'name': row.name,
+            'location_type': row.location_type.value,
+            'group': row.location_type.grouping,
+            'parent_id': row.parent_id
         }
+
+    def to_dict(self, summary=True):
+        data = Location.summary_from_row(self)
         if not summary:
             data['description'] = self.description
             data['universe_name'] = self.universe.name
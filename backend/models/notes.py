@@ -1,23 +1,31 @@
 from config import db
 from . import character_notes
-from sqlalchemy.orm import mapped_column, relationship, validates, Mapped
-from sqlalchemy import String, Text, ForeignKey
+from sqlalchemy.orm import mapped_column, relationship, validates, Mapped, joinedload, selectinload
+from sqlalchemy import String, Text, ForeignKey, Index
+from serialization import row_serializer
 from datetime import datetime
+from functools import cache
 from typing import List
 
 class Note(db.Model):
     __tablename__ = 'notes'
+    __table_args__ = (
+        Index('ix_notes_user_id_created_at', 'user_id', 'created_at', 'note_id'),
+        Index('ix_notes_user_id_updated_at', 'user_id', 'updated_at'),
+    )
 
     note_id: Mapped[int] = mapped_column(primary_key = True)
     title: Mapped[str] = mapped_column(String(100), nullable = False)
     content: Mapped[str] = mapped_column(Text, nullable = True)
-    user_id: Mapped[int] = mapped_column(ForeignKey('users.user_id'), nullable = False)
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.user_id', ondelete='CASCADE'), nullable = False)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    version: Mapped[int] = mapped_column(default=1, nullable=False)
 
-    characters: Mapped[List['Character']] = relationship(secondary = 'character_notes', back_populates = 'notes')
-    universes:Mapped[List['Universe']] = relationship(secondary = 'note_universes', back_populates = 'notes')
+    characters: Mapped[List['Character']] = relationship(secondary = 'character_notes', back_populates = 'notes', passive_deletes = True)
+    universes:Mapped[List['Universe']] = relationship(secondary = 'note_universes', back_populates = 'notes', passive_deletes = True)
     creator: Mapped['User'] = relationship(back_populates = 'notes')
-    locations: Mapped[List['Location']]  = relationship(secondary='location_notes', back_populates = 'notes')
+    locations: Mapped[List['Location']]  = relationship(secondary='location_notes', back_populates = 'notes', passive_deletes = True)
 
 
 
@@ -35,16 +43,41 @@ class Note(db.Model):
         return value.strip().capitalize()
 
 
-    def to_dict(self, summary = True):
-        data = {
-            'note_id': self.note_id,
-            'title': self.title,
-            'user_id': self.user_id,
-            'created_at': self.created_at,
-            'characters': [{'id': c .character_id, 'name': c.name} for c in self.characters],
-            'universes': [{'id': u.universe_id,'name': u.name } for u in self.universes]
+    @classmethod
+    def summary_columns(cls):
+        """Columns read by summary_from_row, for projection queries that skip the ORM."""
+        return (cls.note_id, cls.title, cls.user_id, cls.created_at)
+
+    @classmethod
+    @cache
+    def summary_serializer(cls):
+        """Bulk equivalent of summary_from_row, without the linked characters and universes."""
+        return row_serializer(cls.summary_columns())
+
+    @classmethod
+    def detail_options(cls):
+        """Eager loads for to_dict(summary=False): one join and one IN query, whatever the link counts."""
+        return (joinedload(cls.characters), selectinload(cls.universes))
+
+    @staticmethod
+    def summary_from_row(row, characters, universes):
+        """'characters' and 'universes' are already shaped as [{'id', 'name'}]."""
+        return {
+            'note_id': row.note_id,
+            'title': row.title,
+            'user_id': row.user_id,
+            'created_at': row.created_at,
+            'characters': characters,
+            'universes': universes
         }
 
+    def to_dict(self, summary = True):
+        data = Note.summary_from_row(
+            self,
+            [{'id': c .character_id, 'name': c.name} for c in self.characters],
+            [{'id': u.universe_id,'name': u.name } for u in self.universes]
+        )
+
         if not summary:
                 data['content'] = self.content
         return data
@@ -0,0 +1,92 @@
+from sqlalchemy import event
+from config import db
+
+# SQLite FTS5 index over notes, characters, locations and universes.
+# Each entity gets one row whose rowid encodes it: rowid = entity_id * SEARCH_KIND_COUNT + kind code,
+# so triggers update and delete by rowid instead of scanning the index.
+# The owner is indexed as a 'u<user_id>' token so scoping to a user happens inside the full-text match.
+SEARCH_KINDS = {'note': 0, 'character': 1, 'location': 2, 'universe': 3}
+SEARCH_KIND_COUNT = 4
+
+# kind: (table, id column, title expression, body expression); '{row}' is new/old inside triggers.
+SEARCH_SOURCES = {
+    'note': ('notes', 'note_id', "{row}.title", "coalesce({row}.content, '')"),
+    'character': (
+        'characters', 'character_id', "{row}.name",
+        "coalesce({row}.origin, '') || ' ' || {row}.main_power_set || ' ' || "
+        "{row}.secondary_power_set || ' ' || coalesce({row}.skills, '')"
+    ),
+    'location': ('locations', 'location_id', "{row}.name", "coalesce({row}.description, '')"),
+    'universe': ('universes', 'universe_id', "{row}.name", "coalesce({row}.description, '')"),
+}
+
+# Columns the title/body expressions read. The update triggers fire only when one of these or
+# user_id changes, so version, timestamp and counter bumps do not rewrite the index row.
+SEARCH_COLUMNS = {
+    'note': ('title', 'content'),
+    'character': ('name', 'origin', 'main_power_set', 'secondary_power_set', 'skills'),
+    'location': ('name', 'description'),
+    'universe': ('name', 'description'),
+}
+
+
+def _rowid(kind, row):
+    table, id_column, _, _ = SEARCH_SOURCES[kind]
+    return f'{row}.{id_column} * {SEARCH_KIND_COUNT} + {SEARCH_KINDS[kind]}'
+
+
+def search_index_ddl():
+    statements = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index "
+        "USING fts5(title, body, owner, tokenize = 'porter unicode61')"
+    ]
+    for kind, (table, _, title, body) in SEARCH_SOURCES.items():
+        values = (
+            f"{_rowid(kind, 'new')}, {title.format(row='new')}, "
+            f"{body.format(row='new')}, 'u' || new.user_id"
+        )
+        columns = ', '.join(SEARCH_COLUMNS[kind] + ('user_id',))
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO search_index(rowid, title, body, owner) VALUES ({values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE OF {columns} ON {table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = {_rowid(kind, 'old')}; "
+            f"INSERT INTO search_index(rowid, title, body, owner) VALUES ({values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM search_index WHERE rowid = {_rowid(kind, 'old')}; END",
+        ]
+    return statements
+
+
+def search_index_rebuild_sql():
+    """Statements that repopulate the index from the source tables, e.g. for a pre-existing database."""
+    statements = ['DELETE FROM search_index']
+    for kind, (table, _, title, body) in SEARCH_SOURCES.items():
+        statements.append(
+            f"INSERT INTO search_index(rowid, title, body, owner) "
+            f"SELECT {_rowid(kind, table)}, {title.format(row=table)}, {body.format(row=table)}, "
+            f"'u' || {table}.user_id FROM {table}"
+        )
+    return statements
+
+
+def search_trigger_drop_sql():
+    """Statements that remove the sync triggers; search_index_ddl() puts them back."""
+    return [
+        f'DROP TRIGGER IF EXISTS {table}_search_{action}'
+        for table, _, _, _ in SEARCH_SOURCES.values() for action in ('insert', 'update', 'delete')
+    ]
+
+
+@event.listens_for(db.metadata, 'after_create')
+def create_search_index(target, connection, **kw):
+    if connection.dialect.name != 'sqlite':
+        return
+    for statement in search_index_ddl():
+        connection.exec_driver_sql(statement)
+
+
+@event.listens_for(db.metadata, 'after_drop')
+def drop_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.exec_driver_sql('DROP TABLE IF EXISTS search_index')
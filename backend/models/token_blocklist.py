@@ -8,4 +8,5 @@ class TokenBlocklist(db.Model):
     
     id: Mapped[int] = mapped_column(primary_key=True)
     jti: Mapped[str] = mapped_column(String(36), nullable = False, index = True)
-    created_at: Mapped[datetime] = mapped_column(nullable = False)
\ No newline at end of file
+    created_at: Mapped[datetime] = mapped_column(nullable = False, index = True)
+    expires_at: Mapped[datetime] = mapped_column(nullable = False, index = True)
\ No newline at end of file
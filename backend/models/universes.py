@@ -1,26 +1,38 @@
 from . import AlignmentType, character_universes
 from config import db
+from serialization import row_serializer
 from datetime import datetime
+from functools import cache
 from sqlalchemy.orm import relationship, mapped_column, Mapped, validates
-from sqlalchemy import String, ForeignKey
+from sqlalchemy import String, ForeignKey, Index
 from typing import List
 
 
 class Universe(db.Model):
     __tablename__ = 'universes'
+    __table_args__ = (
+        Index('ix_universes_user_id_created_at', 'user_id', 'created_at', 'universe_id'),
+        Index('ix_universes_user_id_updated_at', 'user_id', 'updated_at'),
+    )
 
     universe_id: Mapped[int] = mapped_column(primary_key=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey('users.user_id'), nullable = False) 
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.user_id', ondelete='CASCADE'), nullable = False) 
     name: Mapped[str] = mapped_column('name',String(100), nullable=False)
     description: Mapped[str] = mapped_column(String(300), nullable=True)
     alignment: Mapped[AlignmentType] = mapped_column(db.Enum(AlignmentType), default=AlignmentType.NEUTRAL, nullable=False )
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    version: Mapped[int] = mapped_column(default=1, nullable=False)
+    # Maintained by models/counters.py; `flask recount-counters` rebuilds them.
+    character_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    note_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    location_count: Mapped[int] = mapped_column(default=0, nullable=False)
 
 
     creator: Mapped['User'] = relationship(back_populates='owned_universes')
-    characters: Mapped[List['Character']] = relationship(secondary = 'character_universes', back_populates='universes')
-    notes: Mapped[List['Note']] = relationship(secondary = 'note_universes', back_populates='universes')
-    locations: Mapped[List['Location']] = relationship(back_populates='universe', cascade= 'all, delete-orphan' )
+    characters: Mapped[List['Character']] = relationship(secondary = 'character_universes', back_populates='universes', passive_deletes=True)
+    notes: Mapped[List['Note']] = relationship(secondary = 'note_universes', back_populates='universes', passive_deletes=True)
+    locations: Mapped[List['Location']] = relationship(back_populates='universe', cascade='all, delete-orphan', passive_deletes=True)
     
     @validates('name')
     def validate_name(self, key, value):
@@ -35,16 +47,52 @@ class Universe(db.Model):
             raise ValueError('Each word in the universe name must be less than 20 characters')
         return value.strip().upper()
 
+    @validates('alignment')
+    def validate_alignment(self, key, alignment):
+        if isinstance(alignment, str):
+            try:
+                return AlignmentType[alignment.upper()]
+            except KeyError:
+                raise ValueError(f'Invalid alignment: {alignment}')
+        return alignment
 
 
-    def to_dict(self, summary = True):
-        data = {
-            'universe_id': self.universe_id,
-            'name': self.name,
-            'alignment': self.alignment.value if self.alignment else None,
-            'owner_id': self.user_id,
-            'created_at': self.created_at.isoformat()
+
+    @classmethod
+    def summary_columns(cls):
+        """Columns read by summary_from_row, for projection queries that skip the ORM."""
+        return (cls.universe_id, cls.name, cls.alignment, cls.user_id, cls.created_at,
+                cls.character_count, cls.note_count, cls.location_count)
+
+    @classmethod
+    @cache
+    def summary_serializer(cls):
+        """Bulk equivalent of summary_from_row; alignment and created_at are encoded by the JSON provider."""
+        return row_serializer(cls.summary_columns(), (
+            'universe_id', 'name', 'alignment', ('owner_id', 'user_id'), 'created_at',
+            'character_count', 'note_count', 'location_count'
+        ))
+
+    @classmethod
+    def detail_options(cls):
+        """Eager loads for the detail route; its to_dict() summary reads no relationships."""
+        return ()
+
+    @staticmethod
+    def summary_from_row(row):
+        return {
+            'universe_id': row.universe_id,
+            'name': row.name,
+            'alignment': row.alignment.value if row.alignment else None,
+            'owner_id': row.user_id,
+            'created_at': row.created_at.isoformat(),
+            'character_count': row.character_count,
+            'note_count': row.note_count,
+            'location_count': row.location_count
         }
+
+    def to_dict(self, summary = True):
+        data = Universe.summary_from_row(self)
         if not summary:
             data['description'] = self.description
             data['owner'] = self.creator.username if self.creator else None
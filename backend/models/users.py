@@ -2,13 +2,13 @@ from . import character_universes
 from config import db
 from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 from sqlalchemy import String
-from flask_bcrypt import generate_password_hash, check_password_hash, Bcrypt
 from flask_login import UserMixin
+from passwords import bcrypt, password_hasher
+from serialization import row_serializer
 from datetime import datetime
+from functools import cache
 from typing import List
 
-bcrypt = Bcrypt()
-
 
 class User(db.Model, UserMixin):
     __tablename__ = 'users'
@@ -21,11 +21,20 @@ class User(db.Model, UserMixin):
     password_hash: Mapped[str] = mapped_column(String(250), nullable=False)
     bio: Mapped[str] = mapped_column(String(500), nullable=True)
     created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    version: Mapped[int] = mapped_column(default=1, nullable=False)
+    # Bumped whenever anything the user owns changes; list and detail ETags are derived from it.
+    collection_version: Mapped[int] = mapped_column(default=1, nullable=False)
+    # Maintained by models/counters.py; `flask recount-counters` rebuilds them.
+    universe_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    character_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    note_count: Mapped[int] = mapped_column(default=0, nullable=False)
+    location_count: Mapped[int] = mapped_column(default=0, nullable=False)
 
-    owned_universes: Mapped[List['Universe']] = relationship(back_populates = 'creator', cascade = 'all, delete-orphan')
-    created_characters: Mapped[List['Character']] = relationship(back_populates = 'creator', cascade ='all, delete-orphan')
-    notes: Mapped[List['Note']] = relationship(back_populates = 'creator', cascade ='all, delete-orphan')
-    locations: Mapped[List['Location']] = relationship(back_populates = 'creator', cascade = 'all, delete-orphan')
+    owned_universes: Mapped[List['Universe']] = relationship(back_populates = 'creator', cascade = 'all, delete-orphan', passive_deletes = True)
+    created_characters: Mapped[List['Character']] = relationship(back_populates = 'creator', cascade = 'all, delete-orphan', passive_deletes = True)
+    notes: Mapped[List['Note']] = relationship(back_populates = 'creator', cascade = 'all, delete-orphan', passive_deletes = True)
+    locations: Mapped[List['Location']] = relationship(back_populates = 'creator', cascade = 'all, delete-orphan', passive_deletes = True)
     
 
     @property
@@ -34,10 +43,10 @@ class User(db.Model, UserMixin):
 
     @password.setter
     def password(self, plain_text_password):
-        self.password_hash = bcrypt.generate_password_hash(plain_text_password).decode('utf-8') 
+        self.password_hash = password_hasher.hash(plain_text_password)
     
     def check_password(self, plain_text_password):
-        return bcrypt.check_passwsord_hash(self.password_hash, plain_text_password)
+        return password_hasher.verify(self.password_hash, plain_text_password)
 
 
 
@@ -54,10 +63,22 @@ class User(db.Model, UserMixin):
         return value.strip().capitalize()
 
      
-    def to_dict(self, summary : bool = True) -> dict:
+    @classmethod
+    def summary_columns(cls):
+        """Columns of the to_dict() summary, for projection queries that skip the ORM."""
+        return (cls.user_id, cls.is_admin, cls.username, cls.email)
+
+    @classmethod
+    @cache
+    def summary_serializer(cls):
+        """Bulk equivalent of to_dict(summary=True)."""
+        return row_serializer(cls.summary_columns())
+
+    def to_dict(self, summary : bool = True, universes : list = None) -> dict:
         """        
          Transforms the User model into a dictionary for Json responses. 
          Flag 'summary' toggles between a light version and a full profile.
+         The full profile embeds `universes`, capped summaries from recent_universes_query().
         """
 
         data = {  
@@ -68,11 +89,14 @@ class User(db.Model, UserMixin):
         }
 
         if not summary:
-            data['name']= self.name,
+            data['name'] = self.name
             data['bio'] = self.bio
-            data['universes'] = [u.name for u in self.owned_universes] if self.owned_universes else []
-            data['owned_universe_ids'] = [u.universe_id for u in self.owned_universes] if self.owned_universes else []
-            data['universe_count'] = len(self.owned_universes),
+            data['universes'] = universes or []
+            # Counter columns (models/counters.py): no collection is loaded for a profile.
+            data['universe_count'] = self.universe_count
+            data['character_count'] = self.character_count
+            data['note_count'] = self.note_count
+            data['location_count'] = self.location_count
             data['created_at'] = self.created_at.isoformat()
         
         return data
@@ -0,0 +1,40 @@
+from datetime import datetime
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+from .users import User
+from .universes import Universe
+from .characters import Character
+from .notes import Note
+from .locations import Location
+
+# Models carrying version/updated_at; every one of them has a user_id owner (a User owns itself).
+VERSIONED_MODELS = (User, Universe, Character, Note, Location)
+
+
+def touch_collections(session, user_ids):
+    """Bumps the collection version of each user, invalidating the ETags of everything they own."""
+    user_ids = {uid for uid in user_ids if uid is not None}
+    if not user_ids:
+        return
+    users = User.__table__
+    session.connection().execute(
+        update(users).where(users.c.user_id.in_(user_ids)).values(collection_version=users.c.collection_version + 1)
+    )
+
+
+@event.listens_for(Session, 'before_flush')
+def bump_entity_versions(session, flush_context, instances):
+    now = datetime.utcnow()
+    for obj in session.dirty:
+        if isinstance(obj, VERSIONED_MODELS) and session.is_modified(obj):
+            # Incremented in SQL so the current value never has to be loaded.
+            obj.version = type(obj).version + 1
+            obj.updated_at = now
+
+
+@event.listens_for(Session, 'after_flush')
+def bump_collection_versions(session, flush_context):
+    # new/dirty/deleted still describe what was just flushed, and user_id is populated by now.
+    modified = [obj for obj in session.dirty if session.is_modified(obj)]
+    touched = [obj for obj in (*session.new, *modified, *session.deleted) if isinstance(obj, VERSIONED_MODELS)]
+    touch_collections(session, [obj.user_id for obj in touched])
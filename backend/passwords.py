@@ -0,0 +1,81 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from flask_bcrypt import Bcrypt
+from werkzeug.local import LocalProxy
+
+bcrypt = Bcrypt()
+
+
+class HashingBusyError(Exception):
+    """Raised when the hashing queue is full; callers should answer 503."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a bounded thread pool.
+
+    bcrypt releases the GIL while it works, so hashing on the pool keeps the
+    request threads responsive. `max_pending` caps queued + running jobs so a
+    login burst is shed with HashingBusyError instead of stalling the worker.
+    """
+
+    def __init__(self, rounds=12, max_workers=4, max_pending=64, timeout=30):
+        self._executor = None
+        self._lock = threading.Lock()
+        self.configure(rounds, max_workers, max_pending, timeout)
+
+    def configure(self, rounds, max_workers, max_pending, timeout=30):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self.rounds = rounds
+            self.max_workers = max_workers
+            self.timeout = timeout
+            self._slots = threading.BoundedSemaphore(max_pending)
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='password-hasher')
+
+    def hash(self, password):
+        return self._run(bcrypt.generate_password_hash, password, self.rounds).decode('utf-8')
+
+    def verify(self, password_hash, password):
+        return self._run(bcrypt.check_password_hash, password_hash, password)
+
+    async def hash_async(self, password):
+        """hash() for async callers: awaits the pool instead of blocking the event loop."""
+        password_hash = await self._run_async(bcrypt.generate_password_hash, password, self.rounds)
+        return password_hash.decode('utf-8')
+
+    async def verify_async(self, password_hash, password):
+        return await self._run_async(bcrypt.check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True when the stored hash was made with a different work factor than the current one."""
+        try:
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def _run(self, fn, *args):
+        return self._submit(fn, *args).result(timeout=self.timeout)
+
+    async def _run_async(self, fn, *args):
+        return await asyncio.wait_for(asyncio.wrap_future(self._submit(fn, *args)), self.timeout)
+
+    def _submit(self, fn, *args):
+        # configure() may swap in a new semaphore while this job runs; release the one acquired.
+        slots, executor = self._slots, self._executor
+        if not slots.acquire(blocking=False):
+            raise HashingBusyError('Too many password operations in progress.')
+        try:
+            future = executor.submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+
+# The app's hasher (create_app keeps one per app in app.extensions).
+password_hasher = LocalProxy(lambda: current_app.extensions['password_hasher'])
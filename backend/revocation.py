@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, delete
+from config import db
+from models import TokenBlocklist
+
+
+def _epoch(value):
+    """Blocklist datetimes are stored as UTC; SQLite hands them back naive."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class RevokedTokenIndex:
+    """
+    In-process index of revoked JTIs mapped to their expiry (epoch seconds).
+
+    Lookups are answered from memory. The token_blocklist table is re-read
+    incrementally (only rows created since the last sync) at most once every
+    `refresh_interval` seconds, so revocations made by other workers show up
+    within that window. Entries are dropped once the token would have expired
+    anyway, keeping the index the size of the live revoked set.
+    """
+
+    def __init__(self, refresh_interval=5, purge_interval=0, sync_margin=30):
+        self.refresh_interval = refresh_interval
+        self.purge_interval = purge_interval
+        # Re-read a little before the last sync so rows committed late are not skipped.
+        self.sync_margin = timedelta(seconds=sync_margin)
+        self._revoked = {}
+        self._synced_at = None
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+        self._purger_pid = None
+
+    def init_app(self, app):
+        app.extensions['revoked_tokens'] = self
+        self.refresh_interval = app.config['REVOKED_TOKEN_REFRESH_SECONDS']
+        self.purge_interval = app.config['REVOKED_TOKEN_PURGE_SECONDS']
+        if self.purge_interval > 0:
+            app.before_request(lambda: self.start_purger(app))
+
+    def is_revoked(self, jti):
+        if self.refresh_due:
+            self.refresh()
+        return jti in self
+
+    @property
+    def refresh_due(self):
+        return time.monotonic() >= self._next_refresh
+
+    def __contains__(self, jti):
+        """Memory-only lookup; async callers run refresh() off the event loop first."""
+        return jti in self._revoked
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._revoked[jti] = _epoch(expires_at)
+
+    def refresh(self):
+        with self._lock:
+            if time.monotonic() < self._next_refresh:
+                return
+            now = datetime.now(timezone.utc)
+            query = select(TokenBlocklist.jti, TokenBlocklist.expires_at).where(
+                TokenBlocklist.expires_at > now
+            )
+            if self._synced_at is not None:
+                query = query.where(TokenBlocklist.created_at >= self._synced_at - self.sync_margin)
+            # Always the primary: a lagging replica could let a revoked token through.
+            for jti, expires_at in db.session.execute(query, bind_arguments={'bind': db.engine}):
+                self._revoked[jti] = _epoch(expires_at)
+            self._drop_expired(now.timestamp())
+            self._synced_at = now
+            self._next_refresh = time.monotonic() + self.refresh_interval
+
+    def purge_expired(self):
+        """Deletes blocklist rows whose token has expired. Returns the number removed."""
+        now = datetime.now(timezone.utc)
+        result = db.session.execute(
+            delete(TokenBlocklist).where(TokenBlocklist.expires_at <= now)
+        )
+        db.session.commit()
+        with self._lock:
+            self._drop_expired(now.timestamp())
+        return result.rowcount
+
+    def start_purger(self, app):
+        """
+        Runs purge_expired every `purge_interval` seconds on a daemon thread. Like the
+        job workers it starts on the app's first request, once per process (again after a fork).
+        """
+        if self.purge_interval <= 0 or self._purger_pid == os.getpid():
+            return
+        with self._lock:
+            if self._purger_pid == os.getpid():
+                return
+            self._purger_pid = os.getpid()
+
+        def run():
+            while True:
+                time.sleep(self.purge_interval)
+                with app.app_context():
+                    try:
+                        self.purge_expired()
+                    except Exception as e:
+                        db.session.rollback()
+                        print(f'Error: {str(e)}')
+
+        threading.Thread(target=run, name='token-blocklist-purger', daemon=True).start()
+
+    def _drop_expired(self, now):
+        expired = [jti for jti, exp in self._revoked.items() if exp <= now]
+        for jti in expired:
+            del self._revoked[jti]
@@ -3,4 +3,8 @@ from .universe import universe_bp
 from .character import character_bp
 from .note import note_bp
 from .location import location_bp
-from .user import user_bp
\ No newline at end of file
+from .user import user_bp
+from .search import search_bp
+from .system import system_bp
+from .metrics import metrics_bp
+from .jobs import jobs_bp
@@ -1,11 +1,12 @@
-
+from flask import session, Blueprint, request, jsonify, current_app
 from flask import session, Blueprint, request, jsonify
 from datetime import datetime, timezone
 from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity, jwt_required
 from sqlalchemy import select
 from models import User, TokenBlocklist
 from config import db
-from utils import validate_auth_data, validate_login_data, authenticate_user, execute_user_creation
+from utils import validate_auth_data, validate_login_data, authenticate_user, execute_user_creation, revoked_tokens, recent_universe_summaries
+from passwords import HashingBusyError
 import time
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
@@ -37,6 +38,9 @@ def register():
     except  ValueError as e:
         db.session.rollback()
         return jsonify({f'Message:{e}'}), 400
+    except HashingBusyError as e:
+        db.session.rollback()
+        return jsonify({'Error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         print(f"DEBUG ERROR: {e}")
@@ -64,10 +68,15 @@ def login():
 
         return jsonify({
                 'access_token': access_token,
-                'user': user.to_dict(summary=False),
+                'user': user.to_dict(summary=False, universes=recent_universe_summaries(
+                    user.user_id, current_app.config['PROFILE_UNIVERSE_LIMIT']
+                )),
                 'message': 'User successfully logged in'
                 }), 200
 
+    except HashingBusyError as e:
+        db.session.rollback()
+        return jsonify({'Error': str(e)}), 503, {'Retry-After': '1'}
     except Exception as e:
         db.session.rollback()
         print(f'Error: {str(e)}')
@@ -94,13 +103,15 @@ def token_check():
 @jwt_required()
 def logout():
     try:
-        jti = get_jwt()["jti"]
+        token = get_jwt()
         blocked_token = TokenBlocklist(
-            jti = jti,
-            created_at = datetime.now(timezone.utc)
+            jti = token["jti"],
+            created_at = datetime.now(timezone.utc),
+            expires_at = datetime.fromtimestamp(token["exp"], timezone.utc)
         )
         db.session.add(blocked_token)
         db.session.commit()
+        revoked_tokens.add(blocked_token.jti, blocked_token.expires_at)
         return jsonify({
                     'Message': 'Logout Successful'
                 }), 200
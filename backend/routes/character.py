@@ -3,7 +3,7 @@ from flask_jwt_extended import jwt_required
 from models import Character,Universe
 from config import db
 from sqlalchemy import select
-from utils import get_current_user,add_notes_to_character, load_character_relationships,resource_owner_required,add_universes_to_character, characters_with_authorization, validate_character_data, execute_character_creation, execute_character_update, token_and_user_required, resource_owner_required
+from utils import get_current_user,add_notes_to_character,resource_owner_required,add_universes_to_character, character_summaries_with_authorization, validate_character_data, execute_character_creation, execute_character_update, token_and_user_required, resource_owner_required, get_pagination_args, bulk_request, collection_etag, item_etag
 
 
 character_bp = Blueprint('characters', __name__, url_prefix='/characters')
@@ -42,8 +42,15 @@ def create_character(user):
     
 @character_bp.route('/', methods=['GET'])
 @token_and_user_required
+@collection_etag
 def get_all_characters(user):
-    characters = characters_with_authorization(user)
+    try:
+        cursor, limit = get_pagination_args(request.args)
+    except ValueError as e:
+        return jsonify({
+            'Error': str(e)
+        }), 400
+    characters, next_cursor = character_summaries_with_authorization(user, cursor, limit)
     if not characters:
         return jsonify({
             'Message': 'No characters found.'
@@ -51,24 +58,19 @@ def get_all_characters(user):
     
     return jsonify({
         'Message': 'All characters have been found',
-        'Characters': [c.to_dict() for c in characters]
+        'Characters': characters,
+        'next_cursor': next_cursor
     }), 200
     
 
 @character_bp.route('/<int:character_id>')
 @token_and_user_required
-@resource_owner_required(Character)
+@item_etag(Character)
+@resource_owner_required(Character, detail=True)
 def get_character(user, character, *args, **kwargs):
-
-    character_with_relationships = load_character_relationships(user, character.character_id)
-    if not character_with_relationships:
-        return jsonify({
-            'Message': 'No Character found.'
-        }), 404
-
     return jsonify({
         'Message': f'Character with id of {character.character_id} has been found.',
-        'Character': character_with_relationships.to_dict()
+        'Character': character.to_dict()
     }), 200
 
 
@@ -124,3 +126,14 @@ def delete_character(user, character, *args, **kwargs):
         }), 500
 
 
+
+@character_bp.route('/bulk', methods=['POST'])
+@token_and_user_required
+def bulk_create_characters(user):
+    return bulk_request(user, 'characters', creating=True)
+
+
+@character_bp.route('/bulk', methods=['PATCH'])
+@token_and_user_required
+def bulk_update_characters(user):
+    return bulk_request(user, 'characters', creating=False)
@@ -0,0 +1,70 @@
+import os
+from flask import Blueprint, jsonify, current_app, send_file
+from models import Job
+from database import replica_router
+from jobs import job_runner
+from utils import token_and_user_required, resource_owner_required, user_jobs, export_file_name
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/jobs')
+
+
+@jobs_bp.before_request
+def read_from_primary():
+    # Progress is polled; a lagging replica would report it late.
+    replica_router.use_primary()
+
+
+@jobs_bp.route('', methods=['GET'])
+@token_and_user_required
+def get_jobs(user):
+    jobs = user_jobs(user, current_app.config['PAGE_SIZE_DEFAULT'])
+    return jsonify({
+        'Message': f'{len(jobs)} jobs found.',
+        'Jobs': [job.to_dict() for job in jobs]
+    }), 200
+
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+@token_and_user_required
+@resource_owner_required(Job)
+def get_job(user, job, *args, **kwargs):
+    return jsonify({
+        'Message': 'Job found.',
+        'Job': job.to_dict()
+    }), 200
+
+
+@jobs_bp.route('/<job_id>/cancel', methods=['POST'])
+@token_and_user_required
+@resource_owner_required(Job)
+def cancel_job(user, job, *args, **kwargs):
+    """Queued jobs are cancelled at once (200); running ones stop at their next checkpoint (202)."""
+    if not job_runner.cancel(job):
+        return jsonify({
+            'Error': f'Job already {job.status}.'
+        }), 409
+    return jsonify({
+        'Message': 'Job cancelled.' if job.status == 'cancelled' else 'Cancellation requested.',
+        'Job': job.to_dict()
+    }), 200 if job.status == 'cancelled' else 202
+
+
+@jobs_bp.route('/<job_id>/download', methods=['GET'])
+@token_and_user_required
+@resource_owner_required(Job)
+def download_job_file(user, job, *args, **kwargs):
+    """The archive written by a finished export job."""
+    if job.kind != 'export_universe' or job.status != 'succeeded':
+        return jsonify({
+            'Error': 'Job has no file to download.'
+        }), 409
+    compress = job.payload.get('compress')
+    path = job_runner.file_path(job.job_id, '.ndjson.gz' if compress else '.ndjson')
+    if not os.path.exists(path):
+        return jsonify({
+            'Error': 'The file is no longer available.'
+        }), 410
+    return send_file(
+        path, mimetype='application/gzip' if compress else 'application/x-ndjson',
+        as_attachment=True, download_name=export_file_name(job)
+    )
@@ -3,7 +3,7 @@ from flask import jsonify, Blueprint, request
 from flask_jwt_extended import jwt_required
 from models import Location
 from sqlalchemy import select
-from utils import get_current_user, validate_location_data, load_location_with_relationships, token_and_user_required, resource_owner_required, execute_location_creation, add_characters_to_location, add_notes_to_location, locations_with_authorization_in_universe, execute_location_update
+from utils import get_current_user, validate_location_data, token_and_user_required, resource_owner_required, execute_location_creation, add_characters_to_location, add_notes_to_location, location_summaries_with_authorization_in_universe, execute_location_update, get_pagination_args, bulk_request, collection_etag, item_etag, owner_collection_etag, remove_location_from_hierarchy, location_descendants, location_ancestors
 
 location_bp = Blueprint('locations', __name__)
 
@@ -37,31 +37,70 @@ def create_location(user,universe_id):
 
 @location_bp.route('/universes/<int:universe_id>/locations', methods=['GET'])
 @token_and_user_required
+@collection_etag
 def get_all_locations_for_universe(user, universe_id):
-    locations = locations_with_authorization_in_universe(user, universe_id)
+    try:
+        cursor, limit = get_pagination_args(request.args)
+    except ValueError as e:
+        return jsonify({
+            'Error': str(e)
+        }), 400
+    locations, next_cursor = location_summaries_with_authorization_in_universe(user, universe_id, cursor, limit)
     if not locations:
         return jsonify({
             'Message': 'No locations found.',
-            'Locations': []
+            'Locations': [],
+            'next_cursor': None
         }), 200
     return jsonify({
         'Message': 'Locations found.',
-        'Locations': [location.to_dict(summary=True) for location in locations]
+        'Locations': locations,
+        'next_cursor': next_cursor
     }), 200
 
 
 @location_bp.route('/locations/<int:location_id>', methods=['GET'])
 @token_and_user_required
-@resource_owner_required(Location)
+@item_etag(Location)
+@resource_owner_required(Location, detail=True)
 def get_location(user, location, *args, **kwargs):
-    location_with_relationships = load_location_with_relationships(user,location.location_id)
-    if not location_with_relationships:
-        return jsonify({
-            'Message': 'Location could not be found.'
-        }), 404
     return jsonify({
         'Message': 'Location found.',
-        'Location': location_with_relationships.to_dict(summary=False)
+        'Location': location.to_dict(summary=False)
+    }), 200
+
+@location_bp.route('/locations/<int:location_id>/descendants', methods=['GET'])
+@token_and_user_required
+@owner_collection_etag(Location)
+@resource_owner_required(Location)
+def get_location_descendants(user, location, *args, **kwargs):
+    try:
+        cursor, limit = get_pagination_args(request.args)
+        max_depth = request.args.get('depth')
+        if max_depth is not None:
+            if not max_depth.isdigit() or int(max_depth) < 1:
+                raise ValueError('Depth must be a positive integer.')
+            max_depth = int(max_depth)
+    except ValueError as e:
+        return jsonify({
+            'Error': str(e)
+        }), 400
+    locations, next_cursor = location_descendants(location.location_id, max_depth, cursor, limit)
+    return jsonify({
+        'Message': 'Locations found.' if locations else 'No locations found.',
+        'Locations': locations,
+        'next_cursor': next_cursor
+    }), 200
+
+@location_bp.route('/locations/<int:location_id>/ancestors', methods=['GET'])
+@token_and_user_required
+@owner_collection_etag(Location)
+@resource_owner_required(Location)
+def get_location_ancestors(user, location, *args, **kwargs):
+    locations = location_ancestors(location.location_id)
+    return jsonify({
+        'Message': 'Locations found.' if locations else 'No locations found.',
+        'Locations': locations
     }), 200
 
 @location_bp.route('/locations/<int:location_id>', methods=['PATCH'])
@@ -98,6 +137,7 @@ def update_location(user, location, *args, **kwargs):
 @resource_owner_required(Location)
 def delete_location(user, location, *args, **kwargs):
     try:
+        remove_location_from_hierarchy(location)
         db.session.delete(location)
         db.session.commit()
         return jsonify({
@@ -109,3 +149,16 @@ def delete_location(user, location, *args, **kwargs):
         return jsonify({
             'Error': 'Server Error.'
         }), 500
+
+
+
+@location_bp.route('/locations/bulk', methods=['POST'])
+@token_and_user_required
+def bulk_create_locations(user):
+    return bulk_request(user, 'locations', creating=True)
+
+
+@location_bp.route('/locations/bulk', methods=['PATCH'])
+@token_and_user_required
+def bulk_update_locations(user):
+    return bulk_request(user, 'locations', creating=False)
@@ -0,0 +1,13 @@
+from flask import Blueprint
+from metrics import request_metrics
+from utils import token_and_user_required, admin_required
+
+metrics_bp = Blueprint('metrics', __name__, url_prefix='/metrics')
+
+
+@metrics_bp.route('', methods=['GET'])
+@token_and_user_required
+@admin_required
+def get_metrics(user, *args, **kwargs):
+    """Request latency, DB time and statement count histograms for this worker, in Prometheus text format."""
+    return request_metrics.exposition(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
@@ -4,7 +4,7 @@ from flask_jwt_extended import jwt_required
 from sqlalchemy import select
 from models import Character, Universe, Note
 from config import db
-from utils import get_current_user,validate_note_data, token_and_user_required, resource_owner_required, execute_note_creation, notes_with_authorization, execute_note_update, load_note_with_relationships
+from utils import get_current_user,validate_note_data, token_and_user_required, resource_owner_required, execute_note_creation, note_summaries_with_authorization, execute_note_update, get_pagination_args, bulk_request, collection_etag, item_etag
 
 
 note_bp = Blueprint ('notes', __name__, url_prefix='/notes')
@@ -49,32 +49,37 @@ def create_note(user):
 
 @note_bp.route('/', methods = ['GET'])
 @token_and_user_required
+@collection_etag
 def get_all_notes(user):
-    notes = notes_with_authorization(user)
+    try:
+        cursor, limit = get_pagination_args(request.args)
+    except ValueError as e:
+        return jsonify({
+            'Error': str(e)
+        }), 400
+    notes, next_cursor = note_summaries_with_authorization(user, cursor, limit)
     if not notes:
         return jsonify({
             'Message': 'No notes found.',
-            'Notes': []
+            'Notes': [],
+            'next_cursor': None
         }), 200
     return jsonify({
         'Message': 'Notes found.',
-        'Notes': [n.to_dict(summary=True) for n in notes]
+        'Notes': notes,
+        'next_cursor': next_cursor
     }), 200
     
 
 
 @note_bp.route('/<int:note_id>', methods = ['GET'])
 @token_and_user_required
-@resource_owner_required(Note)
+@item_etag(Note)
+@resource_owner_required(Note, detail=True)
 def get_note(user, note, *args, **kwargs):
-    note_with_relationships = load_note_with_relationships(user, note.note_id)
-    if not note_with_relationships:
-        return jsonify({
-            'Message': 'Note not found.'
-        }), 404
     return jsonify({
         'Message': 'Note found',
-        'Note': note_with_relationships.to_dict(summary=False)
+        'Note': note.to_dict(summary=False)
     }), 200
 
 
@@ -100,6 +105,11 @@ def update_note(user, note, *args, **kwargs):
         return jsonify({
             'Error': f'{str(e)}'
         }), 403
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'Error': f'{str(e)}'
+        }), 400
     except Exception as e:
         db.session.rollback()
         print(f'Error: {e}')
@@ -126,3 +136,16 @@ def delete_note(user, note, *args, **kwargs):
         return jsonify({
             'Error': 'Server Error.'
         }), 500
+
+
+
+@note_bp.route('/bulk', methods=['POST'])
+@token_and_user_required
+def bulk_create_notes(user):
+    return bulk_request(user, 'notes', creating=True)
+
+
+@note_bp.route('/bulk', methods=['PATCH'])
+@token_and_user_required
+def bulk_update_notes(user):
+    return bulk_request(user, 'notes', creating=False)
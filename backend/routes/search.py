@@ -0,0 +1,26 @@
+from flask import Blueprint, jsonify, request
+from utils import token_and_user_required, validate_search_data, execute_search, collection_etag
+
+search_bp = Blueprint('search', __name__, url_prefix='/search')
+
+
+@search_bp.route('', methods=['GET'])
+@token_and_user_required
+@collection_etag
+def search(user):
+    is_valid, error_msg = validate_search_data(request.args)
+    if not is_valid:
+        return jsonify({
+            'Error': error_msg
+        }), 400
+    kinds = [k for k in request.args.get('type', '').split(',') if k]
+    try:
+        results = execute_search(user, request.args['q'], kinds, int(request.args.get('limit', 20)))
+    except NotImplementedError as e:
+        return jsonify({
+            'Error': str(e)
+        }), 501
+    return jsonify({
+        'Message': f'{len(results)} results found.',
+        'Results': results
+    }), 200
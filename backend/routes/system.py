@@ -0,0 +1,17 @@
+from flask import Blueprint, jsonify
+from config import db
+from database import pool_status
+from utils import token_and_user_required, admin_required
+
+system_bp = Blueprint('system', __name__, url_prefix='/system')
+
+
+@system_bp.route('/db-pool', methods=['GET'])
+@token_and_user_required
+@admin_required
+def get_pool_status(user, *args, **kwargs):
+    """Connection pool occupancy and checkout wait/hold timings for this worker."""
+    return jsonify({
+        'Message': 'Pool status found.',
+        'Pool': pool_status(db.engine)
+    }), 200
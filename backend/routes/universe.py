@@ -1,8 +1,9 @@
-from flask import jsonify, Blueprint, request, abort
-from models import Universe,AlignmentType, get_current_user
+from flask import jsonify, Blueprint, request, abort, Response, stream_with_context, current_app
+from models import Universe,AlignmentType
 from config import db
 from sqlalchemy import select
-from utils import get_current_user, token_and_user_required, resource_owner_required, execute_universe_update, add_characters_to_universe, load_universe_with_relationships, universes_with_authorization, validate_universe_data, execute_universe_creation
+from utils import get_current_user, token_and_user_required, resource_owner_required, execute_universe_update, add_characters_to_universe, universe_summaries_with_authorization, validate_universe_data, execute_universe_creation, get_pagination_args, bulk_request, stream_universe_export, start_universe_import, execute_universe_import, IMPORT_MAX_REPORTED_ERRORS, collection_etag, item_etag, wants_background, job_accepted, queue_universe_import
+from jobs import job_runner
 
 universe_bp = Blueprint('universes', __name__, url_prefix='/universes')
 
@@ -38,8 +39,15 @@ def create_universe(user):
 
 @universe_bp.route('/', methods=['GET'])
 @token_and_user_required
+@collection_etag
 def get_all_universes(user):
-    universes = universes_with_authorization(user)
+    try:
+        cursor, limit = get_pagination_args(request.args)
+    except ValueError as e:
+        return jsonify({
+            'Error': str(e)
+        }), 400
+    universes, next_cursor = universe_summaries_with_authorization(user, cursor, limit)
     if not universes:
         return jsonify({
             'Message': 'No universes found.'
@@ -47,26 +55,86 @@ def get_all_universes(user):
 
     return jsonify({
         'Message': 'Universes found', 
-        'Universes': [u.to_dict() for u in universes]
+        'Universes': universes,
+        'next_cursor': next_cursor
     }), 200
 
 
 @universe_bp.route('/<int:universe_id>', methods=['GET'])
 @token_and_user_required
-@resource_owner_required(Universe)
+@item_etag(Universe)
+@resource_owner_required(Universe, detail=True)
 def get_universe(user, universe, *args, **kwargs):
-    universe_with_relationships = load_universe_with_relationships(user,universe.universe_id)
-    if not universe_with_relationships:
-        return jsonify ({
-            'Message': 'Universe not found.'
-        }), 404
     return jsonify ({
-        'Message': f'Universe with id of {universe_with_relationships.universe_id} has been found.',
-        'Universe': universe_with_relationships.to_dict()
+        'Message': f'Universe with id of {universe.universe_id} has been found.',
+        'Universe': universe.to_dict()
     }), 200
 
 
 
+@universe_bp.route('/import', methods=['POST'])
+@token_and_user_required
+def import_universe(user):
+    """
+    Streams an NDJSON archive (optionally gzipped) into the user's account.
+    Pass ?resume=<import_id> with the same archive to continue a failed import,
+    and ?background=true to get a 202 and a job that imports the uploaded file.
+    """
+    try:
+        checkpoint = start_universe_import(user, request.args.get('resume'))
+    except ValueError as e:
+        return jsonify({
+            'Error': str(e)
+        }), 404
+    chunk_size = current_app.config.get('IMPORT_CHUNK_SIZE', 1000)
+    try:
+        if wants_background(request.args):
+            return job_accepted('Import queued.', queue_universe_import(user, request.stream, checkpoint, chunk_size))
+        created, errors = execute_universe_import(user, request.stream, checkpoint, chunk_size)
+        return jsonify({
+            'Message': 'Import completed.',
+            'Import': checkpoint.to_dict(),
+            'created': created,
+            'error_count': len(errors),
+            'errors': errors[:IMPORT_MAX_REPORTED_ERRORS]
+        }), 201
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({
+            'Error': str(e),
+            'Import': checkpoint.to_dict()
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f'Error: {str(e)}')
+        checkpoint.status = 'failed'
+        db.session.commit()
+        return jsonify({
+            'Error': 'Import interrupted; resume it with the import_id.',
+            'Import': checkpoint.to_dict()
+        }), 500
+
+
+
+@universe_bp.route('/<int:universe_id>/export', methods=['GET'])
+@token_and_user_required
+@resource_owner_required(Universe)
+def export_universe(user, universe, *args, **kwargs):
+    compress = request.args.get('gzip', '').lower() in ('1', 'true')
+    if wants_background(request.args):
+        job = job_runner.enqueue('export_universe', user.user_id, {
+            'universe_id': universe.universe_id, 'compress': compress
+        })
+        return job_accepted('Export queued.', job)
+    filename = f'universe-{universe.universe_id}.ndjson' + ('.gz' if compress else '')
+    return Response(
+        stream_with_context(stream_universe_export(universe.universe_id, compress)),
+        mimetype='application/gzip' if compress else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+
 @universe_bp.route('/<int:universe_id>', methods=['PATCH'])
 @token_and_user_required
 @resource_owner_required(Universe)
@@ -86,13 +154,22 @@ def update_universe(user, universe, *args, **kwargs):
             'Universe': universe.to_dict(summary=True)
         }), 200
 
-    except (PermissionError, ValueError) as e:
+    except PermissionError as e:
+        db.session.rollback()
+        return jsonify({
+            'Error': str(e)
+        }), 403
+    except ValueError as e:
         db.session.rollback()
-        print(f'Error:{str(e)}')
+        return jsonify({
+            'Error': str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f'Error: {str(e)}')
         return jsonify({
             'Error': 'Server Error.'
         }), 500
-        
 
 
 
@@ -101,6 +178,9 @@ def update_universe(user, universe, *args, **kwargs):
 @resource_owner_required(Universe)
 def delete_universe(user, universe, *args, **kwargs):
     try:
+        if wants_background(request.args):
+            job = job_runner.enqueue('delete_universe', user.user_id, {'universe_id': universe.universe_id})
+            return job_accepted('Universe deletion queued.', job)
         db.session.delete(universe)
         db.session.commit()
         return jsonify({
@@ -116,3 +196,13 @@ def delete_universe(user, universe, *args, **kwargs):
 
 
 
+@universe_bp.route('/bulk', methods=['POST'])
+@token_and_user_required
+def bulk_create_universes(user):
+    return bulk_request(user, 'universes', creating=True)
+
+
+@universe_bp.route('/bulk', methods=['PATCH'])
+@token_and_user_required
+def bulk_update_universes(user):
+    return bulk_request(user, 'universes', creating=False)
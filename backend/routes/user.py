@@ -1,21 +1,44 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required
 from models import User
 from config import db
-from utils import get_current_user, execute_user_update, validate_auth_data,token_and_user_required, admin_required, execute_get_all_users, resource_owner_required
+from utils import get_current_user, execute_user_update, validate_auth_data,token_and_user_required, admin_required, execute_get_all_users, resource_owner_required, invalidate_cached_user, collection_etag, wants_background, job_accepted, build_dashboard, recent_universe_summaries
+from jobs import job_runner
 
 user_bp = Blueprint('users', __name__, url_prefix='/users')
 
 
 @user_bp.route('/me', methods=['GET'])
 @token_and_user_required
+@collection_etag
 def get_profile(user):
+    profile = get_current_user()
     return jsonify({
         'Message': 'User profile found.',
-        'User': user.to_dict(summary=False)
+        'User': profile.to_dict(summary=False, universes=recent_universe_summaries(
+            profile.user_id, current_app.config['PROFILE_UNIVERSE_LIMIT']
+        ))
     }), 200 
 
 
+@user_bp.route('/me/dashboard', methods=['GET'])
+@token_and_user_required
+@collection_etag
+def get_dashboard(user):
+    """Profile, counts, per-universe summaries and recent items in one response."""
+    dashboard = build_dashboard(
+        user.user_id, current_app.config['DASHBOARD_RECENT_ITEMS'], current_app.config['PROFILE_UNIVERSE_LIMIT']
+    )
+    if dashboard is None:
+        return jsonify({
+            'Error': 'User not found.'
+        }), 404
+    return jsonify({
+        'Message': 'Dashboard found.',
+        'Dashboard': dashboard
+    }), 200
+
+
 @user_bp.route('/me', methods = ['PATCH'])
 @token_and_user_required
 def update_profile(user):
@@ -26,11 +49,13 @@ def update_profile(user):
             'Error': err_msg
         }), 400
     try:
-        execute_user_update(user, data)
+        profile = get_current_user()
+        execute_user_update(profile, data)
         db.session.commit()
+        invalidate_cached_user(profile.user_id)
         return jsonify({
             'Message': 'User successfully updated.', 
-            'User': user.to_dict(summary=True)
+            'User': profile.to_dict(summary=True)
         }), 200
 
     except (PermissionError, ValueError) as e:
@@ -54,7 +79,7 @@ def get_all_users(user, *args, **kwargs):
     return jsonify({
         'Message': 'Users found.',
         'Admin': f'{user.username}',
-        'users': [u.to_dict(summary=True) for u in users]
+        'users': users
     }), 200
 
 
@@ -63,8 +88,13 @@ def get_all_users(user, *args, **kwargs):
 @resource_owner_required(User)
 def delete_user(owner,user, *args, **kwargs):
     try:
+        if wants_background(request.args):
+            job = job_runner.enqueue('delete_account', owner.user_id, {'user_id': user.user_id})
+            return job_accepted('Account deletion queued.', job)
+        user_id = user.user_id
         db.session.delete(user)
         db.session.commit()
+        invalidate_cached_user(user_id)
         return jsonify({
             'Message': 'User has been successfully deleted.'
         }), 200
@@ -1 +1,2 @@
-from .demo_seed_data import demo_seed_data
\ No newline at end of file
+from .demo_seed_data import demo_seed_data
+from .synthetic_data import synthetic_seed_data
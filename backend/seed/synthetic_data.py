@@ -0,0 +1,201 @@
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select, text
+from models import (User, Universe, Character, Note, Location, AlignmentType, LocationType,
+                    character_universes, character_notes, note_universes, character_locations, location_notes,
+                    recount_counters, search_index_ddl, search_index_rebuild_sql, search_trigger_drop_sql)
+from passwords import password_hasher
+from config import db
+
+SYNTHETIC_PASSWORD = 'synthetic-password'
+CHUNK_SIZE = 10000
+TEXT_POOL_SIZE = 1024
+EPOCH = datetime(2024, 1, 1)
+WORDS = (
+    'ember', 'tide', 'iron', 'storm', 'shadow', 'crystal', 'aurora', 'ash', 'void', 'thorn',
+    'silver', 'frost', 'solar', 'echo', 'rune', 'venom', 'gale', 'quartz', 'nova', 'dusk'
+)
+SKILLS = ('Swordplay', 'Archery', 'Stealth', 'Diplomacy', 'Alchemy', 'Healing', 'Tracking', 'Master Strategist')
+
+
+class SyntheticDataGenerator:
+    """
+    Appends `users` users, each owning `universes` universes and `items` characters, notes
+    and locations, with every association drawn from the same owner's records. On average
+    a character belongs to `density` universes and locations, a note names `density`
+    characters and universes, and a location `density` notes.
+
+    The same arguments against the same starting database always produce the same rows
+    (bar the salt inside the password hash): ids continue from the current maximum and every value comes from one seeded RNG,
+    drawn a column at a time. Rows are built column-wise and inserted in chunks through
+    executemany (see write()), and the record counters are recomputed once at the end.
+    The one password hash is shared by every user. On SQLite
+    the full-text triggers are dropped for the load and the index is rebuilt once at the
+    end, inside the same transaction.
+    """
+
+    def __init__(self, users, universes, items, density=2, seed=0):
+        self.users = users
+        self.universes = universes
+        self.items = items
+        self.density = density
+        self.rng = random.Random(seed)
+        self.counts = {}
+        self.statements = {}
+        self.pending = {}
+        # Text comes from fixed pools; composing it per row would cost more than the inserts.
+        self.titles, self.origins, self.sentences, self.paragraphs = (
+            [' '.join(self.rng.choices(WORDS, k=n)) for _ in range(TEXT_POOL_SIZE)] for n in (2, 2, 12, 40)
+        )
+
+    def run(self):
+        """Generates and commits everything; returns {table name: rows inserted} and the elapsed seconds."""
+        started = time.perf_counter()
+        sqlite = db.session.get_bind().dialect.name == 'sqlite'
+        if sqlite:
+            for statement in search_trigger_drop_sql():
+                db.session.execute(text(statement))
+        first = {model: (db.session.scalar(select(func.max(model.__mapper__.primary_key[0]))) or 0) + 1
+                 for model in (User, Universe, Character, Note, Location)}
+        password_hash = password_hasher.hash(SYNTHETIC_PASSWORD)
+
+        user_ids = range(first[User], first[User] + self.users)
+        joined = [EPOCH + timedelta(minutes=user_id) for user_id in user_ids]
+        self.write(
+            User, user_id=user_ids, name=[f'Synthetic user {user_id}' for user_id in user_ids],
+            username=[f'Synthetic{user_id}' for user_id in user_ids],
+            email=[f'synthetic{user_id}@example.com' for user_id in user_ids],
+            password_hash=[password_hash] * self.users, is_admin=[False] * self.users,
+            created_at=joined, updated_at=joined, version=[1] * self.users, collection_version=[1] * self.users,
+            **{counter: [0] * self.users for counter in ('universe_count', 'character_count', 'note_count', 'location_count')}
+        )
+        for offset, user_id in enumerate(user_ids):
+            self.generate_user_records(user_id, *(
+                range(first[model] + offset * size, first[model] + (offset + 1) * size)
+                for model, size in ((Universe, self.universes), (Character, self.items),
+                                    (Note, self.items), (Location, self.items))
+            ))
+
+        self.flush()
+        # The rows bypassed the ORM counter hooks; one recount for the new users is cheaper than counting per chunk.
+        recount_counters(db.session.connection(), list(user_ids))
+        if sqlite:
+            for statement in search_index_ddl() + search_index_rebuild_sql():
+                db.session.execute(text(statement))
+        db.session.commit()
+        return self.counts, time.perf_counter() - started
+
+    def generate_user_records(self, user_id, universe_ids, character_ids, note_ids, location_ids):
+        rng, items = self.rng, self.items
+        timeline = [EPOCH + timedelta(minutes=user_id, seconds=i) for i in range(max(len(universe_ids), items))]
+        universe_created, created = timeline[:len(universe_ids)], timeline[:items]
+        skill_sets = [list(SKILLS[start:start + count]) for start in range(len(SKILLS)) for count in range(4)]
+
+        self.write(
+            Universe, universe_id=universe_ids, user_id=[user_id] * len(universe_ids),
+            name=[f'{title.title()} {universe_id}'
+                  for title, universe_id in zip(rng.choices(self.titles, k=len(universe_ids)), universe_ids)],
+            description=[f'A universe of {sentence}.' for sentence in rng.choices(self.sentences, k=len(universe_ids))],
+            alignment=rng.choices(list(AlignmentType), k=len(universe_ids)),
+            created_at=universe_created, updated_at=universe_created, version=[1] * len(universe_ids),
+            **{counter: [0] * len(universe_ids) for counter in ('character_count', 'note_count', 'location_count')}
+        )
+        self.write(
+            Character, character_id=character_ids, user_id=[user_id] * items,
+            name=[f'{word.title()} {character_id}' for word, character_id in zip(rng.choices(WORDS, k=items), character_ids)],
+            age=rng.choices(range(16, 901), k=items), origin=rng.choices(self.origins, k=items),
+            main_power_set=[f'{word} manipulation {character_id}'
+                            for word, character_id in zip(rng.choices(WORDS, k=items), character_ids)],
+            secondary_power_set=[f'{word} control {character_id}'
+                                 for word, character_id in zip(rng.choices(WORDS, k=items), character_ids)],
+            skills=rng.choices(skill_sets, k=items),
+            created_at=created, updated_at=created, version=[1] * items
+        )
+        self.write(
+            Note, note_id=note_ids, user_id=[user_id] * items,
+            title=[f'Note on {title}' for title in rng.choices(self.titles, k=items)],
+            content=rng.choices(self.paragraphs, k=items),
+            created_at=created, updated_at=created, version=[1] * items
+        )
+        self.write(
+            Location, location_id=location_ids, user_id=[user_id] * items,
+            universe_id=rng.choices(universe_ids, k=items),
+            name=[f'{word.title()} {location_id}' for word, location_id in zip(rng.choices(WORDS, k=items), location_ids)],
+            location_type=rng.choices(list(LocationType), k=items), description=rng.choices(self.sentences, k=items),
+            created_at=created, updated_at=created, version=[1] * items
+        )
+
+        self.write(character_universes, **self.links('character_id', character_ids, 'universe_id', universe_ids))
+        self.write(character_locations, **self.links('character_id', character_ids, 'location_id', location_ids))
+        self.write(character_notes, **self.links('note_id', note_ids, 'character_id', character_ids))
+        self.write(note_universes, **self.links('note_id', note_ids, 'universe_id', universe_ids))
+        self.write(location_notes, **self.links('location_id', location_ids, 'note_id', note_ids))
+
+    def links(self, owner_key, owners, target_key, targets):
+        """
+        Links each owner to a run of 1..2*density-1 consecutive targets from a random
+        start, so the pairs are distinct and average `density` per owner.
+        """
+        size = len(targets)
+        linked_owners, linked_targets = [], []
+        if size:
+            starts = self.rng.choices(range(size), k=len(owners))
+            counts = self.rng.choices(range(1, min(size, 2 * self.density - 1) + 1), k=len(owners))
+            for owner, start, count in zip(owners, starts, counts):
+                linked_owners += [owner] * count
+                linked_targets += [targets[(start + i) % size] for i in range(count)]
+        return {owner_key: linked_owners, target_key: linked_targets}
+
+    def write(self, target, **columns):
+        """
+        Queues rows given column-wise; every queue is flushed, in the order tables were
+        first written, once one of them holds CHUNK_SIZE rows.
+        """
+        table = getattr(target, '__table__', target)
+        key = (table, tuple(columns))
+        if key not in self.pending:
+            self.pending[key] = {name: [] for name in columns}
+        queued = self.pending[key]
+        for name, values in columns.items():
+            queued[name] += values
+        self.counts[table.name] = self.counts.get(table.name, 0) + len(next(iter(columns.values())))
+        if len(next(iter(queued.values()))) >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        """
+        Each column is run through its type's bind processor once, and the rows go to the
+        driver's executemany with the statement Core compiled, skipping the per-row
+        parameter assembly of a Core executemany.
+        """
+        connection = db.session.connection()
+        dialect = connection.dialect
+        for (table, names), columns in self.pending.items():
+            if not columns[names[0]]:
+                continue
+            if (table, names) not in self.statements:
+                self.statements[table, names] = insert(table).compile(dialect=dialect, column_keys=list(names))
+            compiled = self.statements[table, names]
+            converted = []
+            for name, values in columns.items():
+                process = table.c[name].type.dialect_impl(dialect).bind_processor(dialect)
+                if process is not None:
+                    # created_at and updated_at carry the same values; convert them once.
+                    done = next((bound for raw, bound in converted if raw == values), None)
+                    if done is None:
+                        done = [process(value) for value in values]
+                        converted.append((values, done))
+                    columns[name] = done
+            if compiled.positional:
+                rows = list(zip(*(columns[name] for name in compiled.positiontup)))
+            else:
+                rows = [dict(zip(names, row)) for row in zip(*columns.values())]
+            for start in range(0, len(rows), CHUNK_SIZE):
+                connection.exec_driver_sql(compiled.string, rows[start:start + CHUNK_SIZE])
+            for name in names:
+                columns[name] = []
+
+
+def synthetic_seed_data(users, universes, items, density=2, seed=0):
+    return SyntheticDataGenerator(users, universes, items, density, seed).run()
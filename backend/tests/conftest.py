@@ -0,0 +1,14 @@
+import os
+import tempfile
+import pytest
+from benchmarks.common import load_app
+
+# load_app points DATABASE_URL at a throwaway file, so it has to run before the test
+# modules import config, models or utils; conftest is imported ahead of them.
+_app = load_app(os.path.join(tempfile.mkdtemp(prefix='harmonic-test-'), 'test.db'), migrate=True)
+
+
+@pytest.fixture(scope='session')
+def app():
+    """The app against a throwaway SQLite file whose schema comes from the migrations."""
+    return _app
@@ -0,0 +1,35 @@
+"""
+create_app keeps caches, the password pool, replica routing, the revocation index and
+the job runner per app, so a second app neither reconfigures nor stops the first.
+"""
+from app import create_app
+from config import Config, db
+from migrations import upgrade
+
+PER_APP = ('user_cache', 'dashboard_cache', 'password_hasher', 'revoked_tokens', 'replica_router', 'job_runner')
+
+
+def register(client, name):
+    return client.post('/api/auth/register', json={
+        'name': name, 'username': name, 'email': f'{name}@example.com',
+        'password': 'factory-password', 'is_admin': False
+    })
+
+
+def test_second_app_keeps_its_own_state(app, tmp_path):
+    class SecondConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{tmp_path / "second.db"}'
+        USER_CACHE_TTL = 1
+        PASSWORD_HASH_ROUNDS = 4
+
+    second = create_app(SecondConfig)
+    with second.app_context():
+        upgrade(db.engine)
+
+    for name in PER_APP:
+        assert app.extensions[name] is not second.extensions[name], name
+    assert app.extensions['user_cache'].ttl == Config.USER_CACHE_TTL
+    assert app.extensions['password_hasher'].rounds == Config.PASSWORD_HASH_ROUNDS
+
+    assert register(second.test_client(), 'Second').status_code == 201
+    assert register(app.test_client(), 'First').status_code == 201
@@ -0,0 +1,35 @@
+"""
+Migrations never delete user data on their own: orphaned rows stop 0005 until the
+operator opts in, and are then deleted and reported.
+"""
+import sqlite3
+import pytest
+from sqlalchemy import create_engine
+from migrations import upgrade
+
+
+def count(path, table):
+    with sqlite3.connect(path) as connection:
+        return connection.execute(f'SELECT count(*) FROM {table}').fetchone()[0]
+
+
+def test_orphans_need_opt_in(tmp_path, capsys):
+    path = tmp_path / 'orphans.db'
+    engine = create_engine(f'sqlite:///{path}')
+    upgrade(engine, target=4)
+    with sqlite3.connect(path) as connection:
+        connection.execute(
+            "INSERT INTO notes (note_id, title, content, user_id, created_at, updated_at, version) "
+            "VALUES (1, 'Orphan', '', 99, '2024-01-01', '2024-01-01', 1)"
+        )
+        connection.execute('INSERT INTO note_universes (note_id, universe_id) VALUES (1, 42)')
+
+    with pytest.raises(RuntimeError, match='note_universes: 1, notes: 1'):
+        upgrade(engine)
+    assert count(path, 'notes') == 1
+
+    applied = upgrade(engine, delete_orphans=True)
+    assert applied[0] == '0005_cascading_deletes'
+    assert 'Deleted orphaned rows: note_universes: 1, notes: 1' in capsys.readouterr().out
+    assert count(path, 'notes') == 0
+    assert count(path, 'note_universes') == 0
@@ -0,0 +1,83 @@
+"""
+EXPLAIN QUERY PLAN checks: every statement the routes send, and every query-builder
+helper in utils, must be answered from an index (see benchmarks/query_plans.py).
+"""
+from datetime import datetime
+import pytest
+from sqlalchemy import event
+from benchmarks.query_plans import record, explain, full_scan
+from config import db
+from models import Character
+import utils
+
+PLANNER = utils.UserSnapshot(1, False, 'Planner')
+CURSOR = (datetime(2000, 1, 1), 1)
+
+HELPER_QUERIES = {
+    'collection_version': lambda: utils.collection_version_query(PLANNER),
+    'item_version': lambda: utils.item_version_query(Character, 1),
+    'login_by_username': lambda: utils.login_query('Planner'),
+    'login_by_email': lambda: utils.login_query('planner@example.com'),
+    'character_detail': lambda: utils.character_detail_query(PLANNER, 1),
+    'character_summaries': lambda: utils.character_summaries_query(PLANNER),
+    'character_summaries_cursor': lambda: utils.character_summaries_query(PLANNER, CURSOR),
+    'universe_detail': lambda: utils.universe_detail_query(PLANNER, 1),
+    'universe_summaries': lambda: utils.universe_summaries_query(PLANNER),
+    'universe_summaries_cursor': lambda: utils.universe_summaries_query(PLANNER, CURSOR),
+    'note_detail': lambda: utils.note_detail_query(PLANNER, 1),
+    'note_summaries': lambda: utils.note_summaries_query(PLANNER),
+    'note_summaries_cursor': lambda: utils.note_summaries_query(PLANNER, CURSOR),
+    'location_detail': lambda: utils.location_detail_query(PLANNER, 1),
+    'location_summaries': lambda: utils.location_summaries_query(PLANNER, 1),
+    'location_summaries_cursor': lambda: utils.location_summaries_query(PLANNER, 1, CURSOR),
+    'location_descendants': lambda: utils.location_descendants_query(1),
+    'location_descendants_depth': lambda: utils.location_descendants_query(1, max_depth=1, cursor=CURSOR),
+    'location_ancestors': lambda: utils.location_ancestors_query(6),
+    'dashboard_recent': lambda: utils.dashboard_recent_query(1, 5),
+    'recent_universes': lambda: utils.recent_universes_query(1, 50),
+    'search': lambda: utils.search_statement(PLANNER, 'plan town', ['note', 'location']),
+}
+
+
+@pytest.fixture(scope='module')
+def recorded(app):
+    """Drives every route once (which also seeds the records the helper queries read)."""
+    return record(app)
+
+
+def plans(app, statement):
+    """{SQL sent: plan} for each statement executing `statement` sends."""
+    statement, params = statement if isinstance(statement, tuple) else (statement, {})
+    sent = []
+    with app.app_context(), db.engine.connect() as connection:
+        def remember(conn, cursor, sql, parameters, context, executemany):
+            sent.append((sql, parameters))
+        event.listen(connection, 'before_cursor_execute', remember)
+        connection.execute(statement, params).all()
+        event.remove(connection, 'before_cursor_execute', remember)
+        return {' '.join(sql.split()): explain(connection, sql, parameters) for sql, parameters in sent}
+
+
+def test_routes_answer_with_expected_status(recorded):
+    statuses, _ = recorded
+    assert [s for s in statuses if s[2] != s[3]] == []
+
+
+def test_route_statements_use_indexes(app, recorded):
+    _, statements = recorded
+    with app.app_context(), db.engine.connect() as connection:
+        scans = {
+            normalized: plan for normalized, (statement, parameters) in statements.items()
+            if full_scan(connection, normalized, plan := explain(connection, statement, parameters))
+        }
+    assert scans == {}
+
+
+@pytest.mark.parametrize('name', HELPER_QUERIES)
+def test_helper_query_uses_indexes(app, recorded, name):
+    with app.app_context():
+        found = plans(app, HELPER_QUERIES[name]())
+        with db.engine.connect() as connection:
+            scans = {sql: plan for sql, plan in found.items() if full_scan(connection, sql, plan)}
+    assert found
+    assert scans == {}
@@ -1,15 +1,55 @@
-from flask import session, request, jsonify
+from flask import session, request, jsonify, current_app, g, make_response
 from flask_jwt_extended import get_jwt_identity, jwt_required
 from flask_bcrypt import generate_password_hash, check_password_hash
-from sqlalchemy import select, or_
-from sqlalchemy.orm import selectinload
-from models import User, bcrypt, Character, Universe, Note, Location, TokenBlocklist, LocationType, AlignmentType, character_universes, character_notes, character_universes, note_universes, location_notes
+from sqlalchemy import select, or_, and_, insert, delete, update, text, union_all, literal, true, func, bindparam
+from sqlalchemy.orm import selectinload, configure_mappers, Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import inspect as inspect_instance
+from models import User, bcrypt, Character, Universe, Note, Location, TokenBlocklist, LocationType, AlignmentType, character_universes, character_notes, character_universes, note_universes, location_notes, character_locations, location_closure, ImportCheckpoint, import_id_map, Job, touch_collections, count_records, count_links, uncount_links, recount_counters, SEARCH_KINDS, SEARCH_KIND_COUNT, search_index_rebuild_sql
 from config import  jwt, db
+from werkzeug.local import LocalProxy
+from passwords import password_hasher
+from jobs import job_runner, job_handler
+from collections import namedtuple
 from functools import wraps
+from datetime import datetime
+import base64
+import enum
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+import zlib
 
 #!------------ Universal Helper Function/Decorators ----------
+
+# Compact, non-ORM view of a user that is safe to share across requests and threads.
+UserSnapshot = namedtuple('UserSnapshot', ['user_id', 'is_admin', 'username'])
+
+# Per-app state: create_app keeps one of each in app.extensions, reached through the current app.
+user_cache = LocalProxy(lambda: current_app.extensions['user_cache'])
+
+# Dashboard payloads keyed by (user_id, collection_version), so a write never serves a stale one.
+dashboard_cache = LocalProxy(lambda: current_app.extensions['dashboard_cache'])
+
+revoked_tokens = LocalProxy(lambda: current_app.extensions['revoked_tokens'])
+
+
+def _request_memo():
+    """
+    Storage that lives exactly as long as the request. flask.g belongs to the app
+    context, which outlives the request when a caller (CLI, test, benchmark) pushed it first.
+    """
+    return request.environ.setdefault('harmonic.memo', {})
+
+
 def get_current_user():
-    """Retrieves the current user."""
+    """Retrieves the current user, loading it at most once per request."""
+    memo = _request_memo()
+    if 'current_user' in memo:
+        return memo['current_user']
     user_id = get_jwt_identity()
     if user_id is None:
         return None
@@ -18,13 +58,45 @@ def get_current_user():
     except(ValueError, TypeError):
         return None
     user = db.session.get(User, user_id)
+    memo['current_user'] = user
     return user
 
 
+def get_current_user_snapshot():
+    """
+    Resolves the current user as a UserSnapshot.
+    Checks the request memo, then the cross-request TTL cache, and only then the database.
+    """
+    memo = _request_memo()
+    if 'current_user_snapshot' in memo:
+        return memo['current_user_snapshot']
+    try:
+        user_id = int(get_jwt_identity())
+    except(ValueError, TypeError):
+        return None
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        user = get_current_user()
+        if not user:
+            return None
+        snapshot = UserSnapshot(user.user_id, user.is_admin, user.username)
+        if not snapshot.is_admin:
+            # Other workers cannot be told about a demotion; see USER_CACHE_TTL.
+            user_cache.set(user_id, snapshot)
+    memo['current_user_snapshot'] = snapshot
+    return snapshot
+
+
+def invalidate_cached_user(user_id):
+    """Drops this worker's snapshot; other workers keep theirs until USER_CACHE_TTL runs out."""
+    user_cache.pop(user_id)
+    _request_memo().pop('current_user_snapshot', None)
+
+
 def admin_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        user = get_current_user()
+        user = get_current_user_snapshot()
         if not user or not user.is_admin:
             return jsonify({
                 'Message': 'Permission Denied, Admin only.'
@@ -36,7 +108,7 @@ def token_and_user_required(f):
     @wraps(f)
     @jwt_required()
     def decorated(*args, **kwargs):
-        user = get_current_user()
+        user = get_current_user_snapshot()
         if not user:
             return jsonify({
                 'Message': 'User not found.'
@@ -48,7 +120,7 @@ def token_and_user_required(f):
 def admin_or_owner_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        user = get_current_user()
+        user = get_current_user_snapshot()
         if not user:
             return jsonify({
                 'Message': 'Authorization required.'
@@ -63,17 +135,18 @@ def admin_or_owner_required(f):
     return decorated
 
 
-def resource_owner_required(item_class):
+def resource_owner_required(item_class, detail=False):
+    """`detail` loads the item with item_class.detail_options(), ready for the detail payload."""
     def decorator(f):
         @wraps(f)
         def decorated(*args, **kwargs):
             item_id = next(iter(kwargs.values()))
-            user = get_current_user()
+            user = get_current_user_snapshot()
             if not user:
                 return jsonify({
                     'Message':'Authorization required.'
                 }),401
-            item = db.session.get(item_class, item_id)
+            item = db.session.get(item_class, item_id, options=item_class.detail_options() if detail else ())
             if not item:
                 return jsonify({
                     'Message': 'Item not found.'
@@ -90,8 +163,147 @@ def resource_owner_required(item_class):
 @jwt.token_in_blocklist_loader
 def check_if_token_revoked(jwt_header, jwt_payload):
     jti = jwt_payload.get("jti")
-    token = db.session.scalar(select(TokenBlocklist).where(TokenBlocklist.jti == jti))
-    return token is not None
+    return revoked_tokens.is_revoked(jti)
+
+
+#!------------ Pagination Helper Functions ----------
+
+def encode_cursor(created_at, item_id):
+    """Packs a (created_at, id) keyset position into an opaque url-safe token."""
+    raw = json.dumps([created_at.isoformat(), item_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('utf-8').rstrip('=')
+
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    try:
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor.')
+
+
+def get_pagination_args(args):
+    """Reads 'cursor' and 'limit' from the query string, raising ValueError on bad input."""
+    default_limit = current_app.config.get('PAGE_SIZE_DEFAULT', 50)
+    max_limit = current_app.config.get('PAGE_SIZE_MAX', 200)
+    try:
+        limit = int(args.get('limit', default_limit))
+    except (ValueError, TypeError):
+        raise ValueError('Limit must be an integer.')
+    if limit < 1 or limit > max_limit:
+        raise ValueError(f'Limit must be between 1 and {max_limit}.')
+    cursor = args.get('cursor')
+    return (decode_cursor(cursor) if cursor else None), limit
+
+
+def apply_keyset(query, created_column, id_column, cursor, limit):
+    """
+    Orders by (created_at, id) and seeks past the cursor.
+    Fetches one extra row so the caller can tell whether another page exists.
+    """
+    if cursor:
+        created_at, item_id = cursor
+        query = query.where(or_(
+            created_column > created_at,
+            and_(created_column == created_at, id_column > item_id)
+        ))
+    return query.order_by(created_column, id_column).limit(limit + 1)
+
+
+def split_page(rows, limit, created_key, id_key):
+    """Trims the look-ahead row and returns (rows, next_cursor)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, created_key), getattr(last, id_key))
+
+
+#!------------ Conditional Request Helper Functions ----------
+
+def _conditional_response(etag, f, *args, **kwargs):
+    """Answers 304 when If-None-Match already holds `etag`; otherwise runs the route and tags a 200."""
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+    response = make_response(f(*args, **kwargs))
+    if response.status_code == 200:
+        response.set_etag(etag)
+    return response
+
+
+def collection_etag(f):
+    """
+    Conditional GET for routes that only read the current user's own data.
+    The ETag is the user's collection version plus the request path and query,
+    so a revalidation costs one primary-key lookup and never runs the route.
+    """
+    @wraps(f)
+    def decorated(user, *args, **kwargs):
+        version = db.session.scalar(collection_version_query(user))
+        etag = make_collection_etag(user, version, request.full_path)
+        return _conditional_response(etag, f, user, *args, **kwargs)
+    return decorated
+
+
+def collection_version_query(user):
+    return select(User.collection_version).where(User.user_id == user.user_id)
+
+
+def make_collection_etag(user, version, full_path):
+    return f'u{user.user_id}-{version}-{zlib.crc32(full_path.encode()):08x}'
+
+
+def item_etag(item_class):
+    """
+    Conditional GET for a single owned item; goes between token_and_user_required and
+    resource_owner_required. The ETag combines the item's version with its owner's
+    collection version, since the payload also embeds names of linked records.
+    Missing or foreign items fall through so the owner check answers 404/403.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(user, *args, **kwargs):
+            item_id = next(iter(kwargs.values()))
+            row = db.session.execute(item_version_query(item_class, item_id)).first()
+            if not row or not (user.is_admin or user.user_id == row.user_id):
+                return f(user, *args, **kwargs)
+            etag = make_item_etag(item_class, item_id, row)
+            return _conditional_response(etag, f, user, *args, **kwargs)
+        return decorated
+    return decorator
+
+
+def owner_collection_etag(item_class):
+    """
+    collection_etag for routes under a single item that an admin may read too: the tag
+    follows the item owner's collection version, not the requester's. Same placement
+    and fall-through as item_etag.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(user, *args, **kwargs):
+            item_id = next(iter(kwargs.values()))
+            row = db.session.execute(item_version_query(item_class, item_id)).first()
+            if not row or not (user.is_admin or user.user_id == row.user_id):
+                return f(user, *args, **kwargs)
+            etag = make_collection_etag(row, row.collection_version, request.full_path)
+            return _conditional_response(etag, f, user, *args, **kwargs)
+        return decorated
+    return decorator
+
+
+def item_version_query(item_class, item_id):
+    id_column = inspect_instance(item_class).primary_key[0]
+    return select(item_class.user_id, item_class.version, User.collection_version).join(
+        User, User.user_id == item_class.user_id
+    ).where(id_column == item_id)
+
+
+def make_item_etag(item_class, item_id, row):
+    return f'{item_class.__tablename__}-{item_id}-{row.version}-{row.collection_version}'
 
 
 #! ------------ Auth Helper Functions -----------
@@ -150,22 +362,27 @@ def validate_login_data(data):
         return False, 'Username or Email is required.'
     return True, None
 
+def login_query(identifier):
+    return select(User).where(
+        or_(User.email == identifier, User.username == identifier)
+    )
+
 def authenticate_user(data):
     password = data.get('password').strip()
     identifier = data.get('email') or data.get('username')
     if not identifier or not password:
         return None
 
-    query = select(User).where(
-        or_(User.email == identifier, User.username == identifier)
-    )
-    user = db.session.execute(query).scalar_one_or_none()
+    user = db.session.execute(login_query(identifier)).scalar_one_or_none()
     if not user:
         return None
 
-    if bcrypt.check_password_hash(user.password, password):
-        return user
-    return None
+    if not user.check_password(password):
+        return None
+    if password_hasher.needs_rehash(user.password_hash):
+        user.password = password
+        db.session.commit()
+    return user
     
 
 
@@ -212,37 +429,38 @@ def execute_character_update(user, character, data):
     for field in updatable_fields:
         if field in data:
             setattr(character, field, data[field])
-    if 'universe_ids' in data and data['universe_ids']:
-        add_universes_to_character(user, character, data['universe_ids'])
-    if 'note_ids' in data and data['note_ids']:
-        add_notes_to_character(user, character, data['note_ids'])
-    if 'location_id' in data and data['location_ids']:
-        add_locations_to_character(user, character, data['location_ids'])
+    apply_link_changes(user, 'characters', character, data)
 
 
-def load_character_relationships(user,character_id):
-    query = select(Character).where(
+def character_detail_query(user, character_id):
+    return select(Character).where(
         Character.user_id == user.user_id,
-        Character.character_id == character_id).options(
-            selectinload(Character.universes),
-            selectinload(Character.notes)
-        )
-    character =db.session.execute(query).scalar_one_or_none()
-    if not character:
-        return None
-    return character
+        Character.character_id == character_id).options(*Character.detail_options())
 
 
-def characters_with_authorization(user):
+def characters_with_authorization(user, cursor=None, limit=50):
     query = select(Character).where(
         Character.user_id == user.user_id).options(
             selectinload(Character.universes),
             selectinload(Character.notes)
         )
+    query = apply_keyset(query, Character.created_at, Character.character_id, cursor, limit)
     characters =db.session.execute(query).scalars().all()
-    if not characters:
-        return None
-    return characters
+    return split_page(characters, limit, 'created_at', 'character_id')
+
+
+def character_summaries_query(user, cursor=None, limit=50):
+    query = select(*Character.summary_columns()).where(
+        Character.user_id == user.user_id
+    )
+    return apply_keyset(query, Character.created_at, Character.character_id, cursor, limit)
+
+
+def character_summaries_with_authorization(user, cursor=None, limit=50):
+    """Lean read path: projects only the summary columns and returns plain dicts."""
+    query = character_summaries_query(user, cursor, limit)
+    rows, next_cursor = split_page(db.session.execute(query).all(), limit, 'created_at', 'character_id')
+    return Character.summary_serializer()(rows), next_cursor
 
 
 def add_universes_to_character(user, character, universe_ids):
@@ -320,24 +538,15 @@ def validate_universe_data(data, partial=False):
 
 
 
-def load_universe_with_relationships(user,universe_id):
-    query = select(Universe).filter(
+def universe_detail_query(user, universe_id):
+    return select(Universe).filter(
         Universe.user_id == user.user_id,
         Universe.universe_id == universe_id
-        ).options(
-            selectinload(
-                Universe.characters
-            ),
-            selectinload(
-                Universe.notes
-            )
-        )
-    universe = db.session.execute(query).scalar_one_or_none()
-    return universe
+        ).options(*Universe.detail_options())
 
 
 
-def universes_with_authorization(user):
+def universes_with_authorization(user, cursor=None, limit=50):
     query = select(Universe).where(
         Universe.user_id == user.user_id
     ).options(
@@ -348,8 +557,23 @@ def universes_with_authorization(user):
             Universe.notes
         )
     )
+    query = apply_keyset(query, Universe.created_at, Universe.universe_id, cursor, limit)
     universes = db.session.execute(query).scalars().all()
-    return universes 
+    return split_page(universes, limit, 'created_at', 'universe_id')
+
+
+def universe_summaries_query(user, cursor=None, limit=50):
+    query = select(*Universe.summary_columns()).where(
+        Universe.user_id == user.user_id
+    )
+    return apply_keyset(query, Universe.created_at, Universe.universe_id, cursor, limit)
+
+
+def universe_summaries_with_authorization(user, cursor=None, limit=50):
+    """Lean read path: projects only the summary columns and returns plain dicts."""
+    query = universe_summaries_query(user, cursor, limit)
+    rows, next_cursor = split_page(db.session.execute(query).all(), limit, 'created_at', 'universe_id')
+    return Universe.summary_serializer()(rows), next_cursor
 
 
 
@@ -374,10 +598,7 @@ def execute_universe_update(user, universe, data):
     for field in fields:
         if field in data:
             setattr(universe, field, data[field])
-    if 'character_ids' in data and data['character_ids']:
-        add_characters_to_universe(user, universe, data['character_ids'])
-    if 'note_ids' in data and data['note_ids']:
-        add_notes_to_universe(user, universe, data['note_ids'])
+    apply_link_changes(user, 'universes', universe, data)
     if 'location_ids' in data and data['location_ids']:
         add_locations_to_universe(user, universe, data['location_ids'])
 
@@ -469,16 +690,11 @@ def execute_note_update(user,note, data):
     for field in note_fields:
         if field in data:
             setattr(note,field,data[field])
-    if 'character_ids' in data and data['character_ids']:
-        add_characters_to_note(user, note, data['character_ids'])
-    if 'universe_ids' in data and data['universe_ids']:
-        add_universes_to_note(user, note, data['universe_ids'])
-    if 'location_ids' in data and data['location_ids']:
-        add_locations_to_note(user, note, data['location_ids'])
+    apply_link_changes(user, 'notes', note, data)
 
 
 
-def notes_with_authorization(user):
+def notes_with_authorization(user, cursor=None, limit=50):
     query = select(Note).where(
         Note.user_id == user.user_id
     ).options(
@@ -489,24 +705,71 @@ def notes_with_authorization(user):
             Note.universes
         )
     )
+    query = apply_keyset(query, Note.created_at, Note.note_id, cursor, limit)
     notes = db.session.execute(query).scalars().all()
-    return notes
+    return split_page(notes, limit, 'created_at', 'note_id')
 
 
-def load_note_with_relationships(user, note_id):
-    query = select(Note).where(
+def note_summaries_query(user, cursor=None, limit=50):
+    query = select(*Note.summary_columns()).where(
+        Note.user_id == user.user_id
+    )
+    return apply_keyset(query, Note.created_at, Note.note_id, cursor, limit)
+
+
+def note_summaries_with_authorization(user, cursor=None, limit=50):
+    """
+    Lean read path: projects the summary columns, then fetches the linked
+    character/universe names with one association join each.
+    """
+    query = note_summaries_query(user, cursor, limit)
+    rows, next_cursor = split_page(db.session.execute(query).all(), limit, 'created_at', 'note_id')
+    return build_note_summaries(rows), next_cursor
+
+
+def build_note_summaries(rows):
+    """Turns Note.summary_columns() rows into summaries, loading their links in one query per relation."""
+    if not rows:
+        return []
+    character_query, universe_query = note_link_queries([r.note_id for r in rows])
+    return attach_note_links(rows, db.session.execute(character_query), db.session.execute(universe_query))
+
+
+def note_link_queries(note_ids):
+    """(character links, universe links) of the given notes, as (note_id, id, name) rows."""
+    character_query = select(
+        character_notes.c.note_id, Character.character_id, Character.name
+    ).join(
+        Character, Character.character_id == character_notes.c.character_id
+    ).where(character_notes.c.note_id.in_(note_ids))
+    universe_query = select(
+        note_universes.c.note_id, Universe.universe_id, Universe.name
+    ).join(
+        Universe, Universe.universe_id == note_universes.c.universe_id
+    ).where(note_universes.c.note_id.in_(note_ids))
+    return character_query, universe_query
+
+
+def attach_note_links(rows, character_links, universe_links):
+    characters = {r.note_id: [] for r in rows}
+    universes = {r.note_id: [] for r in rows}
+    for link in character_links:
+        characters[link.note_id].append({'id': link.character_id, 'name': link.name})
+    for link in universe_links:
+        universes[link.note_id].append({'id': link.universe_id, 'name': link.name})
+
+    summaries = Note.summary_serializer()(rows)
+    for summary in summaries:
+        summary['characters'] = characters[summary['note_id']]
+        summary['universes'] = universes[summary['note_id']]
+    return summaries
+
+
+def note_detail_query(user, note_id):
+    return select(Note).where(
         Note.user_id == user.user_id,
         Note.note_id == note_id
-    ).options(
-        selectinload(
-            Note.characters
-        ),
-        selectinload(
-            Note.universes
-        )
-    )
-    note = db.session.execute(query).scalar_one_or_none()
-    return note 
+    ).options(*Note.detail_options())
 
 
     
@@ -585,6 +848,9 @@ def validate_location_data(data, partial=False):
         clean_description = data['description'].strip()
         if len(clean_description) > 500:
             return False, 'Description must be less than 500 characters.'
+    if data.get('parent_id') is not None:
+        if not isinstance(data['parent_id'], int) or isinstance(data['parent_id'], bool):
+            return False, 'Parent id must be an integer or null.'
     return True, None
 
 
@@ -602,6 +868,11 @@ def execute_location_creation(user, data):
     fields = ['name', 'location_type', 'description']
     location_data = {k:v for k,v in data.items() if k in fields}
     new_location = Location(**location_data, user_id = user.user_id, universe_id = universe.universe_id)
+    parent = None
+    if data.get('parent_id') is not None:
+        parent = get_parent_location(user, new_location, data['parent_id'])
+        check_location_parent(new_location.location_type, parent.location_type)
+        new_location.parent_id = parent.location_id
     db.session.add(new_location)
     
     if 'character_ids' in data and data['character_ids']:
@@ -609,6 +880,9 @@ def execute_location_creation(user, data):
 
     if 'note_ids' in data and data['note_ids']:
         add_notes_to_location(user, new_location, data['note_ids'])
+    if parent:
+        db.session.flush()
+        attach_location_subtree(new_location.location_id, parent.location_id)
     db.session.commit()
     return new_location
 
@@ -642,7 +916,7 @@ def add_notes_to_location(user, location, note_ids):
         )
     location.notes = valid_notes
 
-def locations_with_authorization_in_universe(user,universe_id):
+def locations_with_authorization_in_universe(user,universe_id, cursor=None, limit=50):
     query = select(Location).where(
         Location.universe_id == universe_id,
         Location.user_id == user.user_id
@@ -650,20 +924,31 @@ def locations_with_authorization_in_universe(user,universe_id):
         selectinload(Location.notes),
         selectinload(Location.characters)
     )
+    query = apply_keyset(query, Location.created_at, Location.location_id, cursor, limit)
     locations = db.session.execute(query).scalars().all()
-    return locations
+    return split_page(locations, limit, 'created_at', 'location_id')
 
 
-def load_location_with_relationships(user,location_id):
-    query = select(Location).where(
+def location_summaries_query(user, universe_id, cursor=None, limit=50):
+    query = select(*Location.summary_columns()).where(
+        Location.universe_id == universe_id,
+        Location.user_id == user.user_id
+    )
+    return apply_keyset(query, Location.created_at, Location.location_id, cursor, limit)
+
+
+def location_summaries_with_authorization_in_universe(user, universe_id, cursor=None, limit=50):
+    """Lean read path: projects only the summary columns and returns plain dicts."""
+    query = location_summaries_query(user, universe_id, cursor, limit)
+    rows, next_cursor = split_page(db.session.execute(query).all(), limit, 'created_at', 'location_id')
+    return Location.summary_serializer()(rows), next_cursor
+
+
+def location_detail_query(user, location_id):
+    return select(Location).where(
         Location.location_id == location_id,
         Location.user_id == user.user_id,
-    ).options(
-        selectinload(Location.notes),
-        selectinload(Location.characters)
-    )
-    location = db.session.execute(query).scalar_one_or_none()
-    return location
+    ).options(*Location.detail_options())
 
 
 def execute_location_update(user,location, data):
@@ -671,18 +956,171 @@ def execute_location_update(user,location, data):
     for field in location_fields:
         if field in data:
             setattr(location, field, data[field])
-    if 'character_ids' in data and data['character_ids']:
-        add_characters_to_location(user,location,data['character_ids'])
-    if 'note_ids' in data and data['note_ids']:
-        add_notes_to_location(user, location, data['note_ids'])
+    if 'parent_id' in data and data['parent_id'] != location.parent_id:
+        move_location(user, location, data['parent_id'])
+    else:
+        check_location_type(location)
+    apply_link_changes(user, 'locations', location, data)
+
+
+
+#! ------------ Location Hierarchy Helper Functions -----------
+
+def get_parent_location(user, location, parent_id):
+    query = select(Location).where(
+        Location.location_id == parent_id,
+        Location.user_id == user.user_id
+    )
+    parent = db.session.execute(query).scalar_one_or_none()
+    if not parent:
+        raise ValueError('Parent location not found.')
+    if parent.universe_id != location.universe_id:
+        raise ValueError('A parent location must be in the same universe.')
+    return parent
+
+
+def check_location_parent(location_type, parent_type):
+    if parent_type.rank >= location_type.rank:
+        raise ValueError(f'A {location_type.value} cannot be inside a {parent_type.value}.')
+
+
+def check_location_children(location):
+    query = select(Location.location_type).where(Location.parent_id == location.location_id).distinct()
+    for child_type in db.session.execute(query).scalars():
+        if child_type.rank <= location.location_type.rank:
+            raise ValueError(f'A {location.location_type.value} cannot contain a {child_type.value}.')
+
+
+def check_location_type(location):
+    """After a location_type change: the type must still sit between the parent's and the children's."""
+    if not inspect_instance(location).attrs.location_type.history.has_changes():
+        return
+    if location.parent_id is not None:
+        parent_type = db.session.scalar(select(Location.location_type).where(Location.location_id == location.parent_id))
+        check_location_parent(location.location_type, parent_type)
+    check_location_children(location)
+
+
+def _descendant_ids(location_id, include_self=False):
+    """
+    Ids below `location_id` (and itself), selected through a derived table: MySQL
+    refuses a subquery on the table a DELETE or UPDATE is changing, unless it is one.
+    """
+    ids = select(location_closure.c.descendant_id.label('location_id')).where(location_closure.c.ancestor_id == location_id)
+    if include_self:
+        ids = union_all(select(literal(location_id).label('location_id')), ids)
+    derived = ids.subquery()
+    return select(derived.c.location_id)
+
+
+def _ancestor_ids(location_id):
+    return db.session.execute(
+        select(location_closure.c.ancestor_id).where(location_closure.c.descendant_id == location_id)
+    ).scalars().all()
+
+
+def attach_location_subtree(location_id, parent_id):
+    """Adds the closure rows linking `location_id` and everything below it to `parent_id` and everything above it."""
+    closure = location_closure.c
+    above = union_all(
+        select(literal(parent_id).label('ancestor_id'), literal(0).label('depth')),
+        select(closure.ancestor_id, closure.depth).where(closure.descendant_id == parent_id)
+    ).subquery('above')
+    below = union_all(
+        select(literal(location_id).label('descendant_id'), literal(0).label('depth')),
+        select(closure.descendant_id, closure.depth).where(closure.ancestor_id == location_id)
+    ).subquery('below')
+    db.session.execute(insert(location_closure).from_select(
+        ['ancestor_id', 'descendant_id', 'depth'],
+        select(above.c.ancestor_id, below.c.descendant_id, above.c.depth + below.c.depth + 1)
+        .select_from(above.join(below, true()))
+    ))
+
+
+def detach_location_subtree(location_id):
+    """Removes the closure rows linking `location_id` and everything below it to its current ancestors."""
+    ancestors = _ancestor_ids(location_id)
+    if ancestors:
+        db.session.execute(delete(location_closure).where(
+            location_closure.c.ancestor_id.in_(ancestors),
+            location_closure.c.descendant_id.in_(_descendant_ids(location_id, include_self=True))
+        ))
+
+
+def move_location(user, location, parent_id):
+    """
+    Re-parents `location` and its whole subtree (`parent_id` None makes it a root).
+    Whatever the subtree's size, the closure is rewritten by one DELETE and one INSERT.
+    """
+    parent = get_parent_location(user, location, parent_id) if parent_id is not None else None
+    if parent:
+        inside = db.session.scalar(select(location_closure.c.depth).where(
+            location_closure.c.ancestor_id == location.location_id,
+            location_closure.c.descendant_id == parent.location_id
+        ))
+        if parent.location_id == location.location_id or inside is not None:
+            raise ValueError('A location cannot be moved inside itself.')
+        check_location_parent(location.location_type, parent.location_type)
+    if inspect_instance(location).attrs.location_type.history.has_changes():
+        check_location_children(location)
+    detach_location_subtree(location.location_id)
+    location.parent_id = parent_id
+    if parent:
+        attach_location_subtree(location.location_id, parent.location_id)
+
+
+def remove_location_from_hierarchy(location):
+    """
+    Call before deleting a location: its children move up to its parent, and the
+    closure rows across it are shortened by one. Its own rows cascade with it.
+    """
+    ancestors = _ancestor_ids(location.location_id)
+    if ancestors:
+        db.session.execute(update(location_closure).where(
+            location_closure.c.ancestor_id.in_(ancestors),
+            location_closure.c.descendant_id.in_(_descendant_ids(location.location_id))
+        ).values(depth=location_closure.c.depth - 1))
+    # Their payload shows parent_id, so the version moves too (the bulk UPDATE bypasses the flush hook).
+    db.session.execute(
+        update(Location).where(Location.parent_id == location.location_id)
+        .values(parent_id=location.parent_id, version=Location.version + 1, updated_at=datetime.utcnow()),
+        execution_options={'synchronize_session': False}
+    )
+
+
+def location_descendants_query(location_id, max_depth=None, cursor=None, limit=50):
+    query = select(*Location.summary_columns(), location_closure.c.depth).join(
+        location_closure, location_closure.c.descendant_id == Location.location_id
+    ).where(location_closure.c.ancestor_id == location_id)
+    if max_depth is not None:
+        query = query.where(location_closure.c.depth <= max_depth)
+    return apply_keyset(query, Location.created_at, Location.location_id, cursor, limit)
+
+
+def location_descendants(location_id, max_depth=None, cursor=None, limit=50):
+    """Everything inside the location at any depth (or within `max_depth` levels), one page at a time."""
+    query = location_descendants_query(location_id, max_depth, cursor, limit)
+    rows, next_cursor = split_page(db.session.execute(query).all(), limit, 'created_at', 'location_id')
+    return Location.hierarchy_serializer()(rows), next_cursor
+
+
+def location_ancestors_query(location_id):
+    return select(*Location.summary_columns(), location_closure.c.depth).join(
+        location_closure, location_closure.c.ancestor_id == Location.location_id
+    ).where(location_closure.c.descendant_id == location_id).order_by(location_closure.c.depth.desc())
+
+
+def location_ancestors(location_id):
+    """The locations enclosing this one, outermost first."""
+    return Location.hierarchy_serializer()(db.session.execute(location_ancestors_query(location_id)).all())
 
 
 #!------------ User Helper Function ----------
 
 def execute_get_all_users():
-    query = select(User)
-    all_users = db.session.execute(query).scalars().all()
-    return all_users
+    """Every user as a to_dict() summary, read as columns without building User objects."""
+    query = select(*User.summary_columns())
+    return User.summary_serializer()(db.session.execute(query).all())
 
 
 
@@ -695,9 +1133,6 @@ def execute_user_creation(data):
     
     fields = ['name', 'username', 'email', 'password', 'bio', 'is_admin']
     user_data = {k:v for k,v in data.items() if k in fields}
-    if 'password' in user_data:
-        user_data['password'] = bcrypt.generate_password_hash(user_data['password']).decode('utf-8')
-
     new_user = User(**user_data)
     db.session.add(new_user)
     db.session.commit()
@@ -709,6 +1144,7 @@ def execute_user_update(user, data):
     for field in updatable_fields:
         if field in data:
             setattr(user, field, data[field])
+    invalidate_cached_user(user.user_id)
     if 'universe_ids' in data and data['universe_ids']:
         add_universes_to_character(user, data['universe_ids'])
     
@@ -798,3 +1234,1027 @@ def get_user_by_id(user_id):
     return user
 
 
+
+#! ------------ Dashboard Helper Functions -----------
+
+# Per kind: (model, id column, label column), for the recent-items query.
+DASHBOARD_RECENT = {
+    'characters': (Character, Character.character_id, Character.name),
+    'notes': (Note, Note.note_id, Note.title),
+    'locations': (Location, Location.location_id, Location.name),
+}
+
+
+def dashboard_recent_query(user_id, limit):
+    """The `limit` most recently modified characters, notes and locations, as one UNION ALL."""
+    branches = []
+    for kind, (model, id_column, label_column) in DASHBOARD_RECENT.items():
+        latest = select(
+            literal(kind).label('kind'), id_column.label('id'), label_column.label('name'), model.updated_at
+        ).where(model.user_id == user_id).order_by(model.updated_at.desc()).limit(limit).subquery()
+        branches.append(select(latest))
+    return union_all(*branches)
+
+
+def recent_universes_query(user_id, limit):
+    """Summaries of the user's `limit` most recently modified universes, for profile-style responses."""
+    return select(*Universe.summary_columns()).where(Universe.user_id == user_id).order_by(
+        Universe.updated_at.desc()
+    ).limit(limit)
+
+
+def recent_universe_summaries(user_id, limit):
+    return Universe.summary_serializer()(db.session.execute(recent_universes_query(user_id, limit)).all())
+
+
+def build_dashboard(user_id, recent_limit, universe_limit):
+    """
+    Everything the landing page needs in three queries: the profile row (which carries
+    the record counters), the most recently modified universes with their counters,
+    and the recent characters, notes and locations. The result is cached until the
+    user's collection version moves or the cache TTL passes.
+    """
+    profile = db.session.execute(select(
+        User.user_id, User.username, User.email, User.name, User.bio, User.is_admin, User.created_at,
+        User.universe_count, User.character_count, User.note_count, User.location_count, User.collection_version
+    ).where(User.user_id == user_id)).one_or_none()
+    if profile is None:
+        return None
+    key = (user_id, profile.collection_version)
+    dashboard = dashboard_cache.get(key)
+    if dashboard is not None:
+        return dashboard
+
+    recent = {kind: [] for kind in DASHBOARD_RECENT}
+    rows = db.session.execute(dashboard_recent_query(user_id, recent_limit)).all()
+    for row in sorted(rows, key=lambda r: r.updated_at, reverse=True):
+        recent[row.kind].append({'id': row.id, 'name': row.name, 'updated_at': row.updated_at})
+
+    dashboard = {
+        'profile': {
+            'user_id': profile.user_id,
+            'username': profile.username,
+            'email': profile.email,
+            'name': profile.name,
+            'bio': profile.bio,
+            'is_admin': profile.is_admin,
+            'created_at': profile.created_at
+        },
+        'counts': {
+            'universes': profile.universe_count,
+            'characters': profile.character_count,
+            'notes': profile.note_count,
+            'locations': profile.location_count
+        },
+        'universes': recent_universe_summaries(user_id, universe_limit),
+        'recent': recent
+    }
+    dashboard_cache.set(key, dashboard)
+    return dashboard
+
+
+
+#! ------------ Bulk Helper Functions -----------
+
+def validate_bulk_data(data):
+    items = data.get('items')
+    max_items = current_app.config.get('BULK_MAX_ITEMS', 1000)
+    if not isinstance(items, list) or not items:
+        return False, 'Items must be a non-empty list.'
+    if len(items) > max_items:
+        return False, f'A bulk request can contain at most {max_items} items.'
+    if 'atomic' in data and not isinstance(data['atomic'], bool):
+        return False, 'Atomic must be a boolean.'
+    return True, None
+
+
+# Each relation: (payload key, target model, target id column, association table, own column, target column)
+BULK_SPECS = {
+    'characters': {
+        'model': Character,
+        'id_key': 'character_id',
+        'fields': ['name', 'age', 'origin', 'main_power_set', 'secondary_power_set', 'skills'],
+        'unique': ['main_power_set', 'secondary_power_set'],
+        'validate': validate_character_data,
+        'parent': None,
+        'relations': [
+            ('universe_ids', Universe, Universe.universe_id, character_universes, 'character_id', 'universe_id'),
+            ('note_ids', Note, Note.note_id, character_notes, 'character_id', 'note_id'),
+            ('location_ids', Location, Location.location_id, character_locations, 'character_id', 'location_id'),
+        ],
+        'summarize': Character.summary_serializer(),
+        'check': None,
+    },
+    'universes': {
+        'model': Universe,
+        'id_key': 'universe_id',
+        'fields': ['name', 'description', 'alignment'],
+        'unique': [],
+        'validate': validate_universe_data,
+        'parent': None,
+        'relations': [
+            ('character_ids', Character, Character.character_id, character_universes, 'universe_id', 'character_id'),
+            ('note_ids', Note, Note.note_id, note_universes, 'universe_id', 'note_id'),
+        ],
+        'summarize': Universe.summary_serializer(),
+        'check': None,
+    },
+    'notes': {
+        'model': Note,
+        'id_key': 'note_id',
+        'fields': ['title', 'content'],
+        'unique': [],
+        'validate': validate_note_data,
+        'parent': None,
+        'relations': [
+            ('character_ids', Character, Character.character_id, character_notes, 'note_id', 'character_id'),
+            ('universe_ids', Universe, Universe.universe_id, note_universes, 'note_id', 'universe_id'),
+            ('location_ids', Location, Location.location_id, location_notes, 'note_id', 'location_id'),
+        ],
+        'summarize': build_note_summaries,
+        'check': None,
+    },
+    'locations': {
+        'model': Location,
+        'id_key': 'location_id',
+        'fields': ['name', 'location_type', 'description'],
+        'unique': [],
+        'validate': validate_location_data,
+        'parent': ('universe_id', Universe, Universe.universe_id),
+        'relations': [
+            ('character_ids', Character, Character.character_id, character_locations, 'location_id', 'character_id'),
+            ('note_ids', Note, Note.note_id, location_notes, 'location_id', 'note_id'),
+        ],
+        'summarize': Location.summary_serializer(),
+        # A changed location_type must still fit between the parent's and the children's.
+        'check': check_location_type,
+    },
+}
+
+
+def _bulk_reference_ids(item, key):
+    value = item.get(key)
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _bulk_validate_items(spec, items, errors, partial):
+    entries = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({'index': index, 'Error': 'Each item must be an object.'})
+            continue
+        if partial and not isinstance(item.get(spec['id_key']), int):
+            errors.append({'index': index, 'Error': f"{spec['id_key']} is required."})
+            continue
+        is_valid, error_msg = spec['validate'](item, partial=partial)
+        if not is_valid:
+            errors.append({'index': index, 'Error': error_msg})
+            continue
+        entries.append((index, item))
+    return entries
+
+
+def _bulk_check_references(user, spec, entries, errors, creating):
+    """
+    Resolves every referenced id with one ownership IN query per relation type
+    and drops the items that reference anything the user does not own.
+    """
+    references = [(key, model, column) for key, model, column, *_ in spec['relations']]
+    if creating and spec['parent']:
+        references.append(spec['parent'])
+
+    owned = {}
+    for key, model, column in references:
+        ids = set()
+        for _, item in entries:
+            ids.update(i for i in _bulk_reference_ids(item, key) if isinstance(i, int))
+        if ids:
+            query = select(column).where(model.user_id == user.user_id, column.in_(ids))
+            owned[key] = set(db.session.execute(query).scalars())
+        else:
+            owned[key] = set()
+
+    kept = []
+    for index, item in entries:
+        for key, model, _ in references:
+            ids = _bulk_reference_ids(item, key)
+            if not all(isinstance(i, int) for i in ids):
+                errors.append({'index': index, 'Error': f'{key} must only contain integers.'})
+                break
+            if not set(ids) <= owned[key]:
+                errors.append({
+                    'index': index,
+                    'Error': f'You do not have permission to access one or more of the {model.__tablename__.capitalize()}.'
+                })
+                break
+        else:
+            kept.append((index, item))
+    return kept
+
+
+def _bulk_check_unique(spec, built, errors):
+    """Rejects items whose unique fields clash with each other or with existing rows (one IN query per field)."""
+    model = spec['model']
+    id_column = getattr(model, spec['id_key'])
+    rejected = set()
+    for field in spec['unique']:
+        column = getattr(model, field)
+        claimed = {}
+        for index, _, obj in built:
+            claimed.setdefault(getattr(obj, field), []).append((index, getattr(obj, spec['id_key'])))
+        taken = dict(db.session.execute(
+            select(column, id_column).where(column.in_(list(claimed)))
+        ).all())
+        for value, claimants in claimed.items():
+            for position, (index, own_id) in enumerate(claimants):
+                in_use = value in taken and taken[value] != own_id
+                if (in_use or position > 0) and index not in rejected:
+                    rejected.add(index)
+                    errors.append({'index': index, 'Error': f"{field.replace('_', ' ').capitalize()} '{value}' is already in use."})
+    return [entry for entry in built if entry[0] not in rejected]
+
+
+def _bulk_write_links(spec, built, replace):
+    """Writes association rows for every relation with one executemany INSERT (and one DELETE when replacing)."""
+    id_key = spec['id_key']
+    for key, _, _, table, own_column, target_column in spec['relations']:
+        targets = [(getattr(obj, id_key), set(item[key])) for _, item, obj in built if item.get(key)]
+        if not targets:
+            continue
+        if replace:
+            owners = table.c[own_column].in_([own_id for own_id, _ in targets])
+            uncount_links(db.session, table, owners)
+            db.session.execute(delete(table).where(owners))
+        rows = [{own_column: own_id, target_column: target_id} for own_id, ids in targets for target_id in ids]
+        db.session.execute(insert(table), rows)
+        count_links(db.session, table, rows)
+
+
+def bulk_summaries(kind, ids):
+    """Loads summaries for `ids` through the lean projection path, in the order given."""
+    if not ids:
+        return []
+    spec = BULK_SPECS[kind]
+    model = spec['model']
+    query = select(*model.summary_columns()).where(getattr(model, spec['id_key']).in_(ids))
+    by_id = {s[spec['id_key']]: s for s in spec['summarize'](db.session.execute(query).all())}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def execute_bulk_creation(user, kind, items, atomic=False):
+    """
+    Validates every item, then inserts all valid ones and their links in one transaction.
+    Returns (summaries, errors); with `atomic` any error means nothing is written.
+    """
+    spec = BULK_SPECS[kind]
+    model = spec['model']
+    errors = []
+    entries = _bulk_validate_items(spec, items, errors, partial=False)
+    entries = _bulk_check_references(user, spec, entries, errors, creating=True)
+
+    built = []
+    for index, item in entries:
+        fields = {k: v for k, v in item.items() if k in spec['fields']}
+        if spec['parent']:
+            fields[spec['parent'][0]] = item[spec['parent'][0]]
+        try:
+            built.append((index, item, model(**fields, user_id=user.user_id)))
+        except (ValueError, TypeError) as e:
+            errors.append({'index': index, 'Error': str(e)})
+    built = _bulk_check_unique(spec, built, errors)
+
+    errors.sort(key=lambda e: e['index'])
+    if not built or (errors and atomic):
+        return [], errors
+
+    objects = [obj for _, _, obj in built]
+    db.session.add_all(objects)
+    db.session.flush()
+    _bulk_write_links(spec, built, replace=False)
+    ids = [getattr(obj, spec['id_key']) for obj in objects]
+    db.session.commit()
+    return bulk_summaries(kind, ids), errors
+
+
+def execute_bulk_update(user, kind, items, atomic=False):
+    """
+    Applies partial updates to many owned items in one transaction.
+    Relation lists that are present replace the existing links, like the single-item PATCH.
+    """
+    spec = BULK_SPECS[kind]
+    model = spec['model']
+    id_column = getattr(model, spec['id_key'])
+    errors = []
+    entries = _bulk_validate_items(spec, items, errors, partial=True)
+
+    requested = {item[spec['id_key']] for _, item in entries}
+    query = select(model).where(model.user_id == user.user_id, id_column.in_(requested))
+    targets = {getattr(obj, spec['id_key']): obj for obj in db.session.execute(query).scalars()}
+    entries = _bulk_check_references(user, spec, entries, errors, creating=False)
+
+    with db.session.no_autoflush:
+        built = []
+        for index, item in entries:
+            obj = targets.get(item[spec['id_key']])
+            if obj is None:
+                errors.append({'index': index, 'Error': 'Item not found.'})
+                continue
+            try:
+                for field in spec['fields']:
+                    if field in item:
+                        setattr(obj, field, item[field])
+                if spec['check']:
+                    spec['check'](obj)
+            except (ValueError, TypeError) as e:
+                db.session.expire(obj)
+                errors.append({'index': index, 'Error': str(e)})
+                continue
+            built.append((index, item, obj))
+        kept = _bulk_check_unique(spec, built, errors)
+        kept_indexes = {index for index, _, _ in kept}
+        for index, _, obj in built:
+            if index not in kept_indexes:
+                db.session.expire(obj)
+
+    errors.sort(key=lambda e: e['index'])
+    if not kept or (errors and atomic):
+        db.session.rollback()
+        return [], errors
+
+    _bulk_write_links(spec, kept, replace=True)
+    # Link-only changes leave the rows clean, so the flush hook would not see them.
+    touch_collections(db.session, [user.user_id])
+    ids = [getattr(obj, spec['id_key']) for _, _, obj in kept]
+    db.session.commit()
+    return bulk_summaries(kind, ids), errors
+
+
+def bulk_request(user, kind, creating):
+    """The POST (`creating`) and PATCH /bulk routes of every kind in BULK_SPECS."""
+    data = request.get_json() or {}
+    is_valid, error_msg = validate_bulk_data(data)
+    if not is_valid:
+        return jsonify({
+            'Error': error_msg
+        }), 400
+    execute = execute_bulk_creation if creating else execute_bulk_update
+    try:
+        summaries, errors = execute(user, kind, data['items'], data.get('atomic', False))
+        return jsonify({
+            'Message': f'{len(summaries)} of {len(data["items"])} {kind} {"created" if creating else "updated"}.',
+            kind.capitalize(): summaries,
+            'errors': errors
+        }), (201 if creating else 200) if summaries else 400
+    except IntegrityError as e:
+        db.session.rollback()
+        print(f'Error: {str(e)}')
+        return jsonify({
+            'Error': 'Batch conflicts with existing data.'
+        }), 409
+    except Exception as e:
+        db.session.rollback()
+        print(f'Error: {str(e)}')
+        return jsonify({
+            'Error': 'Server Error.'
+        }), 500
+
+
+
+
+#! ------------ Link Helper Functions -----------
+
+def _link_ids(data, key):
+    ids = data.get(key)
+    if ids is None:
+        return set()
+    if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        raise ValueError(f'{key.replace("_", " ").capitalize()} must be a list of integers.')
+    return set(ids)
+
+
+def apply_link_changes(user, kind, obj, data):
+    """
+    Edits the association rows of an existing `obj` straight from a PATCH payload,
+    without loading any collection. For each relation, e.g. note_ids on a character:
+
+        note_ids         replaces the links (ignored when empty, as before)
+        add_note_ids     links these notes; links that already exist are skipped
+        remove_note_ids  unlinks these notes
+
+    Added ids are ownership-checked with one IN query, and each relation then costs at
+    most one SELECT of existing link ids, one INSERT and one DELETE, plus the counter
+    UPDATEs when the links are to or from universes (see models/counters.py).
+    Returns True when any link changed.
+    """
+    spec = BULK_SPECS[kind]
+    own_id = getattr(obj, spec['id_key'])
+    changed = False
+    for key, model, column, table, own_column, target_column in spec['relations']:
+        replace = _link_ids(data, key)
+        add = _link_ids(data, f'add_{key}')
+        remove = _link_ids(data, f'remove_{key}')
+        if not (replace or add or remove):
+            continue
+        if add & remove:
+            raise ValueError(f'The same id cannot be in both add_{key} and remove_{key}.')
+        wanted = replace | add
+        if wanted:
+            owned = set(db.session.execute(
+                select(column).where(model.user_id == user.user_id, column.in_(wanted))
+            ).scalars())
+            if owned != wanted:
+                raise PermissionError(
+                    f'You do not have permission to access one or more of the {model.__tablename__.capitalize()}.'
+                )
+
+        own, target = table.c[own_column] == own_id, table.c[target_column]
+        if replace:
+            existing = set(db.session.execute(select(target).where(own)).scalars())
+            final = wanted - remove
+            inserts, deletes = final - existing, existing - final
+        else:
+            existing = set(db.session.execute(select(target).where(own, target.in_(add | remove))).scalars())
+            inserts, deletes = add - existing, remove & existing
+        if inserts:
+            rows = [{own_column: own_id, target_column: i} for i in sorted(inserts)]
+            db.session.execute(insert(table), rows)
+            count_links(db.session, table, rows)
+            changed = True
+        if deletes:
+            db.session.execute(delete(table).where(own, target.in_(deletes)))
+            count_links(db.session, table, [{own_column: own_id, target_column: i} for i in deletes], -1)
+            changed = True
+        # A collection loaded earlier in this session would now be stale.
+        db.session.expire(obj, [key[:-len('_ids')] + 's'])
+
+    if changed:
+        # Link-only changes leave the rows clean, so the flush hook would not see them.
+        touch_collections(db.session, [user.user_id])
+    return changed
+
+#! ------------ Export Helper Functions -----------
+
+EXPORT_FORMAT = 'harmonic-universe-export'
+EXPORT_VERSION = 1
+
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+
+def _export_line(record_type, row):
+    data = {key: _export_value(value) for key, value in row._mapping.items()}
+    return json.dumps({'type': record_type, 'data': data}, separators=(',', ':')) + '\n'
+
+
+def universe_export_queries(universe_id):
+    """
+    (record type, query) pairs covering a universe, its entities and every link
+    between them. Links are only exported when both ends are part of the archive.
+    """
+    character_ids = select(character_universes.c.character_id).where(character_universes.c.universe_id == universe_id)
+    note_ids = select(note_universes.c.note_id).where(note_universes.c.universe_id == universe_id)
+    location_ids = select(Location.location_id).where(Location.universe_id == universe_id)
+    return [
+        ('universe', select(Universe.__table__).where(Universe.universe_id == universe_id)),
+        ('character', select(Character.__table__).where(Character.character_id.in_(character_ids))),
+        ('note', select(Note.__table__).where(Note.note_id.in_(note_ids))),
+        # Shallowest first, so an importer always meets a parent before its children.
+        ('location', select(Location.__table__).where(Location.universe_id == universe_id).order_by(
+            select(func.count()).where(location_closure.c.descendant_id == Location.location_id).scalar_subquery(),
+            Location.location_id
+        )),
+        ('character_universe', select(character_universes).where(character_universes.c.universe_id == universe_id)),
+        ('note_universe', select(note_universes).where(note_universes.c.universe_id == universe_id)),
+        ('character_location', select(character_locations).where(
+            character_locations.c.location_id.in_(location_ids),
+            character_locations.c.character_id.in_(character_ids)
+        )),
+        ('location_note', select(location_notes).where(
+            location_notes.c.location_id.in_(location_ids),
+            location_notes.c.note_id.in_(note_ids)
+        )),
+        ('character_note', select(character_notes).where(
+            character_notes.c.character_id.in_(character_ids),
+            character_notes.c.note_id.in_(note_ids)
+        )),
+    ]
+
+
+def stream_universe_export(universe_id, compress=False, chunk_size=1000):
+    """
+    Yields the universe as NDJSON bytes, optionally gzipped on the fly.
+    Rows are fetched `chunk_size` at a time (server-side cursor where the driver has one),
+    so memory use does not grow with the size of the universe.
+    """
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def emit(text):
+        data = text.encode('utf-8')
+        return compressor.compress(data) if compressor else data
+
+    yield emit(json.dumps({
+        'type': 'header',
+        'format': EXPORT_FORMAT,
+        'version': EXPORT_VERSION,
+        'universe_id': universe_id,
+        'exported_at': datetime.utcnow().isoformat()
+    }, separators=(',', ':')) + '\n')
+
+    for record_type, query in universe_export_queries(universe_id):
+        result = db.session.execute(query.execution_options(yield_per=chunk_size))
+        for partition in result.partitions():
+            chunk = emit(''.join(_export_line(record_type, row) for row in partition))
+            if chunk:
+                yield chunk
+
+    if compressor:
+        yield compressor.flush()
+
+
+
+#! ------------ Import Helper Functions -----------
+
+# Entity record types in dependency order, mapped to their BULK_SPECS entry.
+IMPORT_ENTITIES = {
+    'universe': 'universes',
+    'character': 'characters',
+    'note': 'notes',
+    'location': 'locations',
+}
+
+# Link record type: (association table, (column, record type it points at) for each end)
+IMPORT_LINKS = {
+    'character_universe': (character_universes, ('character_id', 'character'), ('universe_id', 'universe')),
+    'note_universe': (note_universes, ('note_id', 'note'), ('universe_id', 'universe')),
+    'character_location': (character_locations, ('character_id', 'character'), ('location_id', 'location')),
+    'location_note': (location_notes, ('location_id', 'location'), ('note_id', 'note')),
+    'character_note': (character_notes, ('character_id', 'character'), ('note_id', 'note')),
+}
+
+IMPORT_MAX_REPORTED_ERRORS = 100
+
+
+def iter_ndjson_lines(stream, read_size=64 * 1024):
+    """Yields raw lines from a plain or gzipped byte stream, a block at a time."""
+    block = stream.read(read_size)
+    decompressor = zlib.decompressobj(wbits=47) if block[:2] == b'\x1f\x8b' else None
+    buffer = b''
+    while block:
+        buffer += decompressor.decompress(block) if decompressor else block
+        *lines, buffer = buffer.split(b'\n')
+        for line in lines:
+            if line.strip():
+                yield line
+        block = stream.read(read_size)
+    if decompressor:
+        buffer += decompressor.flush()
+    for line in buffer.split(b'\n'):
+        if line.strip():
+            yield line
+
+
+def start_universe_import(user, resume_id=None):
+    """Creates a checkpoint, or loads the caller's unfinished one when resuming."""
+    if resume_id:
+        query = select(ImportCheckpoint).where(
+            ImportCheckpoint.import_id == resume_id,
+            ImportCheckpoint.user_id == user.user_id,
+            ImportCheckpoint.status != 'completed'
+        )
+        checkpoint = db.session.execute(query).scalar_one_or_none()
+        if not checkpoint:
+            raise ValueError('No unfinished import found to resume.')
+        checkpoint.status = 'running'
+    else:
+        checkpoint = ImportCheckpoint(import_id=str(uuid.uuid4()), user_id=user.user_id)
+        db.session.add(checkpoint)
+    db.session.commit()
+    return checkpoint
+
+
+def load_import_id_map(import_id):
+    query = select(import_id_map.c.record_type, import_id_map.c.old_id, import_id_map.c.new_id).where(
+        import_id_map.c.import_id == import_id
+    )
+    return {(r.record_type, r.old_id): r.new_id for r in db.session.execute(query)}
+
+
+def _import_entities(user, record_type, records, id_map, errors):
+    """Validates one chunk of entity records and bulk inserts the valid ones. Returns new map rows."""
+    spec = BULK_SPECS[IMPORT_ENTITIES[record_type]]
+    model = spec['model']
+    columns = set(model.__table__.columns.keys())
+    record_types = {plural: singular for singular, plural in IMPORT_ENTITIES.items()}
+    built = []
+    created_ats = {}
+    for line_no, data in records:
+        old_id = data.get(spec['id_key'])
+        fields = {k: data[k] for k in spec['fields'] if data.get(k) is not None}
+        if spec['parent']:
+            parent_key, parent_model, _ = spec['parent']
+            fields[parent_key] = id_map.get((record_types[parent_model.__tablename__], data.get(parent_key)))
+        is_valid, error_msg = spec['validate'](fields)
+        if spec['parent'] and fields[parent_key] is None:
+            is_valid, error_msg = False, f'{record_type} refers to a {parent_model.__tablename__[:-1]} that was not imported.'
+        if not isinstance(old_id, int):
+            is_valid, error_msg = False, f"{spec['id_key']} must be an integer."
+        if not is_valid:
+            errors.append({'line': line_no, 'Error': error_msg})
+            continue
+        try:
+            # Transient instance: runs the model validators without joining the session.
+            obj = model(**fields, user_id=user.user_id)
+        except (ValueError, TypeError) as e:
+            errors.append({'line': line_no, 'Error': str(e)})
+            continue
+        built.append((line_no, old_id, obj))
+        created_ats[line_no] = data.get('created_at')
+
+    rejected = []
+    kept = _bulk_check_unique(spec, built, rejected)
+    errors.extend({'line': e['index'], 'Error': e['Error']} for e in rejected)
+    if not kept:
+        return []
+
+    rows = []
+    for line_no, old_id, obj in kept:
+        values = {k: v for k, v in inspect_instance(obj).dict.items() if k in columns}
+        created_at = created_ats[line_no]
+        if isinstance(created_at, str):
+            try:
+                values['created_at'] = datetime.fromisoformat(created_at)
+            except ValueError:
+                pass
+        rows.append(values)
+    id_column = getattr(model, spec['id_key'])
+    if db.session.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        new_ids = db.session.execute(
+            insert(model).returning(id_column, sort_by_parameter_order=True), rows
+        ).scalars().all()
+    else:
+        # e.g. MySQL: no RETURNING, so one INSERT per row and its generated key, as the ORM flush in bulk does.
+        connection = db.session.connection()
+        new_ids = [connection.execute(insert(model), row).inserted_primary_key[0] for row in rows]
+    count_records(db.session, model, rows)
+    return [
+        {'record_type': record_type, 'old_id': old_id, 'new_id': new_id}
+        for (_, old_id, _), new_id in zip(kept, new_ids)
+    ]
+
+
+def _import_links(record_type, records, id_map, errors):
+    table, (left_column, left_type), (right_column, right_type) = IMPORT_LINKS[record_type]
+    rows = set()
+    for line_no, data in records:
+        left = id_map.get((left_type, data.get(left_column)))
+        right = id_map.get((right_type, data.get(right_column)))
+        if left is None or right is None:
+            errors.append({'line': line_no, 'Error': f'{record_type} refers to a record that was not imported.'})
+            continue
+        rows.add((left, right))
+    if rows:
+        rows = [{left_column: l, right_column: r} for l, r in rows]
+        db.session.execute(insert(table), rows)
+        count_links(db.session, table, rows)
+    return len(rows)
+
+
+def _import_location_parents(records, id_map, errors):
+    """
+    Re-links a chunk's freshly inserted locations to their imported parents, which the
+    export puts first (earlier chunk, or earlier in this one). Each child then gets its
+    closure rows from attach_location_subtree, parents before children. A location whose
+    parent is missing or out of rank is kept as a root and reported.
+    """
+    pending = {}
+    for line_no, data in records:
+        new_id = id_map.get(('location', data.get('location_id')))
+        if new_id is None or data.get('parent_id') is None:
+            continue
+        parent_id = id_map.get(('location', data['parent_id']))
+        if parent_id is None:
+            errors.append({'line': line_no, 'Error': 'location refers to a parent location that was not imported; imported without a parent.'})
+            continue
+        pending[new_id] = (line_no, parent_id)
+    if not pending:
+        return
+
+    ids = set(pending) | {parent_id for _, parent_id in pending.values()}
+    types = dict(db.session.execute(
+        select(Location.location_id, Location.location_type).where(Location.location_id.in_(ids))
+    ).all())
+    ordered = []
+    while pending:
+        ready = [new_id for new_id, (_, parent_id) in pending.items() if parent_id not in pending]
+        if not ready:
+            for line_no, _ in pending.values():
+                errors.append({'line': line_no, 'Error': 'location parents form a cycle; imported without a parent.'})
+            break
+        for new_id in ready:
+            line_no, parent_id = pending.pop(new_id)
+            try:
+                check_location_parent(types[new_id], types[parent_id])
+            except ValueError as e:
+                errors.append({'line': line_no, 'Error': f'{e} Imported without a parent.'})
+                continue
+            ordered.append((new_id, parent_id))
+    if not ordered:
+        return
+
+    locations = Location.__table__
+    db.session.execute(
+        update(locations).where(locations.c.location_id == bindparam('child_id')).values(parent_id=bindparam('new_parent_id')),
+        [{'child_id': new_id, 'new_parent_id': parent_id} for new_id, parent_id in ordered]
+    )
+    for new_id, parent_id in ordered:
+        attach_location_subtree(new_id, parent_id)
+
+
+def _import_chunk(user, checkpoint, chunk, id_map, errors, created):
+    """Writes one chunk (entities first, then links) and advances the checkpoint in the same transaction."""
+    by_type = {}
+    for line_no, record_type, data in chunk:
+        by_type.setdefault(record_type, []).append((line_no, data))
+
+    for record_type in IMPORT_ENTITIES:
+        if record_type not in by_type:
+            continue
+        mapped = _import_entities(user, record_type, by_type[record_type], id_map, errors)
+        if mapped:
+            db.session.execute(insert(import_id_map), [dict(m, import_id=checkpoint.import_id) for m in mapped])
+            id_map.update({(m['record_type'], m['old_id']): m['new_id'] for m in mapped})
+            created[record_type] = created.get(record_type, 0) + len(mapped)
+            if record_type == 'universe':
+                created.setdefault('universe_ids', []).extend(m['new_id'] for m in mapped)
+            if record_type == 'location':
+                _import_location_parents(by_type[record_type], id_map, errors)
+
+    for record_type in IMPORT_LINKS:
+        if record_type in by_type:
+            count = _import_links(record_type, by_type[record_type], id_map, errors)
+            created[record_type] = created.get(record_type, 0) + count
+
+    checkpoint.lines_processed = chunk[-1][0]
+    touch_collections(db.session, [user.user_id])
+    db.session.commit()
+
+
+def execute_universe_import(user, stream, checkpoint, chunk_size=1000, on_chunk=None):
+    """
+    Imports an NDJSON archive (as written by the export route) into the user's account.
+    Records are parsed as they arrive and written chunk by chunk; archive ids are remapped
+    to new ids through an in-memory map that is also persisted for resuming.
+    Lines already covered by the checkpoint are skipped. `on_chunk(lines_processed)` is
+    called after each chunk is committed.
+    Returns (created counts, errors).
+    """
+    id_map = load_import_id_map(checkpoint.import_id)
+    skip_through = checkpoint.lines_processed
+    errors = []
+    created = {}
+    chunk = []
+    for line_no, line in enumerate(iter_ndjson_lines(stream), start=1):
+        if line_no <= skip_through:
+            continue
+        try:
+            record = json.loads(line)
+            record_type, data = record['type'], record.get('data')
+        except (ValueError, TypeError, KeyError):
+            errors.append({'line': line_no, 'Error': 'Line is not a valid archive record.'})
+            continue
+        if record_type == 'header':
+            if record.get('format') != EXPORT_FORMAT:
+                raise ValueError('Unrecognised archive format.')
+            continue
+        if (record_type not in IMPORT_ENTITIES and record_type not in IMPORT_LINKS) or not isinstance(data, dict):
+            errors.append({'line': line_no, 'Error': f'Unknown record type: {record_type}'})
+            continue
+        chunk.append((line_no, record_type, data))
+        if len(chunk) >= chunk_size:
+            _import_chunk(user, checkpoint, chunk, id_map, errors, created)
+            chunk = []
+            if on_chunk:
+                on_chunk(checkpoint.lines_processed)
+    if chunk:
+        _import_chunk(user, checkpoint, chunk, id_map, errors, created)
+
+    checkpoint.status = 'completed'
+    db.session.commit()
+    return created, errors
+
+
+#! ------------ Job Helper Functions -----------
+
+EXPORT_CHECKPOINT_CHUNKS = 50
+
+
+def wants_background(args):
+    """True when the request asked for a job instead of an inline answer (?background=true)."""
+    return args.get('background', '').lower() in ('1', 'true')
+
+
+def job_accepted(message, job):
+    return jsonify({
+        'Message': message,
+        'Job': job.to_dict()
+    }), 202, {'Location': f'/api/jobs/{job.job_id}'}
+
+
+def user_jobs(user, limit):
+    query = select(Job).where(Job.user_id == user.user_id).order_by(Job.created_at.desc()).limit(limit)
+    return db.session.execute(query).scalars().all()
+
+
+def export_file_name(job):
+    return f"universe-{job.payload['universe_id']}.ndjson" + ('.gz' if job.payload.get('compress') else '')
+
+
+def queue_universe_import(user, stream, checkpoint, chunk_size):
+    """Spools the request body to the job files directory and queues its import."""
+    job_id = str(uuid.uuid4())
+    path = job_runner.file_path(job_id, '.upload')
+    with open(path, 'wb') as upload:
+        shutil.copyfileobj(stream, upload, 1024 * 1024)
+    return job_runner.enqueue('import_universe', user.user_id, {
+        'import_id': checkpoint.import_id, 'path': path, 'chunk_size': chunk_size
+    }, job_id=job_id)
+
+
+@job_handler('export_universe')
+def run_universe_export(context, universe_id, compress=False):
+    """Writes the archive to the job files directory; progress is in bytes written."""
+    if db.session.get(Universe, universe_id) is None:
+        raise LookupError('Universe not found.')
+    path = job_runner.file_path(context.job_id, '.ndjson.gz' if compress else '.ndjson')
+    written = 0
+    with open(path, 'wb') as archive:
+        for index, chunk in enumerate(stream_universe_export(universe_id, compress), start=1):
+            archive.write(chunk)
+            written += len(chunk)
+            if index % EXPORT_CHECKPOINT_CHUNKS == 0:
+                context.checkpoint(written)
+    context.checkpoint(written, written)
+    return {'bytes': written, 'download': f'/api/jobs/{context.job_id}/download'}
+
+
+@job_handler('import_universe')
+def run_universe_import(context, import_id, path, chunk_size):
+    """Resumes from the import checkpoint on retries; progress is in archive lines."""
+    user = db.session.get(User, context.user_id) if context.user_id else None
+    if user is None:
+        raise LookupError('The account no longer exists.')
+    checkpoint = start_universe_import(user, import_id)
+    try:
+        with open(path, 'rb') as stream:
+            created, errors = execute_universe_import(user, stream, checkpoint, chunk_size, context.checkpoint)
+    except Exception:
+        db.session.rollback()
+        checkpoint.status = 'failed'
+        db.session.commit()
+        raise
+    os.remove(path)
+    return {
+        'Import': checkpoint.to_dict(),
+        'created': created,
+        'error_count': len(errors),
+        'errors': errors[:IMPORT_MAX_REPORTED_ERRORS]
+    }
+
+
+@job_handler('delete_universe')
+def run_universe_deletion(context, universe_id):
+    universe = db.session.get(Universe, universe_id)
+    if universe is None:
+        raise LookupError('Universe not found.')
+    db.session.delete(universe)
+    db.session.commit()
+    return {'id': universe_id}
+
+
+@job_handler('delete_account')
+def run_account_deletion(context, user_id):
+    user = db.session.get(User, user_id)
+    if user is None:
+        raise LookupError('User not found.')
+    db.session.delete(user)
+    db.session.commit()
+    invalidate_cached_user(user_id)
+    return {'id': user_id}
+
+
+#! ------------ Search Helper Functions -----------
+
+SEARCH_MAX_TERMS = 10
+
+
+def validate_search_data(args):
+    if not re.findall(r'\w+', args.get('q', '')):
+        return False, 'Search query must contain at least one word.'
+    for kind in filter(None, args.get('type', '').split(',')):
+        if kind not in SEARCH_KINDS:
+            return False, f"Invalid type. Must be one of: {', '.join(SEARCH_KINDS)}"
+    try:
+        limit = int(args.get('limit', 20))
+    except ValueError:
+        return False, 'Limit must be an integer.'
+    if limit < 1 or limit > current_app.config.get('PAGE_SIZE_MAX', 200):
+        return False, 'Limit is out of range.'
+    return True, None
+
+
+def execute_search(user, q, kinds=None, limit=20):
+    """
+    Ranks the user's notes, characters, locations and universes against `q` with BM25
+    (titles weigh ten times more than bodies). Every word must match; the last one
+    also matches as a prefix. Raises NotImplementedError off SQLite.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        raise NotImplementedError('Search requires the SQLite FTS5 index.')
+    query, params = search_statement(user, q, kinds, limit)
+    return search_results(db.session.execute(query, params))
+
+
+def search_statement(user, q, kinds=None, limit=20):
+    """The FTS5 query behind execute_search, as (statement, params)."""
+    terms = re.findall(r'\w+', q)[:SEARCH_MAX_TERMS]
+    match = f'owner:"u{user.user_id}"'
+    if terms:
+        # Terms are scoped to the content columns so 'u' or 'u1' cannot match the owner token.
+        match += ' AND {title body}: (' + ' AND '.join(f'"{t}"' for t in terms) + '*)'
+    params = {'match': match, 'limit': limit}
+    kind_filter = ''
+    if kinds:
+        kind_filter = f'AND rowid % {SEARCH_KIND_COUNT} IN ({", ".join(str(SEARCH_KINDS[k]) for k in kinds)})'
+    query = text(f"""
+        SELECT rowid,
+               highlight(search_index, 0, '<mark>', '</mark>') AS title,
+               snippet(search_index, 1, '<mark>', '</mark>', '…', 16) AS snippet,
+               bm25(search_index, 10.0, 1.0, 0.0) AS score
+        FROM search_index
+        WHERE search_index MATCH :match {kind_filter}
+        ORDER BY score
+        LIMIT :limit
+    """)
+    return query, params
+
+
+def search_results(rows):
+    kind_names = {code: kind for kind, code in SEARCH_KINDS.items()}
+    return [{
+        'type': kind_names[r.rowid % SEARCH_KIND_COUNT],
+        'id': r.rowid // SEARCH_KIND_COUNT,
+        'title': r.title,
+        'snippet': r.snippet,
+        'score': round(-r.score, 4)
+    } for r in rows]
+
+
+def rebuild_search_index():
+    for statement in search_index_rebuild_sql():
+        db.session.execute(text(statement))
+    db.session.commit()
+
+
+
+#! ------------ Warm-up Helper Functions -----------
+
+def warm_up_statements():
+    """The hot read statements, built for a user id that never exists."""
+    nobody = UserSnapshot(0, False, None)
+    return [
+        collection_version_query(nobody),
+        login_query(''),
+        universe_summaries_query(nobody),
+        character_summaries_query(nobody),
+        note_summaries_query(nobody),
+        location_summaries_query(nobody, 0),
+        *note_link_queries([0]),
+        *(item_version_query(item_class, 0) for item_class in (Universe, Character, Note, Location)),
+    ]
+
+
+def warm_up_database():
+    """
+    Configures the mappers and opens a connection on every engine (running its pragmas),
+    then executes the hot read statements and primary-key loads once, so their compiled
+    forms are cached before the first request. Nothing is written.
+    """
+    configure_mappers()
+    timings = {}
+    for name, engine in db.engines.items():
+        started = time.perf_counter()
+        with Session(engine) as session:
+            for statement in warm_up_statements():
+                session.execute(statement).all()
+            session.get(User, 0)
+            for item_class in (Universe, Character, Note, Location):
+                session.get(item_class, 0, options=item_class.detail_options())
+        timings[name or 'default'] = time.perf_counter() - started
+    return timings